@@ -0,0 +1,334 @@
+import asyncio
+import collections
+import enum
+import logging
+import time
+import typing
+
+from cogbot.timing import current_task
+
+
+log = logging.getLogger(__name__)
+
+
+class Lane(enum.IntEnum):
+    """ Priority lanes for outbound actions, lowest value first. """
+
+    MODERATION = 0
+    REPLY = 1
+    REACTION = 2
+    FEED = 3
+
+
+# (requests, seconds) allowed per bucket to begin with, roughly mirroring Discord's per-route limits;
+# each bucket is corrected from Discord's rate-limit headers once it has made a request
+DEFAULT_LIMIT = (5, 1.0)
+ROUTE_LIMITS = {
+    "send_message": (5, 5.0),
+    "edit_message": (5, 5.0),
+    "reaction": (1, 0.25),
+    "edit_channel": (2, 600.0),
+    "roles": (10, 10.0),
+}
+
+
+class Bucket:
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.starts: typing.Deque[float] = collections.deque()
+        # set when Discord says the bucket is exhausted, or rate limits us
+        self.blocked_until = 0.0
+
+    def delay(self, now: float) -> float:
+        """ Seconds until another action may start in this bucket. """
+        blocked = self.blocked_until - now
+        while self.starts and (now - self.starts[0]) >= self.per:
+            self.starts.popleft()
+        if len(self.starts) < self.limit:
+            return max(blocked, 0.0)
+        return max(blocked, self.per - (now - self.starts[0]))
+
+    def consume(self, now: float):
+        self.starts.append(now)
+
+    def learn(self, now: float, limit: int, remaining: int, reset_after: float):
+        """ Correct the bucket from the limits Discord reported for a request. """
+        self.limit = limit
+        if reset_after <= 0:
+            return
+        if remaining == limit - 1:
+            # the first request of a window waits out the whole of it
+            self.per = reset_after
+        if remaining == 0:
+            self.blocked_until = max(self.blocked_until, now + reset_after)
+
+
+class Action:
+    __slots__ = (
+        "lane",
+        "bucket_key",
+        "coalesce_key",
+        "func",
+        "args",
+        "kwargs",
+        "future",
+        "enqueued_at",
+        "after",
+        "started",
+    )
+
+    def __init__(self, lane, bucket_key, coalesce_key, func, args, kwargs, future, after=None):
+        self.lane: Lane = lane
+        self.bucket_key = bucket_key
+        self.coalesce_key = coalesce_key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future: asyncio.Future = future
+        self.enqueued_at = time.monotonic()
+        # the action that has to be sent before this one may start, if any
+        self.after: typing.Optional[Action] = after
+        self.started = False
+
+    def ready(self) -> bool:
+        after = self.after
+        return after is None or after.started or after.future.done()
+
+
+class LaneStats:
+    def __init__(self):
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        started = self.completed + self.failed
+        return (self.total_wait / started) if started else 0.0
+
+
+class ActionQueue:
+    """
+    Central scheduler for outbound Discord writes.
+
+    Actions are queued per priority lane and started in lane order, subject to per-route rate-limit
+    buckets and a global cap on requests in flight. Pending actions with the same coalesce key are
+    merged into one, so that for example repeated edits of a message only go out once.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_in_flight: int = 5):
+        self.loop = loop
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.lanes: typing.Dict[Lane, typing.Deque[Action]] = {
+            lane: collections.deque() for lane in Lane
+        }
+        self.stats: typing.Dict[Lane, LaneStats] = {lane: LaneStats() for lane in Lane}
+        self._buckets: typing.Dict[typing.Hashable, Bucket] = {}
+        self._pending_by_key: typing.Dict[typing.Hashable, Action] = {}
+        # the action each task started by the queue is running, to attribute responses to buckets
+        self._running: typing.Dict[asyncio.Task, Action] = {}
+        # set when Discord rate limits us globally
+        self._blocked_until = 0.0
+        self._wakeup = asyncio.Event(loop=loop)
+        self._worker: asyncio.Task = None
+
+    def depth(self, lane: Lane = None) -> int:
+        if lane is None:
+            return sum(len(actions) for actions in self.lanes.values())
+        return len(self.lanes[lane])
+
+    def _get_bucket(self, bucket_key) -> Bucket:
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            limit, per = ROUTE_LIMITS.get(bucket_key[0], DEFAULT_LIMIT)
+            bucket = self._buckets[bucket_key] = Bucket(limit, per)
+        return bucket
+
+    def submit(
+        self,
+        func: typing.Callable,
+        *args,
+        lane: Lane,
+        bucket_key: typing.Tuple,
+        coalesce_key: typing.Hashable = None,
+        **kwargs,
+    ) -> asyncio.Future:
+        stats = self.stats[lane]
+        stats.submitted += 1
+
+        # merge into a pending action for the same target, if there is one
+        pending = self._pending_by_key.get(coalesce_key) if coalesce_key else None
+        if pending is not None and not pending.future.done():
+            pending.kwargs.update({k: v for k, v in kwargs.items() if v is not None})
+            if lane < pending.lane:
+                self.lanes[pending.lane].remove(pending)
+                pending.lane = lane
+                self.lanes[lane].append(pending)
+            stats.coalesced += 1
+            return pending.future
+
+        return self._enqueue(lane, bucket_key, coalesce_key, func, args, kwargs).future
+
+    def submit_in_order(
+        self,
+        calls: typing.Iterable[typing.Tuple[typing.Callable, tuple]],
+        *,
+        lane: Lane,
+        bucket_key: typing.Tuple,
+    ) -> typing.List[asyncio.Future]:
+        """
+        Submit several `(func, args)` actions that have to reach Discord in the order given. Each
+        one starts as soon as the one before it has been sent (see `mark_sent`) and the bucket
+        allows, without waiting for the previous response; or else once the previous one is done.
+        """
+        futures = []
+        previous = None
+        for func, args in calls:
+            self.stats[lane].submitted += 1
+            previous = self._enqueue(lane, bucket_key, None, func, args, {}, after=previous)
+            futures.append(previous.future)
+        return futures
+
+    def _enqueue(self, lane, bucket_key, coalesce_key, func, args, kwargs, after=None) -> Action:
+        future = self.loop.create_future()
+        action = Action(lane, bucket_key, coalesce_key, func, args, kwargs, future, after)
+        self.lanes[lane].append(action)
+        if coalesce_key:
+            self._pending_by_key[coalesce_key] = action
+
+        self._ensure_worker()
+        self._wakeup.set()
+
+        return action
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._worker = self.loop.create_task(self._run())
+
+    def _next_action(self, now: float) -> typing.Tuple[typing.Optional[Action], float]:
+        """ Pop the highest-priority action that may start now, or else how long to wait. """
+        if now < self._blocked_until:
+            return None, self._blocked_until - now
+        wait = None
+        for lane in Lane:
+            actions = self.lanes[lane]
+            for action in tuple(actions):
+                if action.future.cancelled():
+                    actions.remove(action)
+                    self._forget(action)
+                    continue
+                if not action.ready():
+                    # woken up again once the action it's waiting on has been sent
+                    continue
+                delay = self._get_bucket(action.bucket_key).delay(now)
+                if delay <= 0:
+                    actions.remove(action)
+                    self._forget(action)
+                    return action, 0.0
+                wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    def observe(
+        self,
+        limit: int = None,
+        remaining: int = None,
+        reset_after: float = None,
+        retry_after: float = None,
+        is_global: bool = False,
+    ):
+        """
+        Feed back the rate limits Discord reported for a request made by the current task, if it's
+        running a queued action. `retry_after` is set when the request was rate limited.
+        """
+        action = self._running.get(current_task(self.loop))
+        if action is None:
+            return
+        now = time.monotonic()
+        if retry_after is not None:
+            if is_global:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            else:
+                bucket = self._get_bucket(action.bucket_key)
+                bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+            log.info(
+                f"Rate limited for {retry_after:.2f}s on {'everything' if is_global else action.bucket_key}"
+            )
+        elif limit and remaining is not None and reset_after is not None:
+            self._get_bucket(action.bucket_key).learn(now, limit, remaining, reset_after)
+
+    def mark_sent(self):
+        """
+        Note that the current task's action has handed its request to the connection, so that
+        whatever is queued after it may start.
+        """
+        action = self._running.get(current_task(self.loop))
+        if action is not None and not action.started:
+            action.started = True
+            action.after = None
+            self._wakeup.set()
+
+    def _forget(self, action: Action):
+        if action.coalesce_key and self._pending_by_key.get(action.coalesce_key) is action:
+            del self._pending_by_key[action.coalesce_key]
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+
+            if self.in_flight < self.max_in_flight:
+                now = time.monotonic()
+                action, wait = self._next_action(now)
+                if action is not None:
+                    self._get_bucket(action.bucket_key).consume(now)
+                    self.in_flight += 1
+                    self.loop.create_task(self._execute(action, now))
+                    continue
+            else:
+                wait = None
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait, loop=self.loop)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, action: Action, started_at: float):
+        stats = self.stats[action.lane]
+        waited = started_at - action.enqueued_at
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        task = current_task(self.loop)
+        self._running[task] = action
+        try:
+            result = await action.func(*action.args, **action.kwargs)
+        except Exception as e:
+            stats.failed += 1
+            if not action.future.done():
+                action.future.set_exception(e)
+        else:
+            stats.completed += 1
+            if not action.future.done():
+                action.future.set_result(result)
+        finally:
+            self._running.pop(task, None)
+            self.in_flight -= 1
+            self._wakeup.set()
+
+    async def put(self, func: typing.Callable, *args, **kwargs):
+        """ Submit an action and wait for its result. """
+        future = self.submit(func, *args, **kwargs)
+        return await asyncio.shield(future, loop=self.loop)
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for actions in self.lanes.values():
+            for action in actions:
+                action.future.cancel()
+            actions.clear()
+        self._pending_by_key = {}
@@ -0,0 +1,193 @@
+import asyncio
+import bisect
+import logging
+import sqlite3
+import time
+import typing
+
+from cogbot.batch_writer import BatchWriter
+from cogbot.timing import current_task
+
+
+log = logging.getLogger(__name__)
+
+
+# upper bounds of the latency buckets, in seconds, with everything slower in a final bucket
+LATENCY_BOUNDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+LATENCY_COLUMNS = tuple(f"latency_{i}" for i in range(len(LATENCY_BOUNDS) + 1))
+
+# rollup table -> bucket width in seconds
+ROLLUPS = {"command_usage_minute": 60, "command_usage_hour": 3600}
+
+# (bucket start, server id, command, outcome)
+UsageKey = typing.Tuple[int, str, str, str]
+
+# (server id, command, invocations, total seconds)
+HotCommand = typing.Tuple[str, str, int, float]
+
+
+class UsageRow:
+    __slots__ = ("count", "total_seconds", "latency")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.latency = [0] * len(LATENCY_COLUMNS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.latency[bisect.bisect_left(LATENCY_BOUNDS, seconds)] += 1
+
+    def merge(self, other: "UsageRow"):
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        self.latency = [a + b for a, b in zip(self.latency, other.latency)]
+
+
+class CommandAnalytics:
+    """
+    Counts command invocations per server, command and outcome, with their latency, in minute and
+    hour rollups kept in SQLite.
+
+    Invocations are only counted in memory, by minute. Every so often the finished minutes are
+    added to both rollup tables in a single transaction on a background thread, so a command never
+    waits on the disk; if that fails, they're merged back in to be tried again. Minute rollups are
+    pruned after a while; hour rollups are kept.
+
+    The outcome is whatever the command last reacted with (success, failure, cooldown and so on),
+    unless it raised an error, in which case it's the kind of error.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        loop: asyncio.AbstractEventLoop,
+        flush_interval: float = 60,
+        retention_days: float = 7,
+    ):
+        self.path = path
+        self.loop = loop
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.rows: typing.Dict[UsageKey, UsageRow] = {}
+        # the outcomes reported by each task running a command, innermost last, since a command
+        # can run another one within it
+        self._outcomes: typing.Dict[asyncio.Task, typing.List[str]] = {}
+        self._connection: sqlite3.Connection = None
+        self._writer = BatchWriter(
+            loop,
+            "command usage rows",
+            flush_interval,
+            take=self._take_batch,
+            write=self._write_batch,
+            restore=self._restore_batch,
+        )
+        self._open()
+
+    def _open(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        latency_columns = "".join(
+            f"{column} INTEGER NOT NULL DEFAULT 0, " for column in LATENCY_COLUMNS
+        )
+        with self._connection:
+            for table in ROLLUPS:
+                self._connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    "bucket INTEGER NOT NULL, server TEXT NOT NULL, command TEXT NOT NULL, "
+                    "outcome TEXT NOT NULL, count INTEGER NOT NULL DEFAULT 0, "
+                    f"total_seconds REAL NOT NULL DEFAULT 0, {latency_columns}"
+                    "PRIMARY KEY (bucket, server, command, outcome))"
+                )
+
+    def begin_command(self):
+        task = current_task(self.loop)
+        if task is not None:
+            self._outcomes.setdefault(task, []).append("completed")
+
+    def set_outcome(self, outcome: str):
+        """ Report the outcome of the innermost command running in the current task, if any. """
+        outcomes = self._outcomes.get(current_task(self.loop))
+        if outcomes:
+            outcomes[-1] = outcome
+
+    def end_command(
+        self, server_id: typing.Optional[str], command: str, seconds: float, error: str = None
+    ):
+        task = current_task(self.loop)
+        outcomes = self._outcomes.get(task)
+        if outcomes:
+            outcome = outcomes.pop()
+            if not outcomes:
+                del self._outcomes[task]
+        else:
+            outcome = "completed"
+        now = time.time()
+        key = (int(now // 60) * 60, server_id or "", command, error or outcome)
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = UsageRow()
+        row.observe(seconds)
+        self._writer.schedule()
+
+    def _take_batch(self, everything: bool) -> typing.List[typing.Tuple[UsageKey, UsageRow]]:
+        # the current minute is still filling up, unless we're closing
+        current_minute = int(time.time() // 60) * 60
+        batch = [
+            (key, row) for key, row in self.rows.items() if everything or key[0] < current_minute
+        ]
+        for key, _ in batch:
+            del self.rows[key]
+        if self.rows:
+            self._writer.schedule()
+        return batch
+
+    def _restore_batch(self, batch: typing.List[typing.Tuple[UsageKey, UsageRow]]):
+        for key, row in batch:
+            existing = self.rows.get(key)
+            if existing is None:
+                self.rows[key] = row
+            else:
+                existing.merge(row)
+
+    def _write_batch(self, batch: typing.List[typing.Tuple[UsageKey, UsageRow]]):
+        latency_updates = ", ".join(f"{column} = {column} + ?" for column in LATENCY_COLUMNS)
+        with self._connection:
+            for table, width in ROLLUPS.items():
+                for (minute, server, command, outcome), row in batch:
+                    key = (minute // width * width, server, command, outcome)
+                    self._connection.execute(
+                        f"INSERT OR IGNORE INTO {table} (bucket, server, command, outcome) "
+                        "VALUES (?, ?, ?, ?)",
+                        key,
+                    )
+                    self._connection.execute(
+                        f"UPDATE {table} SET count = count + ?, total_seconds = total_seconds + ?, "
+                        f"{latency_updates} "
+                        "WHERE bucket = ? AND server = ? AND command = ? AND outcome = ?",
+                        (row.count, row.total_seconds, *row.latency, *key),
+                    )
+            cutoff = time.time() - self.retention_days * 86400
+            self._connection.execute("DELETE FROM command_usage_minute WHERE bucket < ?", (cutoff,))
+
+    async def flush(self, everything: bool = False):
+        await self._writer.flush(everything)
+
+    def _query_hot(self, since: float, limit: int) -> typing.List[HotCommand]:
+        return self._connection.execute(
+            "SELECT server, command, SUM(count), SUM(total_seconds) FROM command_usage_hour "
+            "WHERE bucket >= ? GROUP BY server, command ORDER BY SUM(count) DESC LIMIT ?",
+            (since // 3600 * 3600, limit),
+        ).fetchall()
+
+    async def hot_commands(self, hours: float = 24, limit: int = 10) -> typing.List[HotCommand]:
+        """ The most used commands per server over the last few hours, busiest first. """
+        await self.flush(everything=True)
+        since = time.time() - hours * 3600
+        return await self._writer.run(self._query_hot, since, limit)
+
+    async def close(self):
+        await self._writer.close()
+        if self._connection:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,79 @@
+import asyncio
+import concurrent.futures
+import logging
+import typing
+
+
+log = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """
+    Writes an owner's pending changes in batches on a single background thread, so that writes
+    stay in order and never block the event loop.
+
+    The owner collects changes in memory and calls `schedule` when there's something to write. A
+    flush then takes a batch from the owner with `take`, and writes it off the loop with `write`.
+    If the write fails, the batch is handed back with `restore`, to be merged under anything newer
+    that came in meanwhile, and the flush is scheduled again.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        name: str,
+        interval: float,
+        take: typing.Callable[[bool], typing.List],
+        write: typing.Callable[[typing.List], None],
+        restore: typing.Callable[[typing.List], None],
+    ):
+        self.loop = loop
+        self.name = name
+        self.interval = interval
+        self._take = take
+        self._write = write
+        self._restore = restore
+        self._flush_handle: asyncio.Handle = None
+        self._flushing: asyncio.Future = None
+        self._closed = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def schedule(self):
+        """ Flush after a while, unless a flush is already due. """
+        if self._flush_handle is None and self.loop is not None and not self._closed:
+            self._flush_handle = self.loop.call_later(self.interval, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        self._flushing = self.loop.create_task(self.flush())
+
+    async def run(self, fn: typing.Callable, *args):
+        """ Run something else on the writer thread, ordered after the writes before it. """
+        return await self.loop.run_in_executor(self._executor, fn, *args)
+
+    async def flush(self, everything: bool = False):
+        try:
+            batch = self._take(everything)
+        except:
+            log.exception(f"Failed to collect {self.name} for writing")
+            return
+        if not batch:
+            return
+        try:
+            await self.run(self._write, batch)
+            log.debug(f"Flushed {len(batch)} {self.name}")
+        except:
+            log.exception(f"Failed to flush {len(batch)} {self.name}")
+            self._restore(batch)
+            self.schedule()
+
+    async def close(self):
+        """ Write out everything that's left, and stop the writer thread. """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flushing is not None and not self._flushing.done():
+            await self._flushing
+        self._closed = True
+        await self.flush(everything=True)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,125 @@
+import asyncio
+import concurrent.futures
+import logging
+import time
+import typing
+
+from cogbot.timing import Histogram
+
+
+log = logging.getLogger(__name__)
+
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+def _timed_call(fn, args, kwargs):
+    # runs in the worker, so the queue time includes waiting for a free worker
+    started_at = time.time()
+    return started_at, fn(*args, **kwargs)
+
+
+class BlockingStats:
+    def __init__(self):
+        self.queued = Histogram()
+        self.run = Histogram()
+        self.active = 0
+        self.waiting = 0
+
+
+class BlockingExecutor:
+    """
+    Runs blocking or CPU-bound work off the event loop, on a thread pool or a process pool.
+
+    The thread pool suits work on shared in-memory data. The process pool suits self-contained
+    work whose arguments and results are cheap to pickle, since it also sidesteps the GIL. Each
+    owner (usually a cog) may only have so many jobs running at once, so that a burst of commands
+    in one extension can't starve the others.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        thread_workers: int = 4,
+        process_workers: int = 2,
+        limit_per_owner: int = 2,
+        owner_limits: typing.Dict[str, int] = None,
+    ):
+        self.loop = loop
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.limit_per_owner = limit_per_owner
+        self.owner_limits = owner_limits or {}
+        self.stats: typing.Dict[str, BlockingStats] = {}
+        self._semaphores: typing.Dict[str, asyncio.Semaphore] = {}
+        self._thread_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=thread_workers
+        )
+        # started on first use, since spawning processes isn't free
+        self._process_pool: concurrent.futures.ProcessPoolExecutor = None
+
+    def _get_pool(self, pool: str) -> concurrent.futures.Executor:
+        if pool == THREAD:
+            return self._thread_pool
+        if pool == PROCESS:
+            if self._process_pool is None:
+                self._process_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.process_workers
+                )
+            return self._process_pool
+        raise ValueError(f"Unknown pool: {pool}")
+
+    def _get_owner(self, owner) -> str:
+        if owner is None:
+            return "bot"
+        if isinstance(owner, str):
+            return owner
+        return type(owner).__name__
+
+    def _get_semaphore(self, owner: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(owner)
+        if semaphore is None:
+            limit = self.owner_limits.get(owner, self.limit_per_owner)
+            semaphore = self._semaphores[owner] = asyncio.Semaphore(limit, loop=self.loop)
+        return semaphore
+
+    def _get_stats(self, owner: str) -> BlockingStats:
+        stats = self.stats.get(owner)
+        if stats is None:
+            stats = self.stats[owner] = BlockingStats()
+        return stats
+
+    async def run(self, fn: typing.Callable, *args, pool: str = THREAD, owner=None, **kwargs):
+        executor = self._get_pool(pool)
+        owner = self._get_owner(owner)
+        stats = self._get_stats(owner)
+
+        submitted_at = time.time()
+        stats.waiting += 1
+        acquired = False
+        try:
+            async with self._get_semaphore(owner):
+                stats.waiting -= 1
+                acquired = True
+                stats.active += 1
+                try:
+                    started_at, result = await self.loop.run_in_executor(
+                        executor, _timed_call, fn, args, kwargs
+                    )
+                finally:
+                    stats.active -= 1
+        finally:
+            if not acquired:
+                stats.waiting -= 1
+
+        finished_at = time.time()
+        stats.queued.observe(max(0.0, started_at - submitted_at))
+        stats.run.observe(max(0.0, finished_at - started_at))
+        return result
+
+    def close(self):
+        self._thread_pool.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
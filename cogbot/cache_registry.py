@@ -0,0 +1,245 @@
+import collections
+import logging
+import time
+import typing
+
+from cogbot.memory import estimate_size
+
+
+log = logging.getLogger(__name__)
+
+
+_MISSING = object()
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # entries dropped to stay within budget
+        self.evictions = 0
+        # entries dropped for being too old
+        self.expirations = 0
+
+
+class Cache:
+    """
+    A mapping with optional limits on its number of entries, their total size and their age.
+
+    When over budget, the least recently used entries are evicted first. Entries older than the
+    time-to-live are dropped when next looked up, or when the registry sweeps. Lookups through `get`
+    and indexing count as hits or misses, while `in` checks don't.
+
+    A cache with a `reload` holds a complete dataset, which only ever changes by being reloaded, so
+    it can't be given any limits: a dataset missing some of its entries would just give wrong
+    answers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = None,
+        max_bytes: int = None,
+        ttl: float = None,
+        sizer: typing.Callable[[typing.Any], int] = None,
+        reload: typing.Callable[[], typing.Awaitable] = None,
+    ):
+        if reload is not None and (max_entries, max_bytes, ttl) != (None, None, None):
+            raise ValueError(f"Cache {name} holds a complete dataset, so it can't have limits")
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizer = sizer or (lambda value: estimate_size(value)[0])
+        # refills the cache when flushed, for caches that hold a complete dataset
+        self.reload = reload
+        self.stats = CacheStats()
+        self.bytes = 0
+        # when the cache was last loaded with a complete dataset, as a unix timestamp
+        self.loaded_at: float = None
+        self._data: typing.MutableMapping[typing.Any, typing.Any] = collections.OrderedDict()
+        self._sizes: typing.Dict[typing.Any, int] = {}
+        self._expires: typing.Dict[typing.Any, float] = {}
+
+    def _expired(self, key, now: float = None) -> bool:
+        expires_at = self._expires.get(key)
+        return expires_at is not None and (now or time.monotonic()) >= expires_at
+
+    def _discard(self, key):
+        del self._data[key]
+        self.bytes -= self._sizes.pop(key, 0)
+        self._expires.pop(key, None)
+
+    def _evict(self):
+        while self._data and (
+            (self.max_entries is not None and len(self._data) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            key = next(iter(self._data))
+            self._discard(key)
+            self.stats.evictions += 1
+
+    def get(self, key, default=None):
+        value = self._data.get(key, _MISSING)
+        if value is not _MISSING and self._expired(key):
+            self._discard(key)
+            self.stats.expirations += 1
+            value = _MISSING
+        if value is _MISSING:
+            self.stats.misses += 1
+            return default
+        self.stats.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self._discard(key)
+        self._data[key] = value
+        if self.max_bytes is not None:
+            size = self._sizes[key] = self.sizer(value)
+            self.bytes += size
+        if self.ttl is not None:
+            self._expires[key] = time.monotonic() + self.ttl
+        self._evict()
+
+    def __delitem__(self, key):
+        self._discard(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data and not self._expired(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def pop(self, key, default=None):
+        if key not in self._data:
+            return default
+        value = self._data[key]
+        self._discard(key)
+        return value
+
+    def clear(self):
+        self._data.clear()
+        self._sizes.clear()
+        self._expires.clear()
+        self.bytes = 0
+
+    def load(self, mapping: typing.Mapping):
+        """ Replace the contents of the cache with `mapping`. """
+        self.clear()
+        for key, value in mapping.items():
+            self[key] = value
+        self.loaded_at = time.time()
+
+    def sweep(self):
+        now = time.monotonic()
+        for key in [key for key in self._expires if self._expired(key, now)]:
+            self._discard(key)
+            self.stats.expirations += 1
+
+    def resize(self, max_entries=_MISSING, max_bytes=_MISSING, ttl=_MISSING):
+        """ Change the cache's limits, evicting whatever no longer fits. """
+        limits = {max_entries, max_bytes, ttl} - {_MISSING, None}
+        if self.reload is not None and limits:
+            raise ValueError(f"Cache {self.name} holds a complete dataset, so it can't have limits")
+        if max_entries is not _MISSING:
+            self.max_entries = max_entries
+        if ttl is not _MISSING:
+            self.ttl = ttl
+            now = time.monotonic()
+            self._expires = {key: now + ttl for key in self._data} if ttl is not None else {}
+        if max_bytes is not _MISSING:
+            if max_bytes is not None and self.max_bytes is None:
+                # sizes weren't being kept until now
+                self._sizes = {key: self.sizer(value) for key, value in self._data.items()}
+                self.bytes = sum(self._sizes.values())
+            elif max_bytes is None:
+                self._sizes = {}
+                self.bytes = 0
+            self.max_bytes = max_bytes
+        self._evict()
+
+
+class CacheRegistry:
+    """
+    The caches extensions keep, by name, so that they can be inspected, resized and flushed in one
+    place. Budgets from the bot's config override whatever limits an extension asks for, except on
+    caches that hold a complete dataset, which are never limited.
+    """
+
+    SWEEP_INTERVAL = 60
+
+    def __init__(self, bot, budgets: typing.Dict[str, dict] = None):
+        self.bot = bot
+        self.budgets = budgets or {}
+        self.caches: typing.Dict[str, Cache] = {}
+        self._owners: typing.Dict[str, typing.Any] = {}
+        self._sweep_job = None
+
+    def create(
+        self,
+        name: str,
+        owner=None,
+        max_entries: int = None,
+        max_bytes: int = None,
+        ttl: float = None,
+        sizer: typing.Callable[[typing.Any], int] = None,
+        reload: typing.Callable[[], typing.Awaitable] = None,
+    ) -> Cache:
+        limits = dict(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        budget = self.budgets.get(name, {})
+        if reload is not None and budget:
+            log.warning(f"Ignoring budget for cache {name}, since it holds a complete dataset")
+        else:
+            limits.update(budget)
+        cache = Cache(name, sizer=sizer, reload=reload, **limits)
+        self.caches[name] = cache
+        self._owners[name] = owner
+        self.bot.memory.register(name, lambda: cache, owner=owner)
+        if self._sweep_job is None:
+            self._sweep_job = self.bot.scheduler.every(
+                "CacheRegistry.sweep", self.SWEEP_INTERVAL, self._sweep
+            )
+        return cache
+
+    def get(self, name: str) -> typing.Optional[Cache]:
+        return self.caches.get(name)
+
+    def remove_owner(self, owner):
+        for name, cache_owner in tuple(self._owners.items()):
+            if cache_owner is owner:
+                del self.caches[name]
+                del self._owners[name]
+
+    async def flush(self, name: str):
+        """ Empty the cache, or reload it if it holds a complete dataset. """
+        cache = self.caches[name]
+        if cache.reload is not None:
+            await cache.reload()
+        else:
+            cache.clear()
+        log.info(f"Flushed cache: {name}")
+
+    async def _sweep(self):
+        for cache in tuple(self.caches.values()):
+            if cache.ttl is not None:
+                cache.sweep()
@@ -7,7 +7,7 @@ def is_manager_check(ctx: Context):
 
 
 def is_manager():
-    return commands.check(lambda ctx: is_manager_check(ctx))
+    return commands.check(is_manager_check)
 
 
 def is_staff_check(ctx: Context):
@@ -21,4 +21,4 @@ def is_staff_check(ctx: Context):
 
 
 def is_staff():
-    return commands.check(lambda ctx: is_staff_check(ctx))
+    return commands.check(is_staff_check)
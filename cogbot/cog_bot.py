@@ -1,23 +1,51 @@
+import asyncio
+import collections
 import logging
+import time
 import typing
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 
 import discord
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands.bot import _get_variable
 from discord.ext.commands.errors import *
+from discord.ext.commands.view import StringView
+from discord.http import Route
 
+from cogbot.action_queue import ActionQueue, Lane
+from cogbot.analytics import CommandAnalytics
+from cogbot.blocking import BlockingExecutor, THREAD
+from cogbot.cache_registry import CacheRegistry
 from cogbot.cog_bot_state import CogBotState
 from cogbot.cog_bot_server_state import CogBotServerState
+from cogbot.event_recorder import EventRecorder
+from cogbot.event_router import EventRouter
+from cogbot.extension_loader import ExtensionLoader
+from cogbot.loop_monitor import LoopMonitor
+from cogbot.memory import MemoryAccountant
+from cogbot.message_cache import MessageCache
+from cogbot.sampling_profiler import SamplingProfiler
+from cogbot.scheduler import Scheduler
+from cogbot.state_store import StateStore
+from cogbot.timing import Timings
+from cogbot.tracing import JsonLinesExporter, Tracer
 from cogbot.types import ServerId, ChannelId
+from cogbot.warmup import ExtensionNotReady, WarmupCoordinator
+from cogbot.web_client import WebClient
 
 
 log = logging.getLogger(__name__)
 
 
+class _UnlockedRoute(Route):
+    # without a bucket, discord.py gives each request a lock of its own
+    bucket = None
+
+
 class CogBot(commands.Bot):
-    def __init__(self, state: CogBotState, **options):
+    def __init__(self, state: CogBotState, datasets: dict = None, **options):
         super().__init__(
             command_prefix=commands.when_mentioned_or(*state.command_prefix),
             description=state.description,
@@ -38,8 +66,127 @@ class CogBot(commands.Bot):
         # A queue of messages to send after login.
         self.queued_messages = []
 
+        # How many of each event have been dispatched.
+        self.event_counts: typing.Counter[str] = collections.Counter()
+
+        # Datasets carried over from a crashed bot, by cog name.
+        self.recovered_datasets: typing.Dict[str, typing.Any] = datasets or {}
+
+        # Runtime state that should survive a restart.
+        self.store = StateStore(
+            state.state_store,
+            loop=self.loop,
+            flush_interval=state.state_store_flush_interval,
+        )
+
+        # Approximate memory use per extension and cache, tracing allocations if enabled.
+        self.memory = MemoryAccountant(self, tracemalloc_frames=state.tracemalloc_frames)
+
+        # Latency histograms for commands and listeners.
+        self.timings = Timings(loop=self.loop)
+
+        # Runs periodic and delayed jobs for extensions.
+        self.scheduler = Scheduler(loop=self.loop)
+
+        # Caches kept by extensions, with their budgets and stats.
+        self.caches = CacheRegistry(self, budgets=state.cache_budgets)
+
+        # Counts command usage per server and hour, if enabled.
+        self.analytics: CommandAnalytics = None
+        if state.command_analytics:
+            self.analytics = CommandAnalytics(
+                state.command_analytics,
+                loop=self.loop,
+                flush_interval=state.command_analytics_flush_interval,
+                retention_days=state.command_analytics_retention_days,
+            )
+
+        # Traces commands through their Discord calls and remote fetches, if enabled.
+        exporter: JsonLinesExporter = None
+        if state.trace_log:
+            exporter = JsonLinesExporter(self, state.trace_log)
+            exporter.start()
+        self.tracer = Tracer(loop=self.loop, exporter=exporter, sample_rate=state.trace_sample_rate)
+        if self.tracer.enabled:
+            self._trace_http()
+
+        # Watches for callbacks that block the event loop.
+        self.loop_monitor = LoopMonitor(
+            loop=self.loop,
+            interval=state.loop_monitor_interval,
+            threshold=state.loop_monitor_threshold,
+            history=state.loop_monitor_history,
+        )
+        self.loop_monitor.start()
+
+        # Samples where the event loop spends its time, if enabled.
+        self.sampling_profiler: SamplingProfiler = None
+        if state.sampling_profiler:
+            self.sampling_profiler = SamplingProfiler(
+                loop=self.loop,
+                find_cog=self.loop_monitor.find_cog,
+                interval=state.sampling_profiler_interval,
+                window=state.sampling_profiler_window,
+                directory=state.sampling_profiler_directory,
+                keep=state.sampling_profiler_keep,
+            )
+            self.sampling_profiler.start()
+
+        # Runs cog warm-ups together, and holds commands until their cog is ready.
+        self.warmup = WarmupCoordinator(
+            loop=self.loop,
+            concurrency=state.warmup_concurrency,
+            timeout=state.warmup_timeout,
+        )
+
+        # Loads and profiles extensions, deferring them if lazy loading is enabled.
+        self.extension_loader = ExtensionLoader(self, lazy=state.lazy_extensions)
+
+        # Routes events only to the listeners whose filters match.
+        self.router = EventRouter(self)
+
+        # Recent messages per channel, to avoid history requests.
+        self.message_cache = MessageCache(self, size=state.message_cache_size)
+        self.memory.register("CogBot.message_cache", lambda: self.message_cache)
+        self.message_cache.install()
+        self.memory.register("discord.messages", lambda: self.connection.messages)
+
+        # Schedules outbound writes by priority lane and rate-limit bucket.
+        self.outbound = ActionQueue(
+            loop=self.loop, max_in_flight=state.outbound_max_in_flight
+        )
+        self._observe_rate_limits()
+
+        # Thread and process pools for blocking and CPU-bound work.
+        self.blocking = BlockingExecutor(
+            loop=self.loop,
+            thread_workers=state.blocking_thread_workers,
+            process_workers=state.blocking_process_workers,
+            limit_per_owner=state.blocking_limit_per_extension,
+            owner_limits=state.blocking_extension_limits,
+        )
+
+        # Shared HTTP client for extensions that fetch remote data.
+        self.web = WebClient(
+            loop=self.loop,
+            timeout=state.http_timeout,
+            retries=state.http_retries,
+            connection_limit=state.http_connection_limit,
+            connection_limit_per_host=state.http_connection_limit_per_host,
+            blocking=self.blocking,
+            tracer=self.tracer,
+        )
+
+        # Records incoming events for replay, if enabled.
+        self.recorder: EventRecorder = None
+        if state.event_recorder:
+            self.recorder = EventRecorder(
+                self, state.event_recorder, anonymize=state.event_recorder_anonymize
+            )
+            self.recorder.install()
+
         if self.state.extensions:
-            self.load_extensions(*self.state.extensions)
+            self.load_extensions(*self.state.extensions, defer=True)
         else:
             log.info("No extensions to load")
 
@@ -70,29 +217,386 @@ class CogBot(commands.Bot):
     def queue_message(self, dest_getter, dest_id, content):
         self.queued_messages.append((dest_getter, dest_id, content))
 
-    def load_extensions(self, *extensions):
+    def export_datasets(self) -> typing.Dict[str, typing.Any]:
+        """ Collect the already-loaded datasets of cogs, so a new bot can pick them up. """
+        datasets = {}
+        for cog_name, cog in self.cogs.items():
+            export_dataset = getattr(cog, "export_dataset", None)
+            if export_dataset:
+                try:
+                    dataset = export_dataset()
+                except:
+                    log.exception(f"Failed to export dataset of {cog_name}")
+                    continue
+                if dataset is not None:
+                    datasets[cog_name] = dataset
+        log.info(f"Exported datasets of {len(datasets)} cogs")
+        return datasets
+
+    def recover_dataset(self, cog) -> typing.Any:
+        """ Take the dataset carried over for a cog, if any. Only returned once. """
+        dataset = self.recovered_datasets.pop(type(cog).__name__, None)
+        if dataset is not None:
+            log.info(f"Recovered dataset of {type(cog).__name__}")
+        return dataset
+
+    def load_extensions(self, *extensions, defer: bool = False):
         log.info(f"Loading {len(extensions)} extensions...")
+        started_at = time.perf_counter()
         for ext in extensions:
-            log.info(f"Loading extension {ext}...")
             try:
-                self.load_extension(ext)
+                if defer and self.extension_loader.defer(ext):
+                    continue
+                log.info(f"Loading extension {ext}...")
+                self.extension_loader.load(ext)
             except Exception as e:
                 log.exception(f"Failed to load extension {ext}")
-        log.info(f"Finished loading extensions")
+        log.info(
+            f"Finished loading extensions in {time.perf_counter() - started_at:.3f}s"
+        )
 
     def unload_extensions(self, *extensions):
         log.info(f"Unloading {len(extensions)} extensions...")
         for ext in extensions:
             log.info(f"Unloading extension {ext}...")
             try:
-                self.unload_extension(ext)
+                self.extension_loader.unload(ext)
             except Exception as e:
                 log.exception(f"Failed to unload extension {ext}")
         log.info(f"Finished unloading extensions")
 
+    def _trace_http(self):
+        # every Discord REST call goes through here, so time the ones made within a trace
+        request = self.http.request
+
+        async def traced_request(route, **kwargs):
+            with self.tracer.span("discord.request", method=route.method, path=route.path):
+                return await request(route, **kwargs)
+
+        self.http.request = traced_request
+
+    def _observe_rate_limits(self):
+        # discord.py keeps the rate-limit headers to itself, so look at the responses on their way
+        # back to it and correct the action queue's buckets from them
+        request = self.http.session.request
+
+        async def observed_request(method, url, **kwargs):
+            # the request is on its way, so anything ordered after it may follow
+            self.outbound.mark_sent()
+            response = await request(method, url, **kwargs)
+            try:
+                headers = response.headers
+                if response.status == 429:
+                    # the body is cached, so discord.py can still read it afterwards
+                    data = await response.json()
+                    self.outbound.observe(
+                        retry_after=data["retry_after"] / 1000.0,
+                        is_global=data.get("global", False),
+                    )
+                elif "X-RateLimit-Limit" in headers:
+                    now = parsedate_to_datetime(headers["Date"]).timestamp()
+                    self.outbound.observe(
+                        limit=int(headers["X-RateLimit-Limit"]),
+                        remaining=int(headers["X-RateLimit-Remaining"]),
+                        reset_after=int(headers["X-RateLimit-Reset"]) - now,
+                    )
+            except Exception:
+                log.exception(f"Failed to read rate limits from response for {method} {url}")
+            return response
+
+        self.http.session.request = observed_request
+
+    def dispatch(self, event_name, *args, **kwargs):
+        self.event_counts[event_name] += 1
+        super().dispatch(event_name, *args, **kwargs)
+        for handler in self.router.route(event_name, *args):
+            coro = self._run_extra(handler, event_name, *args, **kwargs)
+            self.loop.create_task(coro)
+
+    def add_cog(self, cog):
+        super().add_cog(cog)
+        self.loop_monitor.track_cog(cog)
+        # warm-ups are run by the coordinator instead of as plain listeners
+        on_ready = getattr(cog, "on_ready", None)
+        if on_ready:
+            self.remove_listener(on_ready)
+            self.warmup.add(cog)
+
+    def remove_cog(self, name):
+        cog = self.cogs.get(name)
+        if cog is not None:
+            self.router.remove_routes(cog)
+            self.warmup.remove(cog)
+            self.loop_monitor.untrack_cog(cog)
+            self.scheduler.cancel_owner(cog)
+            self.memory.unregister_owner(cog)
+            self.caches.remove_owner(cog)
+        return super().remove_cog(name)
+
+    async def _run_extra(self, coro, event_name, *args, **kwargs):
+        # NOTE mirrors the base implementation, timing each listener
+        started_at = time.perf_counter()
+        failed = False
+        try:
+            await coro(*args, **kwargs)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            failed = True
+            try:
+                await self.on_error(event_name, *args, **kwargs)
+            except asyncio.CancelledError:
+                pass
+        finally:
+            owner = getattr(coro, "__self__", None)
+            name = coro.__name__ if owner is None else f"{type(owner).__name__}.{coro.__name__}"
+            self.timings.observe_listener(name, time.perf_counter() - started_at, failed)
+
+    async def process_commands(self, message):
+        # NOTE mirrors the base implementation, so that commands can wait for their cog to warm up
+        # these locals are looked up by `say` and `reply`
+        _internal_channel = message.channel
+        _internal_author = message.author
+
+        started_at = time.perf_counter()
+
+        view = StringView(message.content)
+        if self._skip_check(message.author, self.user):
+            return
+
+        prefix = await self._get_prefix(message)
+        invoked_prefix = prefix
+
+        if not isinstance(prefix, (tuple, list)):
+            if not view.skip_string(prefix):
+                return
+        else:
+            invoked_prefix = discord.utils.find(view.skip_string, prefix)
+            if invoked_prefix is None:
+                return
+
+        invoker = view.get_word()
+        ctx = Context(
+            bot=self,
+            invoked_with=invoker,
+            message=message,
+            view=view,
+            prefix=invoked_prefix,
+        )
+
+        if invoker in self.commands:
+            command = self.commands[invoker]
+            self.dispatch("command", command, ctx)
+            parsed_at = waited_at = time.perf_counter()
+            failed = False
+            error_outcome = None
+            self.timings.begin_command()
+            if self.analytics:
+                self.analytics.begin_command()
+            trace = self.tracer.trace("command", invoker=invoker)
+            try:
+                with trace:
+                    try:
+                        if command.instance is not None:
+                            with self.tracer.span("warmup"):
+                                await self.warmup.wait(command.instance)
+                        waited_at = time.perf_counter()
+                        with self.tracer.span("invoke"):
+                            await command.invoke(ctx)
+                    finally:
+                        # the span is written out as soon as it exits, so label it while it's open
+                        trace.set(
+                            command=(ctx.command or command).qualified_name,
+                            prefix_seconds=round(parsed_at - started_at, 6),
+                        )
+            except CommandError as e:
+                failed = True
+                error_outcome = self._error_outcome(e)
+                (ctx.command or command).dispatch_error(e, ctx)
+            else:
+                self.dispatch("command_completion", command, ctx)
+            finally:
+                finished_at = time.perf_counter()
+                # ctx.command ends up as the subcommand that was actually invoked
+                name = (ctx.command or command).qualified_name
+                self.timings.observe_command(
+                    name,
+                    parse=parsed_at - started_at,
+                    wait=waited_at - parsed_at,
+                    body=finished_at - waited_at,
+                    api=self.timings.end_command(),
+                    error=failed,
+                )
+                if self.analytics:
+                    self.analytics.end_command(
+                        message.server.id if message.server else None,
+                        name,
+                        finished_at - started_at,
+                        error=error_outcome,
+                    )
+        elif invoker:
+            exc = CommandNotFound(f'Command "{invoker}" is not found')
+            self.dispatch("command_error", exc, ctx)
+
+    @staticmethod
+    def _error_outcome(error: CommandError) -> str:
+        if isinstance(error, CheckFailure):
+            return "denied"
+        if isinstance(error, CommandOnCooldown):
+            return "cooldown"
+        if isinstance(error, ExtensionNotReady):
+            return "not_ready"
+        if isinstance(error, CommandInvokeError):
+            return "error"
+        # bad or missing arguments and the like
+        return "bad_usage"
+
     def force_logout(self):
         self._is_logged_in.clear()
 
+    async def close(self):
+        # send anything still waiting to go out, while we're still logged in
+        for state in tuple(self.server_state.values()):
+            await state.close()
+        await super().close()
+        if self.recorder:
+            await self.recorder.close()
+        await self.tracer.close()
+        if self.analytics:
+            await self.analytics.close()
+        self.loop_monitor.stop()
+        if self.sampling_profiler:
+            self.sampling_profiler.stop()
+        self.scheduler.close()
+        self.outbound.close()
+        await self.web.close()
+        await self.store.close()
+        self.blocking.close()
+        self.memory.close()
+
+    async def run_blocking(self, fn, *args, pool: str = THREAD, owner=None, **kwargs):
+        """
+        Run blocking or CPU-bound work on the thread pool (default) or the process pool, without
+        holding up the event loop. Pass the calling cog as `owner` to apply its concurrency cap.
+        """
+        name = getattr(fn, "__qualname__", None) or type(fn).__name__
+        with self.tracer.span("blocking", function=name, pool=pool):
+            return await self.blocking.run(fn, *args, pool=pool, owner=owner, **kwargs)
+
+    # outbound writes go through the action queue
+
+    async def _outbound(self, func, *args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            with self.tracer.span("discord." + func.__name__, lane=kwargs["lane"].name.lower()):
+                return await self.outbound.put(func, *args, **kwargs)
+        finally:
+            self.timings.add_api_time(time.perf_counter() - started_at)
+
+    async def send_message(self, destination, content=None, *, lane=Lane.REPLY, **kwargs):
+        message = await self._outbound(
+            super().send_message,
+            destination,
+            content,
+            lane=lane,
+            bucket_key=("send_message", destination.id),
+            **kwargs,
+        )
+        # don't wait for the gateway to echo it back, in case we look at the channel again first
+        self.message_cache.add(message)
+        return message
+
+    async def edit_message(
+        self, message, new_content=None, *, embed=None, lane=Lane.REPLY
+    ):
+        return await self._outbound(
+            super().edit_message,
+            message,
+            new_content=new_content,
+            embed=embed,
+            lane=lane,
+            bucket_key=("edit_message", message.channel.id),
+            coalesce_key=("edit_message", message.id),
+        )
+
+    async def add_reaction(self, message, emoji, *, lane=Lane.REACTION):
+        return await self._outbound(
+            super().add_reaction,
+            message,
+            emoji,
+            lane=lane,
+            bucket_key=("reaction", message.channel.id),
+        )
+
+    async def _add_reaction_unlocked(self, message, emoji):
+        # as `Client.add_reaction`, but on a route discord.py doesn't lock, since it would hold each
+        # reaction in the channel until the previous one's response came back
+        if isinstance(emoji, discord.Emoji):
+            emoji = f"{emoji.name}:{emoji.id}"
+        route = _UnlockedRoute(
+            "PUT",
+            "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me",
+            channel_id=message.channel.id,
+            message_id=message.id,
+            emoji=emoji,
+        )
+        return await self.http.request(route)
+
+    async def add_reactions(self, message, *emojis, lane=Lane.REACTION):
+        # Discord shows reactions in the order they were added, so each one starts once the previous
+        # one's request has been handed to the connection; the action queue paces them to the
+        # route's rate limit in place of discord.py's lock
+        futures = self.outbound.submit_in_order(
+            ((self._add_reaction_unlocked, (message, emoji)) for emoji in emojis),
+            lane=lane,
+            bucket_key=("reaction", message.channel.id),
+        )
+        gathered = asyncio.gather(*futures, loop=self.loop)
+        started_at = time.perf_counter()
+        try:
+            with self.tracer.span("discord.add_reactions", lane=lane.name.lower(), count=len(emojis)):
+                return await asyncio.shield(gathered, loop=self.loop)
+        finally:
+            self.timings.add_api_time(time.perf_counter() - started_at)
+
+    async def remove_reaction(self, message, emoji, member, *, lane=Lane.REACTION):
+        return await self._outbound(
+            super().remove_reaction,
+            message,
+            emoji,
+            member,
+            lane=lane,
+            bucket_key=("reaction", message.channel.id),
+        )
+
+    async def edit_channel(self, channel, *, lane=Lane.REPLY, **options):
+        return await self._outbound(
+            super().edit_channel,
+            channel,
+            lane=lane,
+            bucket_key=("edit_channel", channel.id),
+            coalesce_key=("edit_channel", channel.id),
+            **options,
+        )
+
+    async def add_roles(self, member, *roles, lane=Lane.REPLY):
+        return await self._outbound(
+            super().add_roles,
+            member,
+            *roles,
+            lane=lane,
+            bucket_key=("roles", member.server.id),
+        )
+
+    async def remove_roles(self, member, *roles, lane=Lane.REPLY):
+        return await self._outbound(
+            super().remove_roles,
+            member,
+            *roles,
+            lane=lane,
+            bucket_key=("roles", member.server.id),
+        )
+
     async def send_error(self, ctx: Context, destination, error: CommandError):
         place = "" if ctx.message.server is None else f" on **{ctx.message.server}**"
         reply = f"There was a problem with your command{place}: *{error.args[0]}*"
@@ -134,6 +638,9 @@ class CogBot(commands.Bot):
     async def on_ready(self):
         log.info(f"Logged in as {self.user.name} (id {self.user.id})")
 
+        # we may have missed messages while disconnected
+        self.message_cache.clear()
+
         # resolve configured servers
         for server_key, server_options in self.state.servers.items():
             # copy options dict because we need to make modifications
@@ -148,7 +655,10 @@ class CogBot(commands.Bot):
                     try:
                         self.server_by_key[server_key] = server
                         state = CogBotServerState(self, server, **options)
+                        old_state = self.server_state.get(server_id)
                         self.server_state[server_id] = state
+                        if old_state:
+                            await old_state.close()
                         log.info(
                             f"Successfully configured server {server_key} <{server.id}>: {server}"
                         )
@@ -161,6 +671,12 @@ class CogBot(commands.Bot):
             else:
                 log.error(f"Missing server_id for server {server_key}")
 
+        # Warm up cogs, now that servers have been resolved.
+        self.warmup.start()
+
+        # Load anything that was deferred, now that we're connected.
+        self.loop.create_task(self.extension_loader.load_all_deferred())
+
         # Send any queued messages.
         if self.queued_messages:
             log.info(f"Sending {len(self.queued_messages)} queued messages...")
@@ -191,23 +707,36 @@ class CogBot(commands.Bot):
         return now > then
 
     async def get_latest_message(self, channel: discord.Channel) -> discord.Message:
-        async for message in self.logs_from(channel, limit=1):
-            return message
+        return await self.message_cache.get_latest(channel)
+
+    async def get_recent_messages(
+        self, channel: discord.Channel, limit: int
+    ) -> typing.List[discord.Message]:
+        return await self.message_cache.get_recent(channel, limit)
 
     async def is_latest_message(self, message: discord.Message) -> bool:
         latest_message = await self.get_latest_message(message.channel)
         return message.id == latest_message.id
 
+    async def on_resumed(self):
+        # we may have missed messages while disconnected
+        self.message_cache.clear()
+
+    async def on_message_edit(self, before, after):
+        self.message_cache.update(after)
+
     async def on_message(self, message):
+        self.message_cache.add(message)
+
         if self.care_about_it(message):
             # listen to anyone on public channels
             if message.server:
-                log.info(f"[{message.server}/{message.author}] {message.content}")
+                log.info("[%s/%s] %s", message.server, message.author, message.content)
                 await super().on_message(message)
 
             # listen only to managers on private (dm) channels
             elif message.author.id in self.state.managers:
-                log.info(f"[{message.author}] {message.content}")
+                log.info("[%s] %s", message.author, message.content)
                 await super().on_message(message)
 
     async def on_command_error(self, error: CommandError, ctx: Context):
@@ -226,6 +755,9 @@ class CogBot(commands.Bot):
             if self.state.react_to_check_failures:
                 await self.react_denied(ctx)
 
+        elif isinstance(inner_error, ExtensionNotReady):
+            await self.react_cooldown(ctx)
+
         elif isinstance(inner_error, CommandOnCooldown):
             if self.state.react_to_command_cooldowns:
                 await self.react_cooldown(ctx)
@@ -238,22 +770,36 @@ class CogBot(commands.Bot):
             await self.react_poop(ctx)
 
     async def react_success(self, ctx: Context):
+        if self.analytics:
+            self.analytics.set_outcome("success")
         await self.add_reaction(ctx.message, "✔")
 
     async def react_neutral(self, ctx: Context):
+        if self.analytics:
+            self.analytics.set_outcome("neutral")
         await self.add_reaction(ctx.message, "➖")
 
     async def react_question(self, ctx: Context):
+        if self.analytics:
+            self.analytics.set_outcome("question")
         await self.add_reaction(ctx.message, "❓")
 
     async def react_failure(self, ctx: Context):
+        if self.analytics:
+            self.analytics.set_outcome("failure")
         await self.add_reaction(ctx.message, "❗")
 
     async def react_denied(self, ctx: Context):
+        if self.analytics:
+            self.analytics.set_outcome("denied")
         await self.add_reaction(ctx.message, "🚫")
 
     async def react_cooldown(self, ctx: Context):
+        if self.analytics:
+            self.analytics.set_outcome("cooldown")
         await self.add_reaction(ctx.message, "⏳")
 
     async def react_poop(self, ctx: Context):
+        if self.analytics:
+            self.analytics.set_outcome("poop")
         await self.add_reaction(ctx.message, "💩")
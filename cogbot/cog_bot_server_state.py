@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import typing
@@ -5,14 +6,65 @@ from datetime import datetime
 
 import discord
 
+from cogbot.action_queue import Lane
 from cogbot.types import ServerId, ChannelId
 
 
 log = logging.getLogger(__name__)
 
 
+def _quote_by_line(text: str) -> str:
+    # a `>>>` quote runs to the end of the message, which would take in any entries that follow
+    head, marker, quoted = text.partition(">>> ")
+    if not marker:
+        return text
+    return head + "\n".join(f"> {line}" for line in quoted.split("\n"))
+
+
+class ModLogEntry:
+    def __init__(
+        self,
+        member: discord.Member,
+        content: str,
+        message: discord.Message = None,
+        icon: str = None,
+        color: int = None,
+        message_link: str = None,
+    ):
+        # everything is worked out up front, in case it changes before the entry is sent
+        self.timestamp = datetime.utcnow()
+        self.color = color or discord.Embed.Empty
+        self.icon_url = member.avatar_url
+
+        icon = icon or ":arrow_right:"
+        description = f"{member.mention} {content}"
+        if message_link:
+            self.description = " ".join((f"[{icon}]({message_link})", description))
+        else:
+            self.description = " ".join((icon, description))
+
+        if message:
+            self.footer = f"{member} in #{message.channel}"
+        else:
+            self.footer = f"{member}"
+
+        # how the entry reads when combined with others, which don't get a footer of their own
+        first, *rest = _quote_by_line(self.description).split("\n")
+        self.line = "\n".join((f"`{self.timestamp:%H:%M:%S}` {first} — {self.footer}", *rest))
+
+
 class CogBotServerState:
-    def __init__(self, bot, server: discord.Server, log_channel: ChannelId = None):
+    # the most text an embed description can hold
+    EMBED_DESCRIPTION_LIMIT = 2048
+
+    def __init__(
+        self,
+        bot,
+        server: discord.Server,
+        log_channel: ChannelId = None,
+        mod_log_batch_window: float = None,
+        mod_log_batch_size: int = 10,
+    ):
         self.bot = bot
         self.server: discord.Server = server
 
@@ -25,6 +77,14 @@ class CogBotServerState:
                     f"[{self.server}] Failed to resolve log channel <{log_channel}>"
                 )
 
+        # mod-log entries are collected for this long and sent together, if set
+        self.mod_log_batch_window = mod_log_batch_window
+        self.mod_log_batch_size = mod_log_batch_size
+        self._mod_log_pending: typing.List[ModLogEntry] = []
+        self._mod_log_handle: asyncio.Handle = None
+        # keeps batches in order
+        self._mod_log_lock = asyncio.Lock(loop=bot.loop)
+
     async def mod_log(
         self,
         member: discord.Member,
@@ -34,27 +94,93 @@ class CogBotServerState:
         color: int = None,
     ):
         if self.log_channel:
-            icon = icon or ":arrow_right:"
-            color = color or discord.Embed.Empty
+            entry = ModLogEntry(
+                member,
+                content,
+                message=message,
+                icon=icon,
+                color=color,
+                message_link=self.bot.make_message_link(message) if message else None,
+            )
+
+            if not self.mod_log_batch_window:
+                await self._send_mod_log([entry])
+                return
+
+            self._mod_log_pending.append(entry)
+            if len(self._mod_log_pending) >= self.mod_log_batch_size:
+                await self.flush_mod_log()
+            elif self._mod_log_handle is None:
+                self._mod_log_handle = self.bot.loop.call_later(
+                    self.mod_log_batch_window,
+                    lambda: self.bot.loop.create_task(self._flush_mod_log_safely()),
+                )
 
-            timestamp = datetime.utcnow()
-            description = f"{member.mention} {content}"
+    async def flush_mod_log(self):
+        """ Send any pending mod-log entries now. """
+        if self._mod_log_handle is not None:
+            self._mod_log_handle.cancel()
+            self._mod_log_handle = None
+        async with self._mod_log_lock:
+            entries, self._mod_log_pending = self._mod_log_pending, []
+            if entries:
+                await self._send_mod_log(entries)
 
-            if message:
-                message_link = self.bot.make_message_link(message)
-                description = " ".join((f"[{icon}]({message_link})", description))
-            else:
-                description = " ".join((icon, description))
+    async def _flush_mod_log_safely(self):
+        try:
+            await self.flush_mod_log()
+        except:
+            log.exception(f"[{self.server}] Failed to send pending mod-log entries")
 
+    async def close(self):
+        await self._flush_mod_log_safely()
+
+    def _fit(self, text: str) -> str:
+        """ Cut text short to fit in an embed description, if it has to be. """
+        if len(text) <= self.EMBED_DESCRIPTION_LIMIT:
+            return text
+        return text[: self.EMBED_DESCRIPTION_LIMIT - 1] + "…"
+
+    def _make_embed(self, entry: ModLogEntry) -> discord.Embed:
+        em = discord.Embed(
+            timestamp=entry.timestamp, description=self._fit(entry.description), color=entry.color
+        )
+        em.set_footer(text=entry.footer, icon_url=entry.icon_url)
+        return em
+
+    def _make_combined_embeds(
+        self, entries: typing.List[ModLogEntry]
+    ) -> typing.List[discord.Embed]:
+        # as few embeds as will fit the entries, one line each, timed in UTC
+        chunks: typing.List[typing.List[typing.Tuple[ModLogEntry, str]]] = [[]]
+        length = 0
+        for entry in entries:
+            line = self._fit(entry.line)
+            added = len(line) + 1
+            if chunks[-1] and length + added > self.EMBED_DESCRIPTION_LIMIT:
+                chunks.append([])
+                length = 0
+            chunks[-1].append((entry, line))
+            length += added
+
+        embeds = []
+        for chunk in chunks:
+            colors = {entry.color for entry, _ in chunk}
             em = discord.Embed(
-                timestamp=timestamp, description=description, color=color
+                timestamp=chunk[-1][0].timestamp,
+                description="\n".join(line for _, line in chunk),
+                color=colors.pop() if len(colors) == 1 else discord.Embed.Empty,
             )
+            em.set_footer(text=f"{len(chunk)} entries (times in UTC)")
+            embeds.append(em)
+        return embeds
 
-            if message:
-                em.set_footer(
-                    text=f"{member} in #{message.channel}", icon_url=member.avatar_url
-                )
-            else:
-                em.set_footer(text=f"{member}", icon_url=member.avatar_url)
-
-            await self.bot.send_message(self.log_channel, embed=em)
+    async def _send_mod_log(self, entries: typing.List[ModLogEntry]):
+        if len(entries) == 1:
+            embeds = [self._make_embed(entries[0])]
+        else:
+            embeds = self._make_combined_embeds(entries)
+        for em in embeds:
+            await self.bot.send_message(
+                self.log_channel, embed=em, lane=Lane.MODERATION
+            )
@@ -4,9 +4,6 @@ import logging
 log = logging.getLogger(__name__)
 
 
-# TODO persist state to file
-
-
 class CogBotState:
     def __init__(self, state_file: str):
         with open(state_file) as fp:
@@ -26,6 +23,7 @@ class CogBotState:
         self.staff_roles = set(raw_state.get("staff_roles", ()))
         self.recovery_delay = raw_state.get("recovery_delay", 10)
         self.notify_on_recovery = raw_state.get("notify_on_recovery", True)
+        self.warm_recovery = raw_state.get("warm_recovery", True)
         self.hide_help = raw_state.get("hide_help", False)
         self.react_to_command_cooldowns = raw_state.get(
             "react_to_command_cooldowns", False
@@ -36,6 +34,49 @@ class CogBotState:
         )
         self.extensions = raw_state.get("extensions", [])
         self.extension_state = raw_state.get("extension_state", {})
+        self.lazy_extensions = raw_state.get("lazy_extensions", False)
+        self.warmup_concurrency = raw_state.get("warmup_concurrency", 4)
+        self.warmup_timeout = raw_state.get("warmup_timeout", 30)
+        self.state_store = raw_state.get("state_store", None)
+        self.state_store_flush_interval = raw_state.get("state_store_flush_interval", 5)
+        self.message_cache_size = raw_state.get("message_cache_size", 20)
+        self.loop_monitor_interval = raw_state.get("loop_monitor_interval", 0.25)
+        self.loop_monitor_threshold = raw_state.get("loop_monitor_threshold", 0.2)
+        self.loop_monitor_history = raw_state.get("loop_monitor_history", 50)
+        self.outbound_max_in_flight = raw_state.get("outbound_max_in_flight", 5)
+        self.blocking_thread_workers = raw_state.get("blocking_thread_workers", 4)
+        self.blocking_process_workers = raw_state.get("blocking_process_workers", 2)
+        self.blocking_limit_per_extension = raw_state.get(
+            "blocking_limit_per_extension", 2
+        )
+        self.blocking_extension_limits = raw_state.get("blocking_extension_limits", {})
+        self.http_timeout = raw_state.get("http_timeout", 30)
+        self.http_retries = raw_state.get("http_retries", 2)
+        self.http_connection_limit = raw_state.get("http_connection_limit", 20)
+        self.http_connection_limit_per_host = raw_state.get(
+            "http_connection_limit_per_host", 4
+        )
+        self.event_recorder = raw_state.get("event_recorder", None)
+        self.event_recorder_anonymize = raw_state.get("event_recorder_anonymize", True)
+        self.sampling_profiler = raw_state.get("sampling_profiler", False)
+        self.sampling_profiler_interval = raw_state.get("sampling_profiler_interval", 0.05)
+        self.sampling_profiler_window = raw_state.get("sampling_profiler_window", 300)
+        self.sampling_profiler_directory = raw_state.get(
+            "sampling_profiler_directory", "profiles/samples"
+        )
+        self.sampling_profiler_keep = raw_state.get("sampling_profiler_keep", 12)
+        self.tracemalloc_frames = raw_state.get("tracemalloc_frames", 0)
+        self.cache_budgets = raw_state.get("cache_budgets", {})
+        self.metrics_port = raw_state.get("metrics_port", None)
+        self.trace_log = raw_state.get("trace_log", None)
+        self.trace_sample_rate = raw_state.get("trace_sample_rate", 1.0)
+        self.command_analytics = raw_state.get("command_analytics", None)
+        self.command_analytics_flush_interval = raw_state.get(
+            "command_analytics_flush_interval", 60
+        )
+        self.command_analytics_retention_days = raw_state.get(
+            "command_analytics_retention_days", 7
+        )
 
         # Derived
         self.help_attrs = dict(name="_help", hidden=True) if self.hide_help else {}
@@ -0,0 +1,210 @@
+import hashlib
+import logging
+import os
+import re
+import time
+import typing
+
+from cogbot.json_lines import JsonLinesAppender, read_lines
+
+
+log = logging.getLogger(__name__)
+
+
+# starts each run's events, which are timed from it
+SESSION = "SESSION"
+
+MESSAGE_CREATE = "MESSAGE_CREATE"
+MESSAGE_REACTION_ADD = "MESSAGE_REACTION_ADD"
+GUILD_MEMBER_UPDATE = "GUILD_MEMBER_UPDATE"
+
+RECORDED_EVENTS = (MESSAGE_CREATE, MESSAGE_REACTION_ADD, GUILD_MEMBER_UPDATE)
+
+# stands in for the recording bot's own id, so that mentions of it still work on replay
+BOT_PLACEHOLDER = "{bot}"
+
+USER_MENTION_PATTERN = re.compile(r"<@!?(\d+)>")
+NON_SPACE_PATTERN = re.compile(r"\S")
+
+
+class EventRecorder:
+    """
+    Records the gateway events the bot handles (messages, reactions and member updates) to a local
+    log, one compact JSON line per event, for replaying later against a fake client.
+
+    Events are captured where the gateway hands them to the connection state, and only the fields
+    the bot's handlers use are kept. When anonymizing, user ids and names are replaced with stable
+    pseudonyms (except for managers, who are already in the config) and the text of anything other
+    than a command is masked, keeping only its length and spacing.
+
+    Each run appends a session header with the wall-clock time, and times its events from there.
+    The bot's own messages are kept as just their ids, so replies can be matched up on replay. The
+    pseudonym salt is kept in the state store rather than the log, so that a log can't be used to
+    reverse its pseudonyms, and is reused for as long as the log exists.
+    """
+
+    def __init__(
+        self,
+        bot,
+        path: str,
+        anonymize: bool = True,
+        flush_interval: float = 5,
+    ):
+        self.bot = bot
+        self.path = path
+        self.anonymize = anonymize
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self._log = JsonLinesAppender(bot, path, "EventRecorder", flush_interval)
+        self._started_at = time.monotonic()
+        self._salt = self._get_salt(bot.store.namespace("event_recorder"))
+        self._pseudonyms: typing.Dict[str, str] = {}
+        self._keep_ids = set(bot.state.managers)
+
+    def _get_salt(self, store) -> bytes:
+        # a fresh salt per log, so pseudonyms can't be linked across logs, but the same one for
+        # every run appended to it
+        salt = store.get(self.path)
+        if salt is None or not os.path.exists(self.path):
+            salt = os.urandom(16).hex()
+            store.set(self.path, salt)
+        return bytes.fromhex(salt)
+
+    def install(self):
+        """ Wrap the connection state's parsers for the recorded events. """
+        self._append(SESSION, 0, {"started_at": round(time.time(), 3)})
+        connection = self.bot.connection
+        for event in RECORDED_EVENTS:
+            name = "parse_" + event.lower()
+            parser = getattr(connection, name)
+            setattr(connection, name, self._wrap(event, parser))
+        self._log.start()
+
+    def _wrap(self, event: str, parser: typing.Callable[[dict], None]):
+        def record_and_parse(data: dict):
+            try:
+                self.record(event, data)
+            except:
+                log.exception(f"Failed to record {event}")
+            return parser(data)
+
+        return record_and_parse
+
+    # anonymization
+
+    def _pseudonym(self, user_id: str) -> str:
+        if not self.anonymize or user_id in self._keep_ids:
+            return user_id
+        pseudonym = self._pseudonyms.get(user_id)
+        if pseudonym is None:
+            digest = hashlib.sha256(self._salt + user_id.encode()).digest()
+            # same shape as a snowflake, so it passes for one on replay
+            pseudonym = self._pseudonyms[user_id] = str(int.from_bytes(digest[:7], "big"))
+        return pseudonym
+
+    def _user(self, user: dict) -> dict:
+        user_id = self._user_id(user["id"])
+        record = {"id": user_id, "bot": user.get("bot", False)}
+        if self.anonymize and user_id != user["id"]:
+            record["username"] = f"user-{user_id[-6:]}"
+            record["discriminator"] = "0000"
+        else:
+            record["username"] = user.get("username")
+            record["discriminator"] = user.get("discriminator")
+        return record
+
+    def _user_id(self, user_id: str) -> str:
+        if user_id == self.bot.user.id:
+            return BOT_PLACEHOLDER
+        return self._pseudonym(user_id)
+
+    def _is_command(self, content: str) -> bool:
+        if content.startswith(tuple(self.bot.state.command_prefix)):
+            return True
+        mention = USER_MENTION_PATTERN.match(content)
+        return bool(mention) and mention.group(1) == self.bot.user.id
+
+    def _content(self, content: str) -> str:
+        if self._is_command(content):
+            return USER_MENTION_PATTERN.sub(
+                lambda m: "<@" + self._user_id(m.group(1)) + ">", content
+            )
+        if self.anonymize:
+            return NON_SPACE_PATTERN.sub("x", content)
+        return content
+
+    # compact payloads
+
+    def _guild_id(self, channel_id: str) -> typing.Optional[str]:
+        channel = self.bot.get_channel(channel_id)
+        server = getattr(channel, "server", None)
+        return server.id if server else None
+
+    def _compact(self, event: str, data: dict) -> typing.Optional[dict]:
+        if event == MESSAGE_CREATE:
+            # our own messages are output, which replaying will produce again, but reactions to
+            # them need to find their way to the new ones
+            if data["author"]["id"] == self.bot.user.id:
+                return {
+                    "id": data["id"],
+                    "channel_id": data["channel_id"],
+                    "author": {"id": BOT_PLACEHOLDER, "bot": True},
+                }
+            return {
+                "id": data["id"],
+                "channel_id": data["channel_id"],
+                "guild_id": data.get("guild_id") or self._guild_id(data["channel_id"]),
+                "author": self._user(data["author"]),
+                "content": self._content(data.get("content") or ""),
+                "mentions": [self._user(user) for user in data.get("mentions", ())],
+                "mention_roles": data.get("mention_roles", []),
+            }
+        if event == MESSAGE_REACTION_ADD:
+            if data["user_id"] == self.bot.user.id:
+                return None
+            return {
+                "user_id": self._user_id(data["user_id"]),
+                "channel_id": data["channel_id"],
+                "message_id": data["message_id"],
+                "emoji": {"id": data["emoji"].get("id"), "name": data["emoji"].get("name")},
+            }
+        if event == GUILD_MEMBER_UPDATE:
+            return {
+                "guild_id": data["guild_id"],
+                "user": self._user(data["user"]),
+                "roles": data.get("roles", []),
+                "nick": None if self.anonymize else data.get("nick"),
+            }
+
+    def record(self, event: str, data: dict):
+        payload = self._compact(event, data)
+        if payload is None:
+            return
+        self._append(event, time.monotonic() - self._started_at, payload)
+        self.recorded += 1
+
+    def _append(self, event: str, offset: float, payload: dict):
+        self._log.append({"t": round(offset, 3), "e": event, "d": payload})
+
+    async def flush(self):
+        await self._log.flush()
+
+    async def close(self):
+        await self._log.close()
+        log.info(f"Recorded {self.recorded} events to: {self.path}")
+
+
+def read_log(path: str) -> typing.Iterator[typing.Tuple[float, str, dict]]:
+    """
+    Yield the `(offset, event, payload)` of each recorded event, in order. Sessions are played back
+    to back, so the offsets of each one carry on from the last event of the one before, skipping
+    the time the bot was down.
+    """
+    base = 0.0
+    last = 0.0
+    for entry in read_lines(path):
+        if entry["e"] == SESSION:
+            base = last
+            continue
+        last = base + entry["t"]
+        yield last, entry["e"], entry["d"]
@@ -0,0 +1,239 @@
+import logging
+import typing
+
+import discord
+
+
+log = logging.getLogger(__name__)
+
+
+# filter dimensions, in order of preference for indexing (most selective first)
+MESSAGES = "messages"
+CHANNELS = "channels"
+EMOJI = "emoji"
+SERVERS = "servers"
+
+DIMENSIONS = (MESSAGES, CHANNELS, EMOJI, SERVERS)
+
+
+def _message_keys(bot, message: discord.Message, *args) -> dict:
+    return {
+        MESSAGES: message.id,
+        CHANNELS: message.channel.id,
+        SERVERS: message.server.id if message.server else None,
+        "command": message.content.startswith(tuple(bot.state.command_prefix)),
+    }
+
+
+def _message_edit_keys(bot, before: discord.Message, after: discord.Message) -> dict:
+    return _message_keys(bot, after)
+
+
+def _reaction_keys(bot, reaction: discord.Reaction, user: discord.User) -> dict:
+    keys = _message_keys(bot, reaction.message)
+    keys[EMOJI] = str(reaction.emoji)
+    return keys
+
+
+def _member_keys(bot, member: discord.Member, *args) -> dict:
+    server = getattr(member, "server", None)
+    return {SERVERS: server.id if server else None}
+
+
+# routed events and how to extract their lookup keys
+EVENT_KEYS = {
+    "message": _message_keys,
+    "message_edit": _message_edit_keys,
+    "message_delete": _message_keys,
+    "reaction_add": _reaction_keys,
+    "reaction_remove": _reaction_keys,
+    "member_join": _member_keys,
+    "member_remove": _member_keys,
+    "member_update": _member_keys,
+}
+
+
+class Route:
+    def __init__(
+        self,
+        router: "EventRouter",
+        owner,
+        event: str,
+        handler: typing.Callable,
+        commands_only: bool = False,
+        **filters,
+    ):
+        self.router = router
+        self.owner = owner
+        self.event = event
+        self.handler = handler
+        self.commands_only = commands_only
+        self.filters: typing.Dict[str, typing.Set[str]] = {}
+        self._set_filters(**filters)
+
+    def _set_filters(self, **filters):
+        for dimension, keys in filters.items():
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown route filter: {dimension}")
+            if keys is None:
+                self.filters.pop(dimension, None)
+            else:
+                self.filters[dimension] = {str(key) for key in keys}
+
+    @property
+    def dimension(self) -> typing.Optional[str]:
+        """ The filter dimension this route is indexed by, if any. """
+        for dimension in DIMENSIONS:
+            if dimension in self.filters:
+                return dimension
+
+    def matches(self, keys: dict) -> bool:
+        if self.commands_only and not keys.get("command"):
+            return False
+        for dimension, accepted in self.filters.items():
+            if keys.get(dimension) not in accepted:
+                return False
+        return True
+
+    def add_key(self, dimension: str, key):
+        self.router.add_route_key(self, dimension, key)
+
+    def discard_key(self, dimension: str, key):
+        self.router.discard_route_key(self, dimension, key)
+
+    def update(self, **filters):
+        self.router.update_route(self, **filters)
+
+
+class EventRouterStats:
+    def __init__(self):
+        self.events = 0
+        self.calls = 0
+        self.saved = 0
+
+
+class EventRouter:
+    """
+    Routes gateway events to listeners based on declared filters, so that a listener is only
+    invoked for the servers, channels, emoji or messages it cares about. Candidate listeners are
+    found with a dictionary lookup on the most selective filter of each route.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.routes: typing.Dict[str, typing.List[Route]] = {}
+        # index[event][dimension][key] gives the routes indexed by that key
+        self._index: typing.Dict[
+            str, typing.Dict[str, typing.Dict[str, typing.List[Route]]]
+        ] = {}
+        # routes without any key filters, which are candidates for every event
+        self._unindexed: typing.Dict[str, typing.List[Route]] = {}
+        self.stats: typing.Dict[str, EventRouterStats] = {}
+
+    def _index_route(self, route: Route):
+        dimension = route.dimension
+        if dimension is None:
+            self._unindexed.setdefault(route.event, []).append(route)
+        else:
+            by_key = self._index.setdefault(route.event, {}).setdefault(dimension, {})
+            for key in route.filters[dimension]:
+                by_key.setdefault(key, []).append(route)
+
+    def _unindex_route(self, route: Route):
+        dimension = route.dimension
+        if dimension is None:
+            self._unindexed.get(route.event, []).remove(route)
+        else:
+            by_key = self._index.get(route.event, {}).get(dimension, {})
+            for key in route.filters[dimension]:
+                routes = by_key.get(key)
+                if routes and route in routes:
+                    routes.remove(route)
+                    if not routes:
+                        del by_key[key]
+
+    def add_route(
+        self,
+        owner,
+        event: str,
+        handler: typing.Callable,
+        commands_only: bool = False,
+        **filters,
+    ) -> Route:
+        if event not in EVENT_KEYS:
+            raise ValueError(f"Event cannot be routed: {event}")
+        route = Route(self, owner, event, handler, commands_only=commands_only, **filters)
+        self.routes.setdefault(event, []).append(route)
+        self._index_route(route)
+        return route
+
+    def update_route(self, route: Route, **filters):
+        self._unindex_route(route)
+        route._set_filters(**filters)
+        self._index_route(route)
+
+    def add_route_key(self, route: Route, dimension: str, key):
+        key = str(key)
+        if dimension == route.dimension:
+            if key not in route.filters[dimension]:
+                route.filters[dimension].add(key)
+                by_key = self._index.setdefault(route.event, {}).setdefault(dimension, {})
+                by_key.setdefault(key, []).append(route)
+        else:
+            keys = set(route.filters.get(dimension, ()))
+            keys.add(key)
+            self.update_route(route, **{dimension: keys})
+
+    def discard_route_key(self, route: Route, dimension: str, key):
+        key = str(key)
+        if key not in route.filters.get(dimension, ()):
+            return
+        if dimension == route.dimension:
+            route.filters[dimension].discard(key)
+            by_key = self._index.get(route.event, {}).get(dimension, {})
+            routes = by_key.get(key)
+            if routes and route in routes:
+                routes.remove(route)
+                if not routes:
+                    del by_key[key]
+        else:
+            keys = set(route.filters[dimension])
+            keys.discard(key)
+            self.update_route(route, **{dimension: keys})
+
+    def remove_route(self, route: Route):
+        routes = self.routes.get(route.event, [])
+        if route in routes:
+            routes.remove(route)
+            self._unindex_route(route)
+
+    def remove_routes(self, owner):
+        for routes in tuple(self.routes.values()):
+            for route in tuple(routes):
+                if route.owner is owner:
+                    self.remove_route(route)
+
+    def route(self, event: str, *args) -> typing.List[typing.Callable]:
+        """ Get the handlers that should be invoked for the given event. """
+        routes = self.routes.get(event)
+        if not routes:
+            return []
+
+        keys = EVENT_KEYS[event](self.bot, *args)
+
+        candidates = list(self._unindexed.get(event, ()))
+        for dimension, by_key in self._index.get(event, {}).items():
+            key = keys.get(dimension)
+            if key is not None:
+                candidates.extend(by_key.get(key, ()))
+
+        handlers = [route.handler for route in candidates if route.matches(keys)]
+
+        stats = self.stats.get(event)
+        if stats is None:
+            stats = self.stats[event] = EventRouterStats()
+        stats.events += 1
+        stats.calls += len(handlers)
+        stats.saved += len(routes) - len(handlers)
+
+        return handlers
@@ -0,0 +1,207 @@
+import asyncio
+import importlib
+import logging
+import sys
+import time
+import typing
+
+from discord.ext import commands
+from discord.ext.commands import CommandError
+from discord.ext.commands.view import StringView
+
+from cogbot import checks
+
+
+log = logging.getLogger(__name__)
+
+
+# checks that placeholder commands can carry over, by the name they're remembered under
+KNOWN_CHECKS = {"manager": checks.is_manager_check, "staff": checks.is_staff_check}
+
+
+class ExtensionProfile:
+    def __init__(self, ext: str):
+        self.ext = ext
+        self.import_time = 0.0
+        self.setup_time = 0.0
+        # top-level packages that were first imported by this extension
+        self.new_packages: typing.List[str] = []
+        self.new_module_count = 0
+        self.deferred = False
+        self.loaded = False
+
+    @property
+    def total_time(self) -> float:
+        return self.import_time + self.setup_time
+
+
+class ExtensionLoader:
+    """
+    Loads extensions for the bot, recording how long each takes to import and set up, and which
+    dependencies it pulls in.
+
+    In lazy mode, an extension whose commands are already known (from a previous run, via the
+    state store) is not imported on startup. Placeholder commands are registered in its place,
+    with the same checks, which load the real extension on first use and then invoke the real
+    command. Extensions with commands guarded by any other checks are never deferred. Any
+    extensions that are still deferred get loaded in the background once the bot is ready.
+    """
+
+    def __init__(self, bot, lazy: bool = False):
+        self.bot = bot
+        self.lazy = lazy
+        self.profiles: typing.Dict[str, ExtensionProfile] = {}
+        # placeholder command names by deferred extension
+        self.deferred: typing.Dict[str, typing.List[str]] = {}
+        # command metadata by extension, kept across restarts
+        self.store = bot.store.namespace("extensions")
+
+    def load(self, ext: str):
+        """ Load an extension right away, profiling its import and setup. """
+        self._remove_placeholders(ext)
+
+        if ext in self.bot.extensions:
+            return set()
+
+        profile = ExtensionProfile(ext)
+        modules_before = set(sys.modules)
+        cogs_before = set(self.bot.cogs)
+
+        started_at = time.perf_counter()
+        importlib.import_module(ext)
+        imported_at = time.perf_counter()
+        self.bot.load_extension(ext)
+        finished_at = time.perf_counter()
+
+        new_modules = set(sys.modules) - modules_before
+        profile.import_time = imported_at - started_at
+        profile.setup_time = finished_at - imported_at
+        profile.new_module_count = len(new_modules)
+        profile.new_packages = sorted(
+            {module.split(".")[0] for module in new_modules} - {ext.split(".")[0]}
+        )
+        profile.loaded = True
+        self.profiles[ext] = profile
+
+        log.info(
+            f"Loaded extension {ext} in {profile.total_time:.3f}s "
+            f"(import {profile.import_time:.3f}s, setup {profile.setup_time:.3f}s, "
+            f"{profile.new_module_count} new modules)"
+        )
+
+        self._remember_commands(ext, set(self.bot.cogs) - cogs_before)
+
+        return set(self.bot.cogs) - cogs_before
+
+    def unload(self, ext: str):
+        self._remove_placeholders(ext)
+        self.profiles.pop(ext, None)
+        self.bot.unload_extension(ext)
+
+    def defer(self, ext: str) -> bool:
+        """ Register placeholder commands for an extension instead of loading it, if possible. """
+        metadata = self.store.get(ext)
+        if not self.lazy or metadata is None or not metadata.get("deferrable", False):
+            return False
+
+        names = []
+        for name, options in metadata.get("commands", {}).items():
+            if name in self.bot.commands:
+                continue
+            command = commands.Command(
+                name,
+                self._make_placeholder(ext),
+                pass_context=True,
+                aliases=[
+                    alias for alias in options.get("aliases", ())
+                    if alias not in self.bot.commands
+                ],
+                help=options.get("help"),
+                brief=options.get("brief"),
+                hidden=options.get("hidden", False),
+                checks=[KNOWN_CHECKS[check] for check in options.get("checks", ())],
+            )
+            self.bot.add_command(command)
+            names.append(name)
+
+        self.deferred[ext] = names
+        profile = self.profiles[ext] = ExtensionProfile(ext)
+        profile.deferred = True
+
+        log.info(f"Deferred extension {ext} behind {len(names)} placeholder commands")
+
+        return True
+
+    def _make_placeholder(self, ext: str):
+        async def placeholder(ctx, *args):
+            log.info(f"Loading deferred extension {ext} on first use...")
+            await self.load_deferred(ext)
+            command = self.bot.commands.get(ctx.invoked_with)
+            if command is None or command.callback is placeholder:
+                return
+            # now that the real command exists, invoke it in this one's place, with the arguments
+            # parsed over again
+            view = StringView(ctx.message.content)
+            view.skip_string(ctx.prefix)
+            view.get_word()
+            ctx.view = view
+            await command.invoke(ctx)
+
+        return placeholder
+
+    def _remove_placeholders(self, ext: str):
+        for name in self.deferred.pop(ext, ()):
+            self.bot.remove_command(name)
+
+    def _remember_commands(self, ext: str, cogs: typing.Set[str]):
+        instances = [self.bot.cogs[name] for name in cogs]
+        check_names = {check: name for name, check in KNOWN_CHECKS.items()}
+        metadata = {}
+        deferrable = True
+        for name, command in self.bot.commands.items():
+            # skip aliases, which are listed under the command itself
+            if name == command.name and command.instance in instances:
+                known = [check_names[check] for check in command.checks if check in check_names]
+                # a placeholder without the same checks would let anyone run the command
+                if len(known) < len(command.checks):
+                    deferrable = False
+                metadata[name] = {
+                    "aliases": list(command.aliases),
+                    "help": command.help,
+                    "brief": command.brief,
+                    "hidden": command.hidden,
+                    "checks": known,
+                }
+        self.store.set(ext, {"commands": metadata, "deferrable": deferrable})
+
+    async def load_deferred(self, ext: str):
+        """ Load a deferred extension, and wait for its cogs to catch up on the ready event. """
+        if ext not in self.deferred:
+            return
+
+        try:
+            cogs = self.load(ext)
+        except:
+            log.exception(f"Failed to load deferred extension {ext}")
+            return
+
+        # the warm-up coordinator readies cogs that are added late
+        for name in cogs:
+            cog = self.bot.cogs.get(name)
+            if cog is not None:
+                await self.bot.warmup.wait(cog)
+
+    async def load_all_deferred(self):
+        if self.deferred:
+            log.info(f"Loading {len(self.deferred)} deferred extensions in the background...")
+        for ext in tuple(self.deferred):
+            try:
+                await self.load_deferred(ext)
+            except CommandError:
+                log.warning(f"Deferred extension {ext} is taking a while to warm up")
+            # give queued events a chance to run between loads
+            await asyncio.sleep(0)
+
+    def report(self) -> typing.List[ExtensionProfile]:
+        """ Extension profiles, slowest first. """
+        return sorted(self.profiles.values(), key=lambda p: p.total_time, reverse=True)
@@ -1,6 +1,4 @@
-import json
 import logging
-import urllib.request
 
 from discord.ext import commands
 from discord.ext.commands import CommandError, Context
@@ -54,9 +52,7 @@ class About:
         contributors = []
 
         try:
-            response = urllib.request.urlopen(CONTRIBUTORS_FILE)
-            content = response.read().decode('utf8')
-            contributors_data  = json.loads(content)
+            contributors_data = await self.bot.web.get_json(CONTRIBUTORS_FILE)
         except Exception as e:
             raise CommandError('Failed to load contributors: {}'.format(e))
 
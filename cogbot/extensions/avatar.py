@@ -1,4 +1,3 @@
-import requests
 from discord.ext import commands
 from discord.ext.commands import Context
 
@@ -13,8 +12,7 @@ class Avatar:
     @checks.is_manager()
     @commands.command(pass_context=True, hidden=True)
     async def avatar(self, ctx: Context, *, url: str):
-        image_response = requests.get(url)
-        image_data = image_response.content
+        image_data = await self.bot.web.get_bytes(url)
         await self.bot.edit_profile(avatar=image_data)
         await self.bot.react_success(ctx)
 
@@ -0,0 +1,123 @@
+import logging
+
+from discord.ext import commands
+from discord.ext.commands import Context
+
+from cogbot import checks
+from cogbot.cache_registry import Cache
+from cogbot.cog_bot import CogBot
+from cogbot.formatting import make_table
+
+log = logging.getLogger(__name__)
+
+
+class Caches:
+    LIMITS = ('entries', 'bytes', 'ttl')
+
+    def __init__(self, bot: CogBot, ext: str):
+        self.bot = bot
+
+    def describe_limits(self, cache: Cache) -> str:
+        limits = []
+        if cache.max_entries is not None:
+            limits.append(f'{cache.max_entries} entries')
+        if cache.max_bytes is not None:
+            limits.append(f'{cache.max_bytes} bytes')
+        if cache.ttl is not None:
+            limits.append(f'{cache.ttl}s ttl')
+        return ', '.join(limits) or 'unbounded'
+
+    def describe_stats(self, cache: Cache) -> str:
+        stats = cache.stats
+        lookups = stats.hits + stats.misses
+        hit_rate = f'{stats.hits / lookups * 100:.0f}%' if lookups else '-'
+        return (
+            f'{stats.hits} hits, {stats.misses} misses ({hit_rate}), '
+            f'{stats.evictions} evicted, {stats.expirations} expired'
+        )
+
+    def describe_size(self, cache: Cache) -> str:
+        if cache.max_bytes is not None:
+            return f'{len(cache)} entries, {cache.bytes} bytes'
+        return f'{len(cache)} entries'
+
+    async def get_cache(self, ctx: Context, name: str) -> Cache:
+        cache = self.bot.caches.get(name)
+        if cache is None:
+            await self.bot.react_question(ctx)
+        return cache
+
+    @checks.is_manager()
+    @commands.group(pass_context=True, name='cache', hidden=True)
+    async def cmd_cache(self, ctx: Context):
+        if ctx.invoked_subcommand is None:
+            rows = tuple(
+                (name, f'{self.describe_size(cache)}; {self.describe_stats(cache)}')
+                for name, cache in sorted(self.bot.caches.caches.items())
+            )
+            await self.bot.say(make_table(rows))
+
+    @cmd_cache.command(pass_context=True, name='show')
+    async def cmd_cache_show(self, ctx: Context, name: str):
+        cache = await self.get_cache(ctx, name)
+        if cache is None:
+            return
+
+        # most recently used last
+        recent = list(cache.keys())[-10:]
+        rows = (
+            ('size', self.describe_size(cache)),
+            ('limits', self.describe_limits(cache)),
+            ('stats', self.describe_stats(cache)),
+            ('reloads on flush', 'yes' if cache.reload else 'no'),
+            ('recent keys', ', '.join(str(key)[:30] for key in recent) or '-'),
+        )
+        await self.bot.say(make_table(rows))
+
+    @cmd_cache.command(pass_context=True, name='resize')
+    async def cmd_cache_resize(self, ctx: Context, name: str, limit: str, value: str):
+        cache = await self.get_cache(ctx, name)
+        if cache is None:
+            return
+
+        if limit not in self.LIMITS:
+            await self.bot.say(f'Limit should be one of: {", ".join(self.LIMITS)}')
+            return
+
+        if cache.reload is not None:
+            await self.bot.say(f'Cache {name} holds a complete dataset, so it can\'t be limited')
+            return
+
+        try:
+            # 'none' lifts the limit
+            amount = None if value.lower() == 'none' else (float(value) if limit == 'ttl' else int(value))
+        except ValueError:
+            await self.bot.react_failure(ctx)
+            return
+
+        if limit == 'entries':
+            cache.resize(max_entries=amount)
+        elif limit == 'bytes':
+            cache.resize(max_bytes=amount)
+        else:
+            cache.resize(ttl=amount)
+
+        log.info(f'{ctx.message.author} set {limit} limit of cache {name} to {amount}')
+        await self.bot.react_success(ctx)
+
+    @cmd_cache.command(pass_context=True, name='flush')
+    async def cmd_cache_flush(self, ctx: Context, name: str):
+        cache = await self.get_cache(ctx, name)
+        if cache is None:
+            return
+
+        try:
+            await self.bot.caches.flush(name)
+            await self.bot.react_success(ctx)
+        except:
+            log.exception(f'Failed to flush cache {name}')
+            await self.bot.react_failure(ctx)
+
+
+def setup(bot):
+    bot.add_cog(Caches(bot, __name__))
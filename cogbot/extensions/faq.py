@@ -1,12 +1,12 @@
 import json
 import logging
 import typing
-import urllib.request
 
 from discord.ext import commands
 from discord.ext.commands import CommandError, Context
 
 from cogbot import checks
+from cogbot.cache_registry import Cache
 from cogbot.cog_bot import CogBot
 
 log = logging.getLogger(__name__)
@@ -29,8 +29,12 @@ class Faq:
     def __init__(self, bot: CogBot, ext: str):
         self.bot = bot
         self.config = FaqConfig(**bot.state.get_extension_state(ext))
-        self.entries_by_key: typing.Dict[str, FAQEntry] = {}
-        self.entries_by_tag: typing.Dict[str, typing.List[FAQEntry]] = {}
+        # key -> FAQEntry
+        self.entries_by_key: Cache = bot.caches.create(
+            'Faq.entries_by_key', owner=self, reload=self.reload_data)
+        # tag -> [FAQEntry]
+        self.entries_by_tag: Cache = bot.caches.create(
+            'Faq.entries_by_tag', owner=self, reload=self.reload_data)
         self.available_faqs_text = ''
 
     def extract_tags(self, key: str) -> typing.List[str]:
@@ -83,14 +87,12 @@ class Faq:
             else:
                 return []
 
-    def reload_data(self):
+    async def reload_data(self):
         log.info('Reloading FAQs from: {}'.format(self.config.database))
 
         if self.config.database.startswith(('http://', 'https://')):
             try:
-                response = urllib.request.urlopen(self.config.database)
-                content = response.read().decode('utf8')
-                data = json.loads(content)
+                data = await self.bot.web.get_json(self.config.database, owner=self)
             except Exception as e:
                 raise CommandError('Failed to reload FAQs: {}'.format(e))
         else:
@@ -125,15 +127,25 @@ class Faq:
             else:
                 log.error('Invalid FAQ entry "{}": {}'.format(key, raw_entry))
 
-        self.entries_by_key = entries_by_key
-        self.entries_by_tag = entries_by_tag
+        self.entries_by_key.load(entries_by_key)
+        self.entries_by_tag.load(entries_by_tag)
 
         self.available_faqs_text = 'Available FAQs: ' + self.format_keys(sorted(self.get_visible_keys()))
 
         log.info('Successfully reloaded {} FAQs'.format(len(data)))
 
+    def export_dataset(self):
+        if self.entries_by_key:
+            return dict(self.entries_by_key.items()), dict(self.entries_by_tag.items()), self.available_faqs_text
+
     async def on_ready(self):
-        self.reload_data()
+        dataset = self.bot.recover_dataset(self)
+        if dataset:
+            entries_by_key, entries_by_tag, self.available_faqs_text = dataset
+            self.entries_by_key.load(entries_by_key)
+            self.entries_by_tag.load(entries_by_tag)
+        else:
+            await self.reload_data()
 
     @commands.command(pass_context=True, name='faq')
     async def cmd_faq(self, ctx: Context, *, key: str = ''):
@@ -166,7 +178,7 @@ class Faq:
     @commands.command(pass_context=True, name='faqreload', hidden=True)
     async def cmd_faqreload(self, ctx: Context):
         try:
-            self.reload_data()
+            await self.reload_data()
             await self.bot.react_success(ctx)
         except:
             await self.bot.react_failure(ctx)
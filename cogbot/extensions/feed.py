@@ -1,4 +1,3 @@
-import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional
@@ -10,7 +9,9 @@ from discord.ext import commands
 from discord.ext.commands import Context
 
 from cogbot import checks
+from cogbot.action_queue import Lane
 from cogbot.cog_bot import CogBot
+from cogbot.scheduler import Job
 
 log = logging.getLogger(__name__)
 
@@ -28,10 +29,26 @@ class FeedSubscription:
         if self.recency:
             self.last_datetime -= timedelta(seconds=self.recency)
 
-    def update(self):
+    def to_record(self) -> dict:
+        return {
+            'last_datetime': self.last_datetime.isoformat(),
+            'last_titles': list(self.last_titles),
+            'last_ids': list(self.last_ids),
+        }
+
+    def restore(self, record: dict):
+        """ Pick up where a previous run left off, so that entries aren't posted again. """
+        try:
+            self.last_datetime = dateutil_parse(record['last_datetime']).astimezone(timezone.utc)
+            self.last_titles = set(record['last_titles'])
+            self.last_ids = set(record['last_ids'])
+        except:
+            log.exception(f'Failed to restore feed records for: {self.url}')
+
+    def update(self, content: str):
         try:
             # parse feed and datetime
-            data = feedparser.parse(self.url)
+            data = feedparser.parse(content)
             channel_datetime = dateutil_parse(data.feed.updated).astimezone(timezone.utc)
 
             # keep a record of last-updated articles to help eliminate duplication
@@ -73,6 +90,7 @@ class FeedSubscription:
 
 class Feed:
     DEFAULT_POLLING_INTERVAL = 60
+    DEFAULT_POLLING_JITTER = 5
 
     SubscriptionType = Dict[str, Dict[str, FeedSubscription]]
 
@@ -82,74 +100,133 @@ class Feed:
         self.options = bot.state.get_extension_state(ext)
 
         self.polling_interval: int = self.options.get('polling_interval', self.DEFAULT_POLLING_INTERVAL)
+        self.polling_jitter: int = self.options.get('polling_jitter', self.DEFAULT_POLLING_JITTER)
 
         # Access like so: self._subscriptions[channel_id][name]
         self._subscriptions: Feed.SubscriptionType = {}
 
-        self.polling_task: Optional[asyncio.Task] = None
+        self.polling_job: Optional[Job] = None
+
+        # subscriptions made at runtime, and each subscription's records of recent entries
+        self.store = bot.store.namespace('feed')
+        self.records = bot.store.namespace('feed.records')
+
+    def export_dataset(self):
+        # subscriptions carry their records of recent entries, which prevents re-posting
+        return self._subscriptions
 
     async def on_ready(self):
-        log.info('Ready event received; proceeding to initial reset...')
-        self._reset()
+        subscriptions = self.bot.recover_dataset(self)
+        if subscriptions is not None:
+            log.info('Ready event received; proceeding to reset with recovered subscriptions...')
+            self._reset(subscriptions=subscriptions)
+        else:
+            log.info('Ready event received; proceeding to initial reset...')
+            self._reset()
 
-    def _reset(self, intentional=False):
+    def _reset(self, intentional=False, subscriptions: 'Feed.SubscriptionType' = None):
         log.info('Resetting subscriptions and polling task...')
 
         # Initialize subscriptions.
 
-        # Clear any existing subscriptions.
-        self._subscriptions = {}
-
-        raw_subscriptions = self.options.get('subscriptions', {})
+        # Keep recovered subscriptions as they are.
+        if subscriptions is not None:
+            log.info(f'Recovered subscriptions for {len(subscriptions)} channels')
+            self._subscriptions = subscriptions
 
-        log.info(f'Initializing subscriptions for {len(raw_subscriptions)} channels...')
-
-        for channel_id, v in raw_subscriptions.items():
-            channel = self.bot.get_channel(channel_id)
-            for name, data in v.items():
-                url = data['url']
-                recency = data.get('recency')
-                try:
-                    self._add_feed(channel, name, url, recency)
-                except:
-                    log.exception(f'Failed to add initial feed {name} at: {url}')
-
-        # If a polling task does not yet exist, create a new one.
-        if self.polling_task is None:
-            polling_task = self._create_polling_task()
-            log.info(f'Created a new polling task (hash: {hash(polling_task)}) for the first time')
-            self.polling_task = polling_task
-
-        # If one does already exist, but it has cancelled and/or completed, then create a new one.
-        elif self._should_create_polling_task():
-            polling_task = self._create_polling_task()
-            log.info(
-                f'Created a new polling task (hash: {hash(polling_task)}) because the previous one was '
-                f'cancelled and/or completed')
-            self.polling_task = polling_task
-
-        # If the reset was intentional, we can safely keep the existing polling task running.
-        elif intentional:
-            log.info(f'Keeping existing polling task running (hash: {hash(self.polling_task)}) after intentional reset')
-
-        # Otherwise, warn about the existing polling task that's still running and could pose a problem.
         else:
-            log.warning(
-                f'Not creating a new polling task because the previous one is still running '
-                f'(hash: {hash(self.polling_task)})')
+            # Clear any existing subscriptions.
+            self._subscriptions = {}
+
+            # Earlier versions stored a copy of every subscription, which would hide later config edits.
+            if 'subscriptions' in self.store:
+                log.warning('Discarding stored copy of all subscriptions in favour of the config')
+                self.store.delete('subscriptions')
+
+            # Start from the configured subscriptions, with any added or removed at runtime on top.
+            raw_subscriptions = self._merged_subscriptions()
+
+            log.info(f'Initializing subscriptions for {len(raw_subscriptions)} channels...')
+
+            for channel_id, v in raw_subscriptions.items():
+                channel = self.bot.get_channel(channel_id)
+                for name, data in v.items():
+                    url = data['url']
+                    recency = data.get('recency')
+                    try:
+                        self._add_feed(channel, name, url, recency)
+                    except:
+                        log.exception(f'Failed to add initial feed {name} at: {url}')
+                        continue
+                    record = self.records.get(self._record_key(channel_id, name))
+                    if record:
+                        self._subscriptions[channel_id][name].restore(record)
+
+        # If a polling job does not yet exist, or it was cancelled, then schedule a new one.
+        if self.polling_job is None or self.polling_job.cancelled:
+            self.polling_job = self.bot.scheduler.every(
+                'Feed.poll',
+                self.polling_interval,
+                self._poll,
+                jitter=self.polling_jitter,
+                delay=0,
+                owner=self,
+            )
+            log.info(f'Scheduled polling every {self.polling_interval} seconds')
+
+        # The scheduler never runs the job twice at once, so the existing one can keep going.
+        else:
+            log.info(f'Keeping existing polling job after {"intentional" if intentional else "automatic"} reset')
 
-    async def _loop_poll(self):
-        while self.bot.is_logged_in:
+    async def _poll(self):
+        # the scheduler skips this run if the previous one is still going
+        if self.bot.is_logged_in:
             await self.update_all_feeds()
-            await asyncio.sleep(self.polling_interval)
-        log.info('Bot logged out, polling loop terminated')
-
-    def _should_create_polling_task(self) -> bool:
-        return isinstance(self.polling_task, asyncio.Task) and (
-                self.polling_task.done() or self.polling_task.cancelled())
 
-    def _create_polling_task(self) -> asyncio.Task:
-        return self.bot.loop.create_task(self._loop_poll())
+    @staticmethod
+    def _record_key(channel_id: str, name: str) -> str:
+        return f'{channel_id}/{name}'
+
+    def _merged_subscriptions(self) -> dict:
+        # copy the configured subscriptions, so that runtime changes never leak into the options
+        merged = {
+            channel_id: dict(subs) for channel_id, subs in self.options.get('subscriptions', {}).items()
+        }
+        for channel_id, names in self.store.get('removed', {}).items():
+            for name in names:
+                merged.get(channel_id, {}).pop(name, None)
+        for channel_id, subs in self.store.get('added', {}).items():
+            merged.setdefault(channel_id, {}).update(subs)
+        return merged
+
+    def _save_added(self, channel_id: str, name: str, url: str, recency: Optional[int]):
+        added = self.store.get('added', {})
+        added.setdefault(channel_id, {})[name] = {'url': url, 'recency': recency}
+        self.store.set('added', added)
+        self._forget_removed(channel_id, name)
+
+    def _save_removed(self, channel_id: str, name: str):
+        added = self.store.get('added', {})
+        if name in added.get(channel_id, {}):
+            del added[channel_id][name]
+            if not added[channel_id]:
+                del added[channel_id]
+            self.store.set('added', added)
+        # only configured subscriptions need to be remembered as removed
+        if name in self.options.get('subscriptions', {}).get(channel_id, {}):
+            removed = self.store.get('removed', {})
+            names = removed.setdefault(channel_id, [])
+            if name not in names:
+                names.append(name)
+            self.store.set('removed', removed)
+
+    def _forget_removed(self, channel_id: str, name: str):
+        removed = self.store.get('removed', {})
+        if name in removed.get(channel_id, ()):
+            removed[channel_id].remove(name)
+            if not removed[channel_id]:
+                del removed[channel_id]
+            self.store.set('removed', removed)
 
     def _add_feed(self, channel: Channel, name: str, url: str, recency: int = None):
         # Don't add the same subscription more than once.
@@ -180,17 +257,26 @@ class Feed:
 
         del subs[name]
 
+        self.records.delete(self._record_key(channel.id, name))
+
     async def _update_feed(self, channel: Channel, name: str):
         subs = self.subscriptions[channel.id]
         sub = subs[name]
 
         # this is where we get serious
         # grab the last couple messages in the channel to make sure we aren't posting a dupe
-        recent_contents = []
-        async for message in self.bot.logs_from(channel, limit=2):
-            recent_contents.append(message.content)
+        recent_messages = await self.bot.get_recent_messages(channel, 2)
+        recent_contents = [message.content for message in recent_messages]
+
+        # fetch the feed without blocking the event loop; feedparser only does the parsing
+        try:
+            content = await self.bot.web.get_text(sub.url)
+            fresh_entries = tuple(sub.update(content))
+            self.records.set(self._record_key(channel.id, name), sub.to_record())
+        except:
+            log.exception(f'Failed to fetch feed at: {sub.url}')
+            fresh_entries = ()
 
-        fresh_entries = tuple(sub.update())
         if fresh_entries:
             log.info(f'Found {len(fresh_entries)} new posts for feed at: {sub.url}')
             for entry in fresh_entries:
@@ -205,7 +291,7 @@ class Feed:
                 if really_fresh:
                     log.info(f'Posting fresh update for feed {name}: {entry.title}')
                     message = f'**{entry.title}**\n{entry.link}'
-                    await self.bot.send_message(channel, message)
+                    await self.bot.send_message(channel, message, lane=Lane.FEED)
                 else:
                     log.info(f'Skipping stale update for feed {name}: {entry.title}')
 
@@ -215,9 +301,7 @@ class Feed:
         # go through the last several messages *again* and make sure we didn't post any dupes
         # go in reverse and delete any dupes from the oldest message onward
         content_hash = set()
-        messages = []
-        async for message in self.bot.logs_from(channel, limit=10):
-            messages.append(message)
+        messages = await self.bot.get_recent_messages(channel, 10)
         for message in reversed(messages):
             if (message.author == self.bot) and (message.content in content_hash):
                 message_title = message.content.split('\n')[0]
@@ -233,6 +317,7 @@ class Feed:
         if name not in subs:
             try:
                 self._add_feed(channel, name, url, recency)
+                self._save_added(channel.id, name, url, recency)
                 await self.bot.react_success(ctx)
             except:
                 log.exception(f'Failed to add new feed {name} at: {url}')
@@ -246,6 +331,7 @@ class Feed:
 
         if name in subs:
             self._remove_feed(channel, name)
+            self._save_removed(channel.id, name)
             await self.bot.react_success(ctx)
 
         else:
@@ -30,6 +30,15 @@ class GroupDirectory(object):
                 return role
         raise NoSuchRoleNameError(role_name=sanitized_group)
 
+    def has_server(self, server_id) -> bool:
+        return server_id in self._role_map
+
+    def export_server(self, server_id) -> dict:
+        return dict(self._role_map.get(server_id, {}))
+
+    def import_server(self, server_id, groups: dict):
+        self._role_map[server_id] = dict(groups)
+
     def groups(self, server):
         if server.id in self._role_map:
             yield from self._role_map[server.id].keys()
@@ -35,15 +35,34 @@ class Groups:
 
         self._group_directory = GroupDirectory()
 
+        # groups added and removed at runtime, by server id
+        self.store = bot.store.namespace('groups')
+
+    def export_dataset(self):
+        return self._group_directory
+
     async def on_ready(self):
+        # Keep groups from before a crash, including any added at runtime.
+        group_directory = self.bot.recover_dataset(self)
+        if group_directory:
+            self._group_directory = group_directory
+
+        # Restore persisted groups, which supersede the configured ones.
+        for server_id, groups in self.store.items():
+            if not self._group_directory.has_server(server_id):
+                self._group_directory.import_server(server_id, groups)
+
         # Load initial groups after the bot has made associations with servers.
         # TODO sometimes runs multiple times, figure out a better way
         for server_id, groups in self.config.server_groups.items():
             server = self.bot.get_server(server_id)
-            if server_id not in self._group_directory._role_map:
+            if not self._group_directory.has_server(server_id):
                 for group in groups:
                     self._group_directory.add_group(server, group)
 
+    def save_groups(self, server):
+        self.store.set(server.id, self._group_directory.export_server(server.id))
+
     async def add_groups(self, ctx: Context, *groups):
         server, author = ctx.message.server, ctx.message.author
 
@@ -64,6 +83,8 @@ class Groups:
                     log.warning(f'[{server}/{author}] Tried to add pre-existing group "{group}"')
                     await self.bot.react_failure(ctx)
 
+            self.save_groups(server)
+
         else:
             await self.bot.react_question(ctx)
 
@@ -83,6 +104,8 @@ class Groups:
                     log.warning(f'[{server}/{author}] Tried to remove non-existent group "{group}"')
                     await self.bot.react_failure(ctx)
 
+            self.save_groups(server)
+
         else:
             await self.bot.react_question(ctx)
 
@@ -4,6 +4,7 @@ import typing
 from datetime import datetime, timedelta
 
 import discord
+from dateutil.parser import parse as dateutil_parse
 from discord.iterators import LogsFromIterator
 
 from cogbot.cog_bot import CogBot, ServerId, ChannelId
@@ -50,9 +51,33 @@ class HelpChatServerState:
         self.stale_prefix: str = stale_prefix
         self.resolve_with_reaction: bool = resolve_with_reaction
 
-        self.last_polled = datetime.utcnow()
         self.delta_until_stale = timedelta(seconds=self.seconds_until_stale)
+
+        # each channel's state is kept in its name; what's kept across restarts is when each channel
+        # was last active, as a record of {last_activity}
+        self.store = self.bot.store.namespace("helpchat")
         self.delta_to_poll = timedelta(seconds=self.seconds_to_poll)
+        # the latest activity seen in each channel, and what was last written to the store
+        self.last_activity: typing.Dict[ChannelId, datetime] = {}
+        self.stored_activity: typing.Dict[ChannelId, datetime] = {}
+
+    def get_last_activity(self, channel: discord.Channel) -> typing.Optional[datetime]:
+        last_activity = self.last_activity.get(channel.id)
+        if last_activity is None:
+            recorded = self.store.get(channel.id, {}).get("last_activity")
+            if recorded:
+                last_activity = self.stored_activity[channel.id] = dateutil_parse(recorded)
+                self.last_activity[channel.id] = last_activity
+        return last_activity
+
+    def set_last_activity(self, channel: discord.Channel, when: datetime):
+        self.last_activity[channel.id] = when
+        # polling only trusts activity to skip asking the API, so a record that's a little behind
+        # just means an extra lookup after a restart; it's written at most once per poll interval
+        stored = self.stored_activity.get(channel.id)
+        if stored is None or when - stored >= self.delta_to_poll:
+            self.stored_activity[channel.id] = when
+            self.store.set(channel.id, {"last_activity": when.isoformat()})
 
     def is_channel(self, channel: discord.Channel, prefix: str) -> bool:
         return channel.name.startswith(prefix)
@@ -159,13 +184,12 @@ class HelpChatServerState:
                     icon=":white_check_mark:",
                 )
 
-        await self.maybe_poll_channels()
-
     async def on_message(self, message: discord.Message):
         channel: discord.Channel = message.channel
 
         # only care about managed channels
         if channel in self.channels:
+            self.set_last_activity(channel, message.timestamp)
             # resolve: only when the message contains exactly the resolve emoji
             if message.content == str(self.resolve_emoji):
                 if await self.mark_channel_free(channel):
@@ -179,29 +203,25 @@ class HelpChatServerState:
             else:
                 await self.mark_channel_busy(channel)
 
-        await self.maybe_poll_channels()
-
     async def poll_channels(self):
         for channel in self.channels:
             # only busy channels can become stale
             if self.is_channel_busy(channel):
-                latest_message = await self.bot.get_latest_message(channel)
                 now: datetime = datetime.utcnow()
+                # trust recorded activity while it is recent enough; a newer message only makes
+                # the channel fresher, so the API is only asked when it looks stale
+                last_activity = self.get_last_activity(channel)
+                if last_activity and now <= last_activity + self.delta_until_stale:
+                    continue
+                latest_message = await self.bot.get_latest_message(channel)
+                if not latest_message:
+                    continue
                 latest: datetime = latest_message.timestamp
+                self.set_last_activity(channel, latest)
                 then: datetime = latest + self.delta_until_stale
                 if now > then:
-                    pass
                     await self.mark_channel_stale(channel)
 
-    async def maybe_poll_channels(self):
-        # check if enough time has passed for us to poll channels again
-        # sort of a hack, because f**k polling tasks
-        now: datetime = datetime.utcnow()
-        then: datetime = self.last_polled + self.delta_to_poll
-        if now > then:
-            self.last_polled = now
-            await self.poll_channels()
-
 
 class HelpChat:
     def __init__(self, bot: CogBot, ext: str):
@@ -209,18 +229,44 @@ class HelpChat:
         self.server_state: typing.Dict[ServerId, HelpChatServerState] = {}
         self.options = self.bot.state.get_extension_state(ext)
 
+        # filters are filled in once servers have been resolved
+        self.message_route = bot.router.add_route(
+            self, "message", self.handle_message, servers=()
+        )
+        self.reaction_route = bot.router.add_route(
+            self, "reaction_add", self.handle_reaction, servers=(), emoji=()
+        )
+
     def get_state(self, server: discord.Server) -> HelpChatServerState:
         return self.server_state.get(server.id)
 
     async def on_ready(self):
+        # drop polling jobs for any previous server states
+        self.bot.scheduler.cancel_owner(self)
+
         # construct server state objects for easier context management
         for server_key, server_options in self.options.get("servers", {}).items():
             server = self.bot.get_server_from_key(server_key)
             if server:
                 state = HelpChatServerState(self.bot, server, **server_options)
                 self.server_state[server.id] = state
+                self.bot.scheduler.every(
+                    "HelpChat.poll_channels",
+                    state.seconds_to_poll,
+                    state.poll_channels,
+                    owner=self,
+                )
+
+        # only wake up for configured servers, and reactions with a relevant emoji
+        server_ids = self.server_state.keys()
+        emojis = set()
+        for state in self.server_state.values():
+            emojis.add(state.relocate_emoji)
+            emojis.add(state.resolve_emoji)
+        self.message_route.update(servers=server_ids)
+        self.reaction_route.update(servers=server_ids, emoji=emojis)
 
-    async def on_reaction_add(
+    async def handle_reaction(
         self, reaction: discord.Reaction, reactor: discord.Member
     ):
         # make sure this isn't a DM
@@ -230,7 +276,7 @@ class HelpChat:
             if state and reactor != self.bot.user:
                 await state.on_reaction(reaction, reactor)
 
-    async def on_message(self, message: discord.Message):
+    async def handle_message(self, message: discord.Message):
         # make sure this isn't a DM
         if message.server:
             state = self.get_state(message.server)
@@ -1,14 +1,13 @@
 import itertools
-import json
 import logging
 import typing
-import urllib.request
 
 import discord
 from discord.ext import commands
 from discord.ext.commands import CommandError, Context
 
 from cogbot import checks
+from cogbot.cache_registry import Cache
 from cogbot.cog_bot import CogBot
 
 log = logging.getLogger(__name__)
@@ -25,16 +24,15 @@ class Invite:
         options = bot.state.get_extension_state(ext)
         self.config = InviteConfig(**options)
         self.invites_by_server_id: typing.Dict[str, discord.Invite] = {}
-        self.invites_by_tag: typing.Dict[str, typing.Set[discord.Invite]] = {}
+        # tag -> {discord.Invite}
+        self.invites_by_tag: Cache = bot.caches.create(
+            'Invite.invites_by_tag', owner=self, reload=self.reload_data)
 
     async def reload_data(self):
         log.info('Reloading invites from: {}'.format(self.config.database))
 
-        response = urllib.request.urlopen(self.config.database)
-        content = response.read().decode('utf8')
-
         try:
-            data = json.loads(content)
+            data = await self.bot.web.get_json(self.config.database, owner=self)
         except Exception as e:
             raise CommandError('Failed to reload invites: {}'.format(e))
 
@@ -57,7 +55,7 @@ class Invite:
 
         self.invites_by_server_id = invites_by_server_id
         self.invites_by_server_name = invites_by_server_name
-        self.invites_by_tag = invites_by_tag
+        self.invites_by_tag.load(invites_by_tag)
 
         log.info('Successfully reloaded {} invites'.format(len(invites_by_server_id)))
 
@@ -75,8 +73,17 @@ class Invite:
         result = set().union(*results)
         return result
 
+    def export_dataset(self):
+        if self.invites_by_server_id:
+            return self.invites_by_server_id, self.invites_by_server_name, dict(self.invites_by_tag.items())
+
     async def on_ready(self):
-        await self.reload_data()
+        dataset = self.bot.recover_dataset(self)
+        if dataset:
+            self.invites_by_server_id, self.invites_by_server_name, invites_by_tag = dataset
+            self.invites_by_tag.load(invites_by_tag)
+        else:
+            await self.reload_data()
 
     @commands.group(pass_context=True, name='invite')
     async def cmd_invite(self, ctx: Context, *, tags: str = ''):
@@ -2,7 +2,6 @@ import logging
 import re
 import typing
 import urllib.parse
-import urllib.request
 from datetime import datetime
 from xml.etree import ElementTree
 
@@ -91,17 +90,20 @@ class Jira:
         self.bot = bot
         self.config = JiraConfig(**bot.state.get_extension_state(ext))
 
-    def fetch_report(self, base_url: str, report_project: str, report_id: int) -> JiraReport:
+    async def fetch_report(self, base_url: str, report_project: str, report_id: int) -> JiraReport:
         report_no = f'{report_project}-{report_id}'
 
         url = f'{base_url}/si/jira.issueviews:issue-xml/' \
             f'{report_no}/{report_no}.xml?{self.REQUEST_ARGS}'
 
-        log.info(f'Requesting JIRA report XML from: {url}')
+        log.info('Requesting JIRA report XML from: %s', url)
 
-        response = urllib.request.urlopen(url)
-        content = response.read().decode('utf8')
+        content = await self.bot.web.get_text(url)
 
+        with self.bot.tracer.span('jira.parse', size=len(content)):
+            return self.parse_report(base_url, content)
+
+    def parse_report(self, base_url: str, content: str) -> JiraReport:
         # access child 'channel' at index 0
         # and then access child 'item' at index 5
         # this is disguesting
@@ -170,7 +172,7 @@ class Jira:
             versions=versions, fix_version=fix_version, votes=votes_int, watches=watches_int,
             category=category, priority=priority)
 
-    def get_report(self, query: str) -> typing.Optional[JiraReport]:
+    async def get_report(self, query: str) -> typing.Optional[JiraReport]:
         id_match = self.ID_PATTERN.match(query)
         bug_match = self.BUG_PATTERN.match(query)
         url_match = self.URL_PATTERN.match(query)
@@ -180,51 +182,57 @@ class Jira:
         if id_match:
             report_project = self.config.default_project
             report_id = id_match.groups()[0]
-            return self.fetch_report(base_url, report_project, report_id)
+            return await self.fetch_report(base_url, report_project, report_id)
 
         elif bug_match:
             report_project = str(bug_match.groups()[0]).upper()
             report_id = bug_match.groups()[1]
-            return self.fetch_report(base_url, report_project, report_id)
+            return await self.fetch_report(base_url, report_project, report_id)
 
         elif url_match:
             base_url = url_match.groups()[0]
             report_project = str(url_match.groups()[1]).upper()
             report_id = url_match.groups()[2]
-            return self.fetch_report(base_url, report_project, report_id)
+            return await self.fetch_report(base_url, report_project, report_id)
+
+    def make_embed(self, report: JiraReport) -> Embed:
+        favicon_url = f'{report.base_url}/favicon.png'
+        em = Embed(title=report.title, url=report.url, colour=0xDB1F29)
+        em.set_thumbnail(url=report.status_icon_url)
+        em.set_author(name=report.key, url=report.url, icon_url=favicon_url)
+        em.add_field(name='Assigned to', value=report.assignee)
+        em.add_field(name='Reported by', value=report.reporter)
+        em.add_field(name='Created on', value=report.created_on.strftime('%d/%m/%Y'))
+
+        if report.category:
+            em.add_field(name='Category', value=report.category)
+
+        if report.priority:
+            em.add_field(name='Priority', value=report.priority)
+
+        if report.resolution == 'Unresolved':
+            em.add_field(name='Status', value=report.status)
+            em.add_field(name='Since version', value=report.since_version)
+            em.add_field(name='Votes', value=str(report.votes))
+        else:
+            em.add_field(name='Resolution', value=report.resolution)
+            em.add_field(name='Resolved on', value=report.resolved_on.strftime('%d/%m/%Y'))
+            em.add_field(name='Since version', value=report.since_version)
+            if report.versions:
+                em.add_field(name='Affects version', value=report.versions[-1])
+            if report.fix_version:
+                em.add_field(name='Fix version', value=report.fix_version)
+
+        return em
 
     @commands.command(pass_context=True, aliases=['mojira', 'bug'])
     async def jira(self, ctx: Context, *, query: str):
-        report = self.get_report(query)
+        report = await self.get_report(query)
         
         if report:
-            favicon_url = f'{report.base_url}/favicon.png'
-            em = Embed(title=report.title, url=report.url, colour=0xDB1F29)
-            em.set_thumbnail(url=report.status_icon_url)
-            em.set_author(name=report.key, url=report.url, icon_url=favicon_url)
-            em.add_field(name='Assigned to', value=report.assignee)
-            em.add_field(name='Reported by', value=report.reporter)
-            em.add_field(name='Created on', value=report.created_on.strftime('%d/%m/%Y'))
-
-            if report.category:
-                em.add_field(name='Category', value=report.category)
-
-            if report.priority:
-                em.add_field(name='Priority', value=report.priority)
-
-            if report.resolution == 'Unresolved':
-                em.add_field(name='Status', value=report.status)
-                em.add_field(name='Since version', value=report.since_version)
-                em.add_field(name='Votes', value=str(report.votes))
-            else:
-                em.add_field(name='Resolution', value=report.resolution)
-                em.add_field(name='Resolved on', value=report.resolved_on.strftime('%d/%m/%Y'))
-                em.add_field(name='Since version', value=report.since_version)
-                if report.versions:
-                    em.add_field(name='Affects version', value=report.versions[-1])
-                if report.fix_version:
-                    em.add_field(name='Fix version', value=report.fix_version)
-                    
+            with self.bot.tracer.span('jira.embed'):
+                em = self.make_embed(report)
+
             await self.bot.say(f'<{report.url}>', embed=em)
 
         else:
@@ -6,6 +6,7 @@ from discord.ext import commands
 from discord.ext.commands import Bot, Context
 
 from cogbot import checks
+from cogbot.action_queue import Lane
 from cogbot.cog_bot import CogBot
 
 log = logging.getLogger(__name__)
@@ -42,8 +43,8 @@ class Kick:
         # otherwise, error
         else:
             response = "Please provide a mention, an id, or a username + discriminator (without spaces)"
-            await self.bot.send_message(cmd.channel, response)
-            await self.bot.add_reaction(cmd, "➖")
+            await self.bot.send_message(cmd.channel, response, lane=Lane.MODERATION)
+            await self.bot.add_reaction(cmd, "➖", lane=Lane.MODERATION)
             return
 
         await self.bot.mod_log(
@@ -55,14 +56,14 @@ class Kick:
 
         if not member:
             response = f"Couldn't find anyone matching the input: {user}"
-            await self.bot.send_message(cmd.channel, response)
-            await self.bot.add_reaction(cmd, "❓")
+            await self.bot.send_message(cmd.channel, response, lane=Lane.MODERATION)
+            await self.bot.add_reaction(cmd, "❓", lane=Lane.MODERATION)
             return
 
         elif member == self.bot.user:
             response = f"I don't think you want to do that."
-            await self.bot.send_message(cmd.channel, response)
-            await self.bot.add_reaction(cmd, "🤖")
+            await self.bot.send_message(cmd.channel, response, lane=Lane.MODERATION)
+            await self.bot.add_reaction(cmd, "🤖", lane=Lane.MODERATION)
             return
 
         direct_message = (
@@ -71,7 +72,9 @@ class Kick:
         log.info(f"Kicking <{member.name}> with message: {direct_message}")
 
         try:
-            await self.bot.send_message(member, direct_message)
+            await self.bot.send_message(
+                member, direct_message, lane=Lane.MODERATION
+            )
             await self.bot.mod_log(
                 self.bot.as_member_of(ctx.message.server),
                 f"messaged {member.mention} about being kicked for:\n>>> {reason}",
@@ -102,14 +105,17 @@ class Kick:
             await self.bot.send_message(
                 cmd.channel,
                 f"Uh oh! Couldn't kick {member.mention}! You should look into this.",
+                lane=Lane.MODERATION,
             )
-            await self.bot.add_reaction(cmd, "❗")
+            await self.bot.add_reaction(cmd, "❗", lane=Lane.MODERATION)
             return
 
         await self.bot.send_message(
-            cmd.channel, f"Kicked {member.mention} with a warning!"
+            cmd.channel,
+            f"Kicked {member.mention} with a warning!",
+            lane=Lane.MODERATION,
         )
-        await self.bot.add_reaction(cmd, "👢")
+        await self.bot.add_reaction(cmd, "👢", lane=Lane.MODERATION)
 
 
 def setup(bot):
@@ -1,12 +1,11 @@
-import json
 import logging
 import typing
-import urllib.request
 
 from discord.ext import commands
 from discord.ext.commands import CommandError, Context
 
 from cogbot import checks
+from cogbot.cache_registry import Cache
 from cogbot.cog_bot import CogBot
 
 log = logging.getLogger(__name__)
@@ -41,16 +40,14 @@ class McBlock:
         self.bot: CogBot = bot
         options = bot.state.get_extension_state(ext)
         self.config = McBlockConfig(**options)
-        self.block_map: BlockMap = {}
+        # block name -> Block
+        self.block_map: Cache = bot.caches.create('McBlock.block_map', owner=self, reload=self.reload_data)
 
-    def reload_data(self):
+    async def reload_data(self):
         log.info('Reloading blocks from: {}'.format(self.config.database))
 
-        response = urllib.request.urlopen(self.config.database)
-        content = response.read().decode('utf8')
-
         try:
-            data = json.loads(content)
+            data = await self.bot.web.get_json(self.config.database, owner=self)
         except Exception as e:
             raise CommandError('Failed to reload blocks: {}'.format(e))
 
@@ -64,12 +61,19 @@ class McBlock:
                 properties=block_properties
             )
 
-        self.block_map = block_map
+        self.block_map.load(block_map)
 
         log.info('Successfully reloaded {} blocks'.format(len(data)))
 
+    def export_dataset(self):
+        return dict(self.block_map.items()) or None
+
     async def on_ready(self):
-        self.reload_data()
+        block_map = self.bot.recover_dataset(self)
+        if block_map:
+            self.block_map.load(block_map)
+        else:
+            await self.reload_data()
 
     def get_block(self, query: str) -> Block:
         return self.block_map.get(query) or self.block_map.get('minecraft:' + query)
@@ -97,7 +101,7 @@ class McBlock:
     @commands.command(pass_context=True, name='blockreload', hidden=True)
     async def cmd_invitereload(self, ctx: Context):
         try:
-            self.reload_data()
+            await self.reload_data()
             await self.bot.react_success(ctx)
         except:
             await self.bot.react_failure(ctx)
@@ -1,6 +1,4 @@
-import json
 import logging
-import urllib.request
 
 from cogbot import checks
 from cogbot.cog_bot import CogBot
@@ -26,8 +24,18 @@ class LegacyMinecraftCommands:
         self.bot = bot
         options = bot.state.get_extension_state(ext)
         self.config = LegacyMinecraftCommandsConfig(**options)
-        self.command_messages = {}
-        self._reload_commands()
+        self.command_messages = bot.caches.create(
+            'LegacyMinecraftCommands.command_messages', owner=self, reload=self._reload_commands)
+
+    def export_dataset(self):
+        return dict(self.command_messages.items()) or None
+
+    async def on_ready(self):
+        command_messages = self.bot.recover_dataset(self)
+        if command_messages:
+            self.command_messages.load(command_messages)
+        else:
+            await self._reload_commands()
 
     def _message_lines(self, cmd, data):
         yield '```'
@@ -59,31 +67,30 @@ class LegacyMinecraftCommands:
         else:
             yield f'See: <{self.config.command_page}#{cmd}>'
 
-    def _reload_commands(self):
+    async def _reload_commands(self):
         manifest = self.config.command_manifest
 
         log.info(f'reloading Minecraft commands from: {manifest}')
 
-        response = urllib.request.urlopen(manifest)
-        content = response.read().decode('utf8')
-
         try:
-            cmd_data = json.loads(content)
+            cmd_data = await self.bot.web.get_json(manifest, owner=self)
         except Exception as e:
             raise CommandError(f'failed to load command manifest json: {e.args[0]}')
 
-        self.command_messages = {cmd: '\n'.join(self._message_lines(cmd, data)) for cmd, data in cmd_data.items()}
+        self.command_messages.load(
+            {cmd: '\n'.join(self._message_lines(cmd, data)) for cmd, data in cmd_data.items()})
 
         log.info(f'finished loading {len(cmd_data)} commands')
 
     async def mcc(self, ctx: Context, command: str):
-        if command not in self.command_messages:
+        message = self.command_messages.get(command)
+        if message is None:
             raise CommandNotFound(f'no such Minecraft command "{command}"')
-        await self.bot.say(self.command_messages[command])
+        await self.bot.say(message)
 
     async def mccreload(self, ctx: Context):
         try:
-            self._reload_commands()
+            await self._reload_commands()
             await self.bot.react_success(ctx)
         except:
             await self.bot.react_failure(ctx)
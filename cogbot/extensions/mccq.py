@@ -1,4 +1,5 @@
 import logging
+import threading
 import mccq.errors
 from discord import Game
 from discord.ext import commands
@@ -70,13 +71,30 @@ class MCCQExtension:
                 version_file=self.state.version_file,
                 whitelist=self.state.version_whitelist),
             show_versions=self.state.show_versions)
+        bot.memory.register('MCCQExtension.version_database', lambda: self.query_manager.database, owner=self)
+
+        # the version database isn't safe to use from more than one thread at a time
+        self.database_lock = threading.Lock()
 
         # TODO fix hack
         self.cmd_mcc._buckets._cooldown.rate = self.state.cooldown_rate
         self.cmd_mcc._buckets._cooldown.per = self.state.cooldown_per
 
+    def locked(self, fn, *args):
+        with self.database_lock:
+            return fn(*args)
+
+    def export_dataset(self):
+        # the query manager holds the cache of loaded versions
+        return self.query_manager
+
     async def on_ready(self):
-        await self.reload()
+        query_manager = self.bot.recover_dataset(self)
+        if query_manager:
+            self.query_manager = query_manager
+            await self.update_presence()
+        else:
+            await self.reload()
 
     def should_warn_legacy(self, ctx: Context, command: str):
         for version in self.LEGACY_VERSION_STRINGS:
@@ -93,7 +111,9 @@ class MCCQExtension:
             arguments = QueryManager.parse_query_arguments(command)
 
             # get the command results to render
-            full_results = self.query_manager.results_from_arguments(arguments)
+            # may load a version from the database, and then searches it
+            full_results = await self.bot.run_blocking(
+                self.locked, self.query_manager.results_from_arguments, arguments, owner=self)
             num_full_results = sum(len(lines) for lines in full_results.values())
 
             # trim results, if enabled
@@ -190,10 +210,14 @@ class MCCQExtension:
             await self.bot.add_reaction(ctx.message, u'😬')
 
     async def reload(self):
-        self.query_manager.reload()
+        await self.bot.run_blocking(self.locked, self.query_manager.reload, owner=self)
+        await self.update_presence()
+
+    async def update_presence(self):
         if self.state.presence_version:
             # pre-emptively load latest version into the cache
-            self.query_manager.database.get(self.state.presence_version)
+            await self.bot.run_blocking(
+                self.locked, self.query_manager.database.get, self.state.presence_version, owner=self)
             # and set it as the bot presence ("playing")
             actual_presence_version = self.query_manager.database.get_actual_version(self.state.presence_version)
             log.info('Setting presence to latest version: {}'.format(actual_presence_version))
@@ -1,7 +1,7 @@
+import functools
 import json
 import logging
 import typing
-import urllib.request
 
 import shlex
 import argparse
@@ -13,10 +13,12 @@ import discord
 from discord import Embed
 from discord import Color
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from cogbot import checks
 from cogbot.cog_bot import CogBot
+from cogbot.scheduler import Job
+from cogbot.web_client import WebClientError
 
 import math
 
@@ -142,42 +144,63 @@ class McNbtDoc:
         options = bot.state.get_extension_state(ext)
         self.config = McNbtDocConfig(**options)
         self.data = {}
-        self.version_data = {}
+        # each version's schemas are large, so only the most recently used are kept
+        self.version_data = bot.caches.create('McNbtDoc.version_data', owner=self, max_entries=8)
         self.active_embeds: typing.Dict[discord.Server, typing.Dict[str, ActiveEmbed]] = {}
-        self.last_poll: datetime = datetime.utcnow()
+        bot.memory.register('McNbtDoc.active_embeds', lambda: self.active_embeds, owner=self)
+        # only wake up for interaction emojis on active embeds
+        self.reaction_route = bot.router.add_route(
+            self,
+            'reaction_add',
+            self.handle_reaction,
+            messages=(),
+            emoji=(u'◀', u'▶', u'🔼', u'🔽')
+        )
 
-    def reload_data(self):
+    async def reload_data(self):
         log.info('Reloading NBT schemas from: {}'.format(self.config.database))
 
-        response = urllib.request.urlopen(self.config.database)
-        mcregres = urllib.request.urlopen(self.config.registry_database)
         try:
-            self.data = json.loads(response.read().decode('utf8'))
-            self.registries = json.loads(mcregres.read().decode('utf8'))
-            self.version_data = {}
+            data, registries = await asyncio.gather(
+                self.bot.web.get_json(self.config.database, owner=self),
+                self.bot.web.get_json(self.config.registry_database, owner=self),
+                loop=self.bot.loop
+            )
+            self.data = data
+            self.registries = registries
+            self.version_data.clear()
         except Exception as e:
             raise CommandError('Failed to reload NBT schemas: {}'.format(e))
 
         log.info('Successfully reloaded NBT schemas')
 
+    def export_dataset(self):
+        # version schemas are kept too, since they are the most expensive to fetch
+        if self.data:
+            return self.data, self.registries, dict(self.version_data.items())
+
     async def on_ready(self):
-        self.reload_data()
+        dataset = self.bot.recover_dataset(self)
+        if dataset:
+            self.data, self.registries, version_data = dataset
+            self.version_data.load(version_data)
+        else:
+            await self.reload_data()
 
     async def get_version(self, version: str, ctx: Context):
-        if not version in self.version_data:
+        data = self.version_data.get(version)
+        if data is None:
             log.info('Loading NBT schemas for version {}'.format(version))
             try:
                 url = self.config.versions.format(version)
-                res = urllib.request.urlopen(url)
-                self.version_data[version] = json.loads(res.read().decode('utf8'))
-                return True
+                data = self.version_data[version] = await self.bot.web.get_json(url, owner=self)
             except json.JSONDecodeError as e:
                 await self.bot.add_reaction(ctx.message, u'❗')
                 raise CommandError('JSON decode error from loading schema at {}'.format(url))
-            except urllib.request.URLError as e:
-                log.error('URLError when loading schema at {}: {}'.format(url, e))
-                return False
-        return True
+            except WebClientError as e:
+                log.error('Failed to fetch schema at {}: {}'.format(url, e))
+                return None
+        return data
 
     async def get_from_reg(
         self,
@@ -188,8 +211,11 @@ class McNbtDoc:
         version: typing.Optional[str] = None
     ):
         if version:
-            await self.get_version(version, ctx)
-            return await self.walk_from_reg(it, reg, self.version_data[version], path, ctx)
+            data = await self.get_version(version, ctx)
+            if data is None:
+                await self.bot.add_reaction(ctx.message, u'❗')
+                return None
+            return await self.walk_from_reg(it, reg, data, path, ctx)
         else:
             return await self.walk_from_reg(it, reg, self.data, path, ctx)
     
@@ -287,15 +313,15 @@ class McNbtDoc:
     @commands.command(pass_context=True, name='nbt', help=parser.format_help())
     async def cmd_nbt(self, ctx: Context, *, query: str):
         try:
-            args = vars(parser.parse_args(shlex.split(query)))
+            with self.bot.tracer.span('nbt.parse_args'):
+                args = vars(parser.parse_args(shlex.split(query)))
         except:
             await self.bot.add_reaction(ctx.message, u'💩')
             return
         
         if args['version']:
-            if await self.get_version(args['version'], ctx):
-                data = self.version_data[args['version']]
-            else:
+            data = await self.get_version(args['version'], ctx)
+            if data is None:
                 await self.bot.add_reaction(ctx.message, u'❗')
                 return
         else:
@@ -316,7 +342,8 @@ class McNbtDoc:
             title = args['get_path'].split('::')[-1]
         elif args['nbt_search']:
             s = args['nbt_search']
-            matches = search_nbt(s, data['root_modules']['minecraft'], [], data)
+            matches = await self.bot.run_blocking(
+                search_nbt, s, data['root_modules']['minecraft'], [], data, owner=self)
             if len(matches) == 0:
                 await self.bot.add_reaction(ctx.message, u'🤷‍♀️')
                 return
@@ -337,7 +364,7 @@ class McNbtDoc:
                 )
                 return
         elif args['search']:
-            matches = search_field(args['search'], data)
+            matches = await self.bot.run_blocking(search_field, args['search'], data, owner=self)
             if len(matches) == 0:
                 await self.bot.add_reaction(ctx.message, u'🤷‍♀️')
                 return
@@ -380,12 +407,13 @@ class McNbtDoc:
             title = name
             if len(path) > 0:
                 title = path[-1]
-        ace = ActiveEmbed(None, item, data, self.config.field_limit, title, False, self.config.active_limit)
-        if ace.should_scroll():
-            msg = 'page {}'.format(ace.get_page_msg())
-        else:
-            msg = ''
-        em = ace.get_embed()
+        with self.bot.tracer.span('nbt.embed'):
+            ace = ActiveEmbed(None, item, data, self.config.field_limit, title, False, self.config.active_limit)
+            if ace.should_scroll():
+                msg = 'page {}'.format(ace.get_page_msg())
+            else:
+                msg = ''
+            em = ace.get_embed()
         if em == None:
             await self.bot.add_reaction(ctx.message, u'❌')
             return
@@ -394,30 +422,29 @@ class McNbtDoc:
         if not thismsg.channel.server in self.active_embeds:
             self.active_embeds[thismsg.channel.server] = {}
         self.active_embeds[thismsg.channel.server][str(thismsg.id)] = ace
-        ace.remove_task_factory = lambda: remove_ae(
-            str(thismsg.id),
-            thismsg.channel.server,
-            self,
-            self.config.active_limit
+        self.reaction_route.add_key('messages', thismsg.id)
+        ace.expire_job = self.bot.scheduler.after(
+            'McNbtDoc.remove_ae',
+            self.config.active_limit.total_seconds(),
+            functools.partial(remove_ae, str(thismsg.id), thismsg.channel.server, self),
+            owner=self
         )
-        ace.change_active()
         if ace.should_scroll():
             ace.is_scrolling = True
-            await self.bot.add_reaction(thismsg, u'◀')
-            await self.bot.add_reaction(thismsg, u'▶')
-        await self.bot.add_reaction(thismsg, u'🔼')
-        await self.bot.add_reaction(thismsg, u'🔽')
+            await self.bot.add_reactions(thismsg, u'◀', u'▶', u'🔼', u'🔽')
+        else:
+            await self.bot.add_reactions(thismsg, u'🔼', u'🔽')
 
     @checks.is_manager()
     @commands.command(pass_context=True, name='nbtreload', hidden=True)
     async def cmd_nbtreload(self, ctx: Context):
         try:
-            self.reload_data()
+            await self.reload_data()
             await self.bot.react_success(ctx)
         except:
             await self.bot.react_failure(ctx)
     
-    async def on_reaction_add(self, reaction: discord.Reaction, reactor: discord.Member):
+    async def handle_reaction(self, reaction: discord.Reaction, reactor: discord.Member):
         if isinstance(reactor, discord.Member):
             state = self.active_embeds.get(reactor.server, None)
             if state and str(reaction.message.id) in state and reactor != self.bot.user:
@@ -464,8 +491,7 @@ class McNbtDoc:
             )
         if em.should_scroll() and not em.is_scrolling:
             em.is_scrolling = True
-            await self.bot.add_reaction(message, u'◀')
-            await self.bot.add_reaction(message, u'▶')
+            await self.bot.add_reactions(message, u'◀', u'▶')
         elif em.is_scrolling:
             em.is_scrolling = False
             await asyncio.gather(
@@ -585,16 +611,9 @@ def format_nbtpath(p):
             vals.append(x['Child'])
     return '.'.join(vals)
 
-async def remove_ae(ae: str, server: discord.Server, mcnbtdoc: McNbtDoc, dt: timedelta):
-    try:
-        await asyncio.sleep(dt.total_seconds())
-    except asyncio.CancelledError:
-        pass
-    ace = mcnbtdoc.active_embeds[server][ae]
-    if ace.no_delete > 0:
-        ace.no_delete -= 1
-    else:
-        del mcnbtdoc.active_embeds[server][ae]
+async def remove_ae(ae: str, server: discord.Server, mcnbtdoc: McNbtDoc):
+    mcnbtdoc.active_embeds[server].pop(ae, None)
+    mcnbtdoc.reaction_route.discard_key('messages', ae)
 
 class ActiveEmbed:
     def __init__(
@@ -617,17 +636,12 @@ class ActiveEmbed:
         self.cached_nbttype = [src]
         self.title = title
         self.is_scrolling = scrolling
-        # Delete counter so multiple queued requests should work out
-        self.no_delete = 0
-        self.remove_task: typing.Optional[asyncio.Task] = None
-        self.remove_task_factory: typing.Optional[typing.Any] = None
+        # Deactivates the embed once it has been left alone for long enough
+        self.expire_job: typing.Optional[Job] = None
 
     def change_active(self):
-        if self.remove_task:
-            self.no_delete += 1
-            self.remove_task.cancel()
-        if self.remove_task_factory:
-            self.remove_task = asyncio.get_event_loop().create_task(self.remove_task_factory())
+        if self.expire_job:
+            self.expire_job.reschedule()
 
     def get_current_item(self):
         # there should always be at least one
@@ -23,7 +23,7 @@ class NBT:
 
     async def nbt(self, ctx: Context, nbtstring: str, schemastr: str = None):
         try:
-            nbtobj = nbtlib.parse_nbt(nbtstring)
+            nbtobj = await self.bot.run_blocking(nbtlib.parse_nbt, nbtstring, owner=self)
 
             if schemastr in schemas.entities.MAP:
                 schema = schemas.entities.MAP[schemastr]
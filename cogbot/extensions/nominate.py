@@ -98,8 +98,7 @@ class NominateServerState:
         nom_message = await self.bot.send_message(ctx.message.channel, embed=em)
 
         # add some default reactions
-        await self.bot.add_reaction(nom_message, "👍")
-        await self.bot.add_reaction(nom_message, "👎")
+        await self.bot.add_reactions(nom_message, "👍", "👎")
 
         # delete the user command
         await self.bot.delete_message(ctx.message)
@@ -0,0 +1,100 @@
+import copy
+import cProfile
+import logging
+import os
+import pstats
+import time
+import typing
+from datetime import datetime
+
+from discord.ext import commands
+from discord.ext.commands import Context
+
+from cogbot import checks
+from cogbot.cog_bot import CogBot
+
+log = logging.getLogger(__name__)
+
+
+class ProfileConfig:
+    def __init__(self, **options):
+        self.directory: str = options.get('directory', 'profiles')
+        self.hotspots: int = options.get('hotspots', 12)
+
+
+class Profile:
+    def __init__(self, bot: CogBot, ext: str):
+        self.bot = bot
+        self.config = ProfileConfig(**bot.state.get_extension_state(ext))
+
+    def format_function(self, func: typing.Tuple[str, int, str]) -> str:
+        filename, line, name = func
+        if filename == '~':
+            # built-ins have no file
+            return name
+        return f'{name} ({os.path.basename(filename)}:{line})'
+
+    def get_hotspots(self, stats: pstats.Stats) -> typing.List[typing.Tuple[float, float, int, str]]:
+        rows = [
+            (cumulative, total, calls, self.format_function(func))
+            for func, (_, calls, total, cumulative, _) in stats.stats.items()
+        ]
+        rows.sort(reverse=True)
+        return rows[:self.config.hotspots]
+
+    def save_profile(self, stats: pstats.Stats, command_name: str) -> str:
+        os.makedirs(self.config.directory, exist_ok=True)
+        filename = '{}-{}.prof'.format(datetime.now().strftime('%Y%m%d-%H%M%S'), command_name)
+        path = os.path.join(self.config.directory, filename)
+        stats.dump_stats(path)
+        return path
+
+    @checks.is_manager()
+    @commands.command(pass_context=True, name='profile', hidden=True)
+    async def cmd_profile(self, ctx: Context, *, command_line: str):
+        command_name = command_line.split()[0]
+        command = self.bot.get_command(command_name)
+        if command is None or command is ctx.command:
+            await self.bot.add_reaction(ctx.message, u'❓')
+            return
+
+        # the same message, as if it had been sent with just the command to profile
+        message = copy.copy(ctx.message)
+        message.content = ctx.prefix + command_line
+
+        # NOTE the profiler sees everything else the event loop runs in the meantime, too
+        profiler = cProfile.Profile()
+        api_before = self.bot.timings.get_api_time()
+        started_at = time.perf_counter()
+        cpu_started_at = time.process_time()
+        profiler.enable()
+        try:
+            await self.bot.process_commands(message)
+        finally:
+            profiler.disable()
+        cpu = time.process_time() - cpu_started_at
+        wall = time.perf_counter() - started_at
+        api = self.bot.timings.get_api_time() - api_before
+
+        stats = pstats.Stats(profiler)
+        try:
+            path = await self.bot.run_blocking(self.save_profile, stats, command_name, owner=self)
+        except:
+            log.exception('Failed to save profile')
+            path = None
+
+        lines = [
+            command_line,
+            f'total {wall * 1000:.1f}ms, discord api {api * 1000:.1f}ms, local cpu {cpu * 1000:.1f}ms',
+            '',
+            f'{"cumulative":>10} {"own":>9} {"calls":>7}  function',
+        ]
+        for cumulative, total, calls, name in self.get_hotspots(stats):
+            lines.append(f'{cumulative * 1000:>8.1f}ms {total * 1000:>7.1f}ms {calls:>7}  {name[:60]}')
+
+        saved = f'Saved full profile to: `{path}`' if path else 'Failed to save full profile'
+        await self.bot.say('```\n{}\n```{}'.format('\n'.join(lines), saved))
+
+
+def setup(bot):
+    bot.add_cog(Profile(bot, __name__))
@@ -10,8 +10,10 @@ class Quote:
         self.bot: CogBot = bot
         options = bot.state.get_extension_state(ext)
         self.emojis = set(options.get('emojis', ['🗒']))
+        # only wake up for the quote emojis
+        bot.router.add_route(self, 'reaction_add', self.quote_reaction, emoji=self.emojis)
 
-    async def on_reaction_add(self, reaction: discord.Reaction, user: discord.Member):
+    async def quote_reaction(self, reaction: discord.Reaction, user: discord.Member):
         if (user != self.bot) and (reaction.emoji in self.emojis):
             await self.bot.remove_reaction(reaction.message, reaction.emoji, user)
             await self.quote_message(destination=reaction.message.channel, message=reaction.message, quoter=user)
@@ -14,8 +14,7 @@ class React:
     async def react(self, ctx: Context, channel_id, message_id, *emojis):
         channel = self.bot.get_channel(channel_id)
         message = await self.bot.get_message(channel, message_id)
-        for emoji in emojis:
-            await self.bot.add_reaction(message, emoji)
+        await self.bot.add_reactions(message, *emojis)
         await self.bot.react_success(ctx)
 
 
@@ -8,6 +8,7 @@ from discord.ext.commands import Context
 import cogbot
 from cogbot import checks
 from cogbot.cog_bot import CogBot
+from cogbot.formatting import make_table
 
 
 class Status:
@@ -15,25 +16,209 @@ class Status:
         self.bot = bot
 
     @checks.is_manager()
-    @commands.command(pass_context=True, name='status')
+    @commands.group(pass_context=True, name='status')
     async def cmd_status(self, ctx: Context):
-        pyv = sys.version_info
+        if ctx.invoked_subcommand is None:
+            pyv = sys.version_info
 
-        uptime = datetime.now() - self.bot.started_at
+            uptime = datetime.now() - self.bot.started_at
 
-        rows = (
-            ('python version', f'{pyv[0]}.{pyv[1]}.{pyv[2]}'),
-            ('discord.py version', discord.__version__),
-            ('cogbot version', cogbot.__version__),
-            ('started at', str(self.bot.started_at)),
-            ('uptime', str(uptime)),
+            rows = (
+                ('python version', f'{pyv[0]}.{pyv[1]}.{pyv[2]}'),
+                ('discord.py version', discord.__version__),
+                ('cogbot version', cogbot.__version__),
+                ('started at', str(self.bot.started_at)),
+                ('uptime', str(uptime)),
+            )
+
+            await self.bot.say(make_table(rows))
+
+    def format_bytes(self, size: int) -> str:
+        for unit in ('B', 'KiB', 'MiB'):
+            if abs(size) < 1024:
+                return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+            size /= 1024
+        return f'{size:.1f} GiB'
+
+    def format_memory(self, entry) -> str:
+        text = self.format_bytes(entry.size)
+        if entry.partial:
+            text = 'over ' + text
+        if entry.growth is not None:
+            text += f' ({"+" if entry.growth >= 0 else "-"}{self.format_bytes(abs(entry.growth))})'
+        return text
+
+    @cmd_status.command(pass_context=True, name='events')
+    async def cmd_status_events(self, ctx: Context):
+        rows = tuple(
+            (event, f'{stats.events} events, {stats.calls} calls, {stats.saved} saved')
+            for event, stats in sorted(self.bot.router.stats.items())
         )
 
-        pad = 1 + max(len(row[0]) for row in rows)
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='imports')
+    async def cmd_status_imports(self, ctx: Context):
+        rows = []
+        for profile in self.bot.extension_loader.report():
+            if not profile.loaded:
+                rows.append((profile.ext, 'deferred'))
+                continue
+            packages = ', '.join(profile.new_packages) or 'none'
+            rows.append((
+                profile.ext,
+                f'{profile.total_time:.3f}s (import {profile.import_time:.3f}s, setup {profile.setup_time:.3f}s), '
+                f'{profile.new_module_count} modules, new packages: {packages}'
+            ))
+
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='warmup')
+    async def cmd_status_warmup(self, ctx: Context):
+        rows = []
+        for name, gate in sorted(self.bot.warmup.gates.items()):
+            if gate.duration is None:
+                rows.append((name, gate.state.value))
+            else:
+                rows.append((name, f'{gate.state.value} in {gate.duration:.3f}s ({gate.warm_ups} warm-ups)'))
+
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='timing')
+    async def cmd_status_timing(self, ctx: Context, limit: int = 10):
+        # slowest first, by time spent overall
+        command_timings = sorted(self.bot.timings.commands.items(), key=lambda item: item[1].total.total, reverse=True)
+        rows = []
+        for name, timings in command_timings[:limit]:
+            rows.append((name, timings.total.summary()))
+            rows.append(('  body / api', f'p95={timings.body.percentile(95) * 1000:.1f}ms / '
+                                         f'p95={timings.api.percentile(95) * 1000:.1f}ms'))
+        await self.bot.say(make_table(rows))
+
+        listeners = sorted(self.bot.timings.listeners.items(), key=lambda item: item[1].total, reverse=True)
+        rows = [(name, histogram.summary()) for name, histogram in listeners[:limit]]
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='lag')
+    async def cmd_status_lag(self, ctx: Context, index: int = None):
+        monitor = self.bot.loop_monitor
+        stalls = list(reversed(monitor.stalls))
+
+        # show where a particular stall happened
+        if index is not None:
+            if 0 <= index < len(stalls):
+                stall = stalls[index]
+                header = f'{stall.at}: blocked {stall.duration:.3f}s in {stall.culprit}'
+                await self.bot.say('\n'.join(('```', header, ''.join(stall.stack)[-1800:], '```')))
+            else:
+                await self.bot.react_question(ctx)
+            return
+
+        rows = [('loop lag', monitor.lag.summary())]
+        for i, stall in enumerate(stalls[:15]):
+            rows.append((f'#{i} {stall.at:%H:%M:%S}', f'{stall.duration:.3f}s in {stall.culprit}'))
+
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='samples')
+    async def cmd_status_samples(self, ctx: Context):
+        profiler = self.bot.sampling_profiler
+        if profiler is None:
+            await self.bot.react_neutral(ctx)
+            return
+
+        # the last complete window, if there is one yet
+        window = profiler.last or profiler.current
+        busy = window.samples - window.idle
+        rows = [
+            ('window', f'{window.started_at:%H:%M:%S} to {window.ended_at or datetime.now():%H:%M:%S}'),
+            ('samples', f'{window.samples} ({busy} busy, {window.idle} idle)'),
+        ]
+        for name, count in window.cogs.most_common(15):
+            rows.append((name, f'{count} ({count / max(busy, 1) * 100:.1f}% of busy)'))
+
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='mem')
+    async def cmd_status_mem(self, ctx: Context):
+        memory = self.bot.memory
+        previous = memory.last
+        snapshot = await memory.take_snapshot()
+
+        since = f'{previous.taken_at:%H:%M:%S}' if previous else 'never'
+        rows = [('previous snapshot', since)]
+        if snapshot.traced_total:
+            rows.append(('traced total', self.format_memory(snapshot.traced_total)))
+
+        rows.append(('extensions', ''))
+        for name, entry in sorted(snapshot.extensions.items(), key=lambda item: -item[1].size):
+            rows.append((f'  {name}', self.format_memory(entry)))
+
+        rows.append(('caches', ''))
+        for name, entry in sorted(snapshot.caches.items(), key=lambda item: -item[1].size):
+            rows.append((f'  {name}', self.format_memory(entry)))
+
+        if snapshot.traced:
+            rows.append(('allocated by', ''))
+            for name, entry in sorted(snapshot.traced.items(), key=lambda item: -item[1].size):
+                rows.append((f'  {name}', self.format_memory(entry)))
+
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='blocking')
+    async def cmd_status_blocking(self, ctx: Context):
+        rows = []
+        for owner, stats in sorted(self.bot.blocking.stats.items()):
+            rows.append((owner, f'{stats.active} running, {stats.waiting} waiting'))
+            rows.append(('  queued', stats.queued.summary()))
+            rows.append(('  run', stats.run.summary()))
+
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='jobs')
+    async def cmd_status_jobs(self, ctx: Context):
+        scheduler = self.bot.scheduler
+        pending = {}
+        for job in scheduler.jobs:
+            pending[job.name] = pending.get(job.name, 0) + 1
+
+        rows = []
+        for name, stats in sorted(scheduler.stats.items()):
+            rows.append((name, f'{pending.get(name, 0)} pending, {stats.overlaps} overlaps skipped'))
+            rows.append(('  run', stats.runs.summary()))
+            rows.append(('  late', stats.lateness.summary()))
+
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='queue')
+    async def cmd_status_queue(self, ctx: Context):
+        outbound = self.bot.outbound
+
+        rows = [('in flight', f'{outbound.in_flight}/{outbound.max_in_flight}')]
+        for lane, stats in outbound.stats.items():
+            rows.append((
+                lane.name.lower(),
+                f'{outbound.depth(lane)} queued, {stats.completed} done, {stats.failed} failed, '
+                f'{stats.coalesced} coalesced, wait {stats.mean_wait:.3f}s avg / {stats.max_wait:.3f}s max'
+            ))
+
+        await self.bot.say(make_table(rows))
+
+    @cmd_status.command(pass_context=True, name='usage')
+    async def cmd_status_usage(self, ctx: Context, hours: float = 24, limit: int = 10):
+        if not self.bot.analytics:
+            await self.bot.react_neutral(ctx)
+            return
+
+        hot = await self.bot.analytics.hot_commands(hours, limit)
 
-        innards = (''.join((f'{row[0]}:'.ljust(pad), '  ', row[1])) for row in rows)
+        rows = []
+        for server_id, command, count, total_seconds in hot:
+            server = self.bot.get_server(server_id)
+            where = server.name if server else (server_id or 'direct messages')
+            rows.append((f'{command} in {where}', f'{count} uses, {total_seconds / count:.3f}s avg'))
 
-        await self.bot.say('\n'.join(('```', '\n'.join(innards), '```')))
+        await self.bot.say(make_table(rows))
 
 
 def setup(bot):
@@ -13,8 +13,7 @@ class Vote:
 
     @commands.command(pass_context=True)
     async def vote(self, ctx: Context):
-        await self.bot.add_reaction(ctx.message, u'👍')
-        await self.bot.add_reaction(ctx.message, u'👎')
+        await self.bot.add_reactions(ctx.message, u'👍', u'👎')
 
 
 def setup(bot):
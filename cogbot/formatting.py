@@ -0,0 +1,13 @@
+import typing
+
+
+def make_table(rows: typing.Sequence[typing.Tuple[str, str]]) -> str:
+    """ Rows of labels and values, lined up in a code block. """
+    if not rows:
+        return '```\nnothing to report\n```'
+
+    pad = 1 + max(len(row[0]) for row in rows)
+
+    innards = (''.join((f'{row[0]}:'.ljust(pad), '  ', row[1])) for row in rows)
+
+    return '\n'.join(('```', '\n'.join(innards), '```'))
@@ -0,0 +1,79 @@
+import gzip
+import json
+import logging
+import typing
+
+
+log = logging.getLogger(__name__)
+
+
+def open_log(path: str, mode: str) -> typing.IO[str]:
+    """ Open a JSON lines file, compressed if its name ends in `.gz`. """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class JsonLinesAppender:
+    """
+    Appends JSON objects to a local file, one compact object per line.
+
+    Lines are buffered and appended every few seconds off the event loop. With a `max_buffer`, if
+    the file can't keep up, the oldest unwritten lines are dropped rather than letting the buffer
+    grow. Lines that fail to be written are kept for the next try, within the same limit.
+    """
+
+    def __init__(self, bot, path: str, name: str, flush_interval: float = 5, max_buffer: int = None):
+        self.bot = bot
+        self.path = path
+        self.name = name
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.written = 0
+        self.dropped = 0
+        self._buffer: typing.List[str] = []
+        self._flush_job = None
+
+    def start(self):
+        self._flush_job = self.bot.scheduler.every(
+            f"{self.name}.flush", self.flush_interval, self.flush
+        )
+
+    def _trim(self):
+        if self.max_buffer is not None and len(self._buffer) > self.max_buffer:
+            excess = len(self._buffer) - self.max_buffer
+            del self._buffer[:excess]
+            self.dropped += excess
+
+    def append(self, entry: dict):
+        self._buffer.append(json.dumps(entry, separators=(",", ":"), default=str))
+        self._trim()
+
+    def _write(self, lines: typing.List[str]):
+        with open_log(self.path, "a") as fp:
+            fp.write("\n".join(lines) + "\n")
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        try:
+            await self.bot.run_blocking(self._write, lines, owner=self.name)
+        except:
+            log.exception(f"Failed to write {len(lines)} lines to: {self.path}")
+            self._buffer[:0] = lines
+            self._trim()
+            return
+        self.written += len(lines)
+
+    async def close(self):
+        if self._flush_job is not None:
+            self._flush_job.cancel()
+        await self.flush()
+
+
+def read_lines(path: str) -> typing.Iterator[dict]:
+    with open_log(path, "r") as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,191 @@
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+import typing
+
+
+# records per second allowed through by default, for loggers that can get noisy under load
+DEFAULT_RATE_LIMITS = {
+    # every message the bot cares about is logged here
+    "cogbot.cog_bot": 20,
+    # gateway and HTTP chatter
+    "discord": 20,
+}
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most so many records per second from each rate-limited logger (and its
+    children), with bursts of up to a second's worth. Warnings and worse are never dropped.
+
+    The number of records dropped since the last one let through is added to that record as
+    `dropped`, so the gaps show up in the log.
+    """
+
+    def __init__(self, rate_limits: typing.Dict[str, float]):
+        super().__init__()
+        self.rate_limits = rate_limits
+        self.dropped = 0
+        # logger name -> the rate-limited logger it falls under, if any
+        self._limits_by_name: typing.Dict[str, typing.Optional[str]] = {}
+        # rate-limited logger -> [tokens, last refill, dropped since last let through]
+        self._buckets: typing.Dict[str, typing.List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _find_limit(self, name: str) -> typing.Optional[str]:
+        limited = self._limits_by_name.get(name, ())
+        if limited == ():
+            limited = None
+            for prefix in self.rate_limits:
+                if name == prefix or name.startswith(prefix + "."):
+                    # the most specific one wins
+                    if limited is None or len(prefix) > len(limited):
+                        limited = prefix
+            self._limits_by_name[name] = limited
+        return limited
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        limited = self._find_limit(record.name)
+        if limited is None:
+            return True
+
+        rate = self.rate_limits[limited]
+        burst = max(rate, 1)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(limited)
+            if bucket is None:
+                bucket = self._buckets[limited] = [burst, now, 0]
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self.dropped += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.dropped = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """ Formats each record as a single JSON object. """
+
+    # attributes every record has, which aren't worth repeating in every line
+    STANDARD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            # anything passed as `extra`, and `dropped`
+            if key not in self.STANDARD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without formatting them, so the caller only pays for
+    putting them on the queue. If the writer falls so far behind that the queue is full, records
+    are dropped rather than waiting for it.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # formatting is left to the writer thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class QueueWriter(logging.handlers.QueueListener):
+    """ Writes queued records from a background thread. """
+
+    def enqueue_sentinel(self):
+        # wait for room, rather than failing to stop when the queue is full
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """
+    Routes all logging through a bounded queue to a background writer thread, so that code on the
+    event loop never waits on a slow terminal or file. Noisy loggers are rate-limited before their
+    records reach the queue.
+    """
+
+    def __init__(
+        self,
+        handler: logging.Handler,
+        level: typing.Union[int, str] = logging.WARNING,
+        rate_limits: typing.Dict[str, float] = None,
+        queue_size: int = 10000,
+    ):
+        self.handler = handler
+        self.level = level
+        self.rate_limits = DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        self.rate_limit_filter = RateLimitFilter(self.rate_limits)
+        self.queue_handler.addFilter(self.rate_limit_filter)
+        self.listener = QueueWriter(self.queue, handler)
+
+    @property
+    def dropped(self) -> int:
+        return self.rate_limit_filter.dropped + self.queue_handler.dropped
+
+    def start(self):
+        logging.root.addHandler(self.queue_handler)
+        logging.root.setLevel(self.level)
+        self.listener.start()
+
+    def stop(self):
+        """ Write out whatever is still queued, and stop the writer thread. """
+        logging.root.removeHandler(self.queue_handler)
+        self.listener.stop()
+        if self.queue_handler.dropped:
+            self.handler.handle(
+                logging.makeLogRecord(
+                    {
+                        "name": __name__,
+                        "levelno": logging.WARNING,
+                        "levelname": "WARNING",
+                        "msg": "Dropped %d log records while the writer was behind",
+                        "args": (self.queue_handler.dropped,),
+                    }
+                )
+            )
+
+
+def parse_rate_limits(specs: typing.Iterable[str]) -> typing.Dict[str, float]:
+    """ Parse `logger=rate` pairs on top of the defaults. A rate of 0 lifts the limit. """
+    rate_limits = dict(DEFAULT_RATE_LIMITS)
+    for spec in specs:
+        name, _, rate = spec.partition("=")
+        rate = float(rate)
+        if rate > 0:
+            rate_limits[name] = rate
+        else:
+            rate_limits.pop(name, None)
+    return rate_limits
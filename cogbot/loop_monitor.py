@@ -0,0 +1,150 @@
+import asyncio
+import collections
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+import typing
+from datetime import datetime
+
+from cogbot.timing import Histogram
+
+
+log = logging.getLogger(__name__)
+
+
+class Stall:
+    def __init__(self, tick: float):
+        self.tick = tick
+        self.at = datetime.now()
+        self.duration: float = None
+        self.cog: str = None
+        self.method: str = None
+        self.stack: typing.List[str] = []
+
+    @property
+    def culprit(self) -> str:
+        if self.cog:
+            return f"{self.cog}.{self.method}"
+        return "unknown"
+
+
+class LoopMonitor:
+    """
+    Measures event loop scheduling delay continuously, and catches the loop in the act when a
+    callback blocks it for too long.
+
+    A heartbeat on the loop records how late each of its wake-ups is. A watchdog thread notices
+    when the heartbeat has stopped for longer than the threshold, and samples the stack of the
+    loop's thread right then, naming the innermost cog method on it. Stalls are kept in a bounded
+    ring buffer.
+    """
+
+    STACK_LIMIT = 20
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        interval: float = 0.25,
+        threshold: float = 0.2,
+        history: int = 50,
+    ):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram()
+        self.stalls: typing.Deque[Stall] = collections.deque(maxlen=history)
+        # code object of each cog method, to tell which cog is on the stack
+        self._cog_code: typing.Dict[typing.Any, typing.Tuple[str, str]] = {}
+        self._last_tick: float = None
+        self._pending: Stall = None
+        self._loop_thread_id: int = None
+        self._stopping = threading.Event()
+        self._watchdog: threading.Thread = None
+        self._heartbeat: asyncio.Task = None
+
+    def track_cog(self, cog):
+        cog_code = dict(self._cog_code)
+        for name, member in inspect.getmembers(type(cog)):
+            # commands wrap the method they were made from
+            func = getattr(member, "callback", member)
+            if inspect.isfunction(func):
+                cog_code[func.__code__] = (type(cog).__name__, name)
+        # swap in the new mapping all at once, since the watchdog reads it from another thread
+        self._cog_code = cog_code
+
+    def untrack_cog(self, cog):
+        cog_name = type(cog).__name__
+        self._cog_code = {
+            code: owner for code, owner in self._cog_code.items() if owner[0] != cog_name
+        }
+
+    def start(self):
+        if self._heartbeat is None:
+            self._heartbeat = self.loop.create_task(self._beat())
+
+    def stop(self):
+        self._stopping.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+
+    async def _beat(self):
+        self._loop_thread_id = threading.get_ident()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._last_tick = time.monotonic()
+        self._watchdog.start()
+
+        while True:
+            await asyncio.sleep(self.interval, loop=self.loop)
+            now = time.monotonic()
+            lag = max(0.0, now - self._last_tick - self.interval)
+            self.lag.observe(lag)
+
+            stall, self._pending = self._pending, None
+            if lag >= self.threshold:
+                # the watchdog may not have caught it, if it was brief
+                if stall is None or stall.tick != self._last_tick:
+                    stall = Stall(self._last_tick)
+                stall.duration = lag
+                self.stalls.append(stall)
+                log.warning(
+                    f"Event loop blocked for {lag:.3f}s, last seen in: {stall.culprit}"
+                )
+
+            self._last_tick = now
+
+    def _watch(self):
+        while not self._stopping.wait(self.threshold / 2):
+            tick = self._last_tick
+            if tick is None or self._pending is not None:
+                continue
+            if time.monotonic() - tick - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._pending = self._sample(tick, frame)
+
+    def find_cog(self, frame) -> typing.Optional[typing.Tuple[str, str]]:
+        """ The cog and method name of the innermost cog method on the stack, if any. """
+        cog_code = self._cog_code
+        while frame is not None:
+            owner = cog_code.get(frame.f_code)
+            if owner is not None:
+                return owner
+            frame = frame.f_back
+        return None
+
+    def _sample(self, tick: float, frame) -> Stall:
+        stall = Stall(tick)
+        owner = self.find_cog(frame)
+        if owner is not None:
+            stall.cog, stall.method = owner
+        stall.stack = traceback.format_list(
+            traceback.extract_stack(frame, limit=self.STACK_LIMIT)
+        )
+        return stall
@@ -0,0 +1,239 @@
+import asyncio
+import collections
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+import types
+import typing
+from datetime import datetime
+
+import discord
+
+
+log = logging.getLogger(__name__)
+
+
+# objects that belong to the client's own caches, so aren't counted as part of what refers to them
+SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    discord.Client,
+    discord.Server,
+    discord.Channel,
+    discord.PrivateChannel,
+    discord.Member,
+    discord.User,
+    discord.Role,
+    discord.Emoji,
+)
+
+
+# objects visited between yields to the event loop, when walking on it
+WALK_BATCH = 2000
+
+
+def _walk_size(
+    obj, exclude: typing.Iterable, limit: int
+) -> typing.Generator[None, None, typing.Tuple[int, bool]]:
+    # yields every so often, and returns the size and whether it's partial
+    seen = {id(o) for o in exclude}
+    pending = [obj]
+    size = 0
+    visited = 0
+    partial = False
+    while pending:
+        o = pending.pop()
+        if id(o) in seen or isinstance(o, SHARED_TYPES):
+            continue
+        seen.add(id(o))
+        visited += 1
+        if visited > limit:
+            return size, True
+        if visited % WALK_BATCH == 0:
+            yield
+        size += sys.getsizeof(o, 0)
+        if isinstance(o, (str, bytes, int, float, bool, type(None))):
+            continue
+        try:
+            if isinstance(o, dict):
+                pending.extend(o.keys())
+                pending.extend(o.values())
+            elif isinstance(o, (list, tuple, set, frozenset, collections.deque)):
+                pending.extend(o)
+            else:
+                # objects refer to their attributes either through a dict or through slots
+                pending.extend(gc.get_referents(o))
+        except RuntimeError:
+            # changed by another thread while we were looking at it
+            partial = True
+    return size, partial
+
+
+def estimate_size(obj, exclude: typing.Iterable = (), limit: int = 1000000) -> typing.Tuple[int, bool]:
+    """
+    Estimate the memory held by `obj` and everything it refers to, without counting anything twice.
+
+    Objects in `exclude`, and shared client objects such as servers and members, are not followed.
+    Returns the size in bytes, and whether the estimate is partial, having stopped early after
+    visiting `limit` objects or skipped something that changed while it was being looked at.
+    """
+    walk = _walk_size(obj, exclude, limit)
+    try:
+        while True:
+            next(walk)
+    except StopIteration as e:
+        return e.value
+
+
+async def estimate_size_gradually(
+    obj, loop: asyncio.AbstractEventLoop, exclude: typing.Iterable = (), limit: int = 1000000
+) -> typing.Tuple[int, bool]:
+    """ Like `estimate_size`, but yields to the event loop every so often along the way. """
+    walk = _walk_size(obj, exclude, limit)
+    try:
+        while True:
+            next(walk)
+            await asyncio.sleep(0, loop=loop)
+    except StopIteration as e:
+        return e.value
+
+
+def _traced_sizes(
+    traced: tracemalloc.Snapshot, paths: typing.Dict[str, str]
+) -> typing.Dict[str, int]:
+    """ Memory allocated from within each extension's files, given as path -> extension. """
+    # which extension each file belongs to, if any, worked out once per file
+    owner_by_filename: typing.Dict[str, typing.Optional[str]] = {}
+    sizes = collections.Counter()
+    for statistic in traced.statistics("traceback"):
+        for frame in statistic.traceback:
+            filename = frame.filename
+            if filename not in owner_by_filename:
+                owner_by_filename[filename] = next(
+                    (ext for path, ext in paths.items() if filename.startswith(path)), None
+                )
+            ext = owner_by_filename[filename]
+            if ext is not None:
+                sizes[ext] += statistic.size
+                break
+    return sizes
+
+
+class MemoryEntry:
+    def __init__(self, size: int, previous: int = None, partial: bool = False):
+        self.size = size
+        self.previous = previous
+        self.partial = partial
+
+    @property
+    def growth(self) -> typing.Optional[int]:
+        if self.previous is not None:
+            return self.size - self.previous
+
+
+class MemorySnapshot:
+    def __init__(self):
+        self.taken_at = datetime.now()
+        # estimated size of each extension's cog
+        self.extensions: typing.Dict[str, MemoryEntry] = {}
+        # estimated size of each registered cache
+        self.caches: typing.Dict[str, MemoryEntry] = {}
+        # memory allocated by code in each extension, if tracing allocations
+        self.traced: typing.Dict[str, MemoryEntry] = {}
+        self.traced_total: MemoryEntry = None
+
+
+class MemoryAccountant:
+    """
+    Reports approximate memory use per extension and per registered cache, and how it has changed
+    since the previous report.
+
+    Sizes are estimated by walking each cog or cache, stopping at objects shared with the client
+    (servers, channels, members and so on). If allocation tracing is enabled, memory allocated from
+    within each extension's code is also reported, which catches growth that is hard to reach by
+    walking. Reports are taken on the event loop, so that nothing changes under the walk, yielding
+    every so often so that the bot keeps up with everything else meanwhile; traced allocations are
+    grouped on a worker thread, since there can be a great many of them.
+    """
+
+    def __init__(self, bot, tracemalloc_frames: int = 0):
+        self.bot = bot
+        self.tracemalloc_frames = tracemalloc_frames
+        self.caches: typing.Dict[str, typing.Tuple[typing.Callable[[], typing.Any], typing.Any]] = {}
+        self.last: MemorySnapshot = None
+        if tracemalloc_frames and not tracemalloc.is_tracing():
+            tracemalloc.start(tracemalloc_frames)
+
+    def register(self, name: str, getter: typing.Callable[[], typing.Any], owner=None):
+        """ Include whatever `getter` returns in reports, under `name`, until `owner` is removed. """
+        self.caches[name] = (getter, owner)
+
+    def unregister_owner(self, owner):
+        for name, (_, cache_owner) in tuple(self.caches.items()):
+            if cache_owner is owner:
+                del self.caches[name]
+
+    def close(self):
+        if self.tracemalloc_frames and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _entry(self, previous: typing.Dict[str, MemoryEntry], name: str, size: int, partial=False):
+        old = previous.get(name)
+        return MemoryEntry(size, old.size if old else None, partial)
+
+    def _extension_paths(self) -> typing.Dict[str, str]:
+        # an extension's own file, or its whole directory for a package
+        paths = {}
+        for ext, module in tuple(self.bot.extensions.items()):
+            filename = getattr(module, "__file__", None)
+            if not filename:
+                continue
+            if os.path.basename(filename) == "__init__.py":
+                filename = os.path.dirname(filename) + os.sep
+            paths[filename] = ext.split(".")[-1]
+        return paths
+
+    async def _trace(self, snapshot: MemorySnapshot, previous: MemorySnapshot):
+        # a snapshot doesn't change once taken, so it can be gone through off the event loop
+        traced = tracemalloc.take_snapshot()
+        sizes = await self.bot.run_blocking(_traced_sizes, traced, self._extension_paths())
+
+        previous_traced = previous.traced if previous else {}
+        for ext, size in sizes.items():
+            snapshot.traced[ext] = self._entry(previous_traced, ext, size)
+        current, _ = tracemalloc.get_traced_memory()
+        snapshot.traced_total = MemoryEntry(
+            current, previous.traced_total.size if previous and previous.traced_total else None
+        )
+
+    async def _estimate(self, previous: typing.Dict[str, MemoryEntry], name: str, obj, exclude):
+        size, partial = await estimate_size_gradually(obj, self.bot.loop, exclude)
+        return self._entry(previous, name, size, partial)
+
+    async def take_snapshot(self) -> MemorySnapshot:
+        previous = self.last
+        snapshot = MemorySnapshot()
+        exclude = (self.bot, self.bot.connection, self.bot.loop)
+
+        previous_extensions = previous.extensions if previous else {}
+        for name, cog in tuple(self.bot.cogs.items()):
+            snapshot.extensions[name] = await self._estimate(
+                previous_extensions, name, cog, exclude
+            )
+
+        previous_caches = previous.caches if previous else {}
+        for name, (getter, _) in tuple(self.caches.items()):
+            snapshot.caches[name] = await self._estimate(
+                previous_caches, name, getter(), exclude
+            )
+
+        if tracemalloc.is_tracing():
+            await self._trace(snapshot, previous)
+
+        self.last = snapshot
+        return snapshot
@@ -0,0 +1,185 @@
+import collections
+import logging
+import typing
+
+import discord
+
+from cogbot.types import ChannelId
+
+
+log = logging.getLogger(__name__)
+
+
+class MessageCache:
+    """
+    Bounded per-channel ring buffers of recent messages, kept current from gateway events.
+
+    A channel is only tracked after its history has been requested once. From then on the buffer
+    holds a contiguous run of the channel's latest messages, so lookups that fit in it make no API
+    calls. Lookups that don't fit, and any lookups after a reconnect, fall back to `logs_from`.
+
+    The client only reports edits and deletions of messages in its own cache, which most fetched
+    messages aren't, so those are picked up from the raw gateway events instead.
+    """
+
+    def __init__(self, bot, size: int = 20):
+        self.bot = bot
+        self.size = size
+        self._channels: typing.Dict[ChannelId, typing.Deque[discord.Message]] = {}
+        # channels whose entire history fits in their buffer
+        self._complete: typing.Set[ChannelId] = set()
+        # changes seen while each channel's history is being fetched, by message id, with None for
+        # a deletion; one per fetch in flight
+        self._filling: typing.Dict[
+            ChannelId, typing.List[typing.Dict[str, typing.Optional[discord.Message]]]
+        ] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _find(self, buffer: typing.Deque[discord.Message], message_id: str) -> int:
+        for i, message in enumerate(buffer):
+            if message.id == message_id:
+                return i
+        return -1
+
+    def install(self):
+        """ Wrap the connection state's parsers for message edits and deletions. """
+        connection = self.bot.connection
+        for name, handler in (
+            ("parse_message_update", self._on_raw_update),
+            ("parse_message_delete", self._on_raw_delete),
+            ("parse_message_delete_bulk", self._on_raw_delete_bulk),
+        ):
+            setattr(connection, name, self._wrap(handler, getattr(connection, name)))
+
+    def _wrap(self, handler: typing.Callable[[dict], None], parser: typing.Callable[[dict], None]):
+        def handle_and_parse(data: dict):
+            try:
+                handler(data)
+            except:
+                log.exception(f"Failed to apply {parser.__name__} to the message cache")
+            return parser(data)
+
+        return handle_and_parse
+
+    def _on_raw_update(self, data: dict):
+        # the client updates messages it knows about itself, and reports them through
+        # `on_message_edit`; for any others, we can't rebuild the message, so start over
+        channel_id = data["channel_id"]
+        buffer = self._channels.get(channel_id)
+        if buffer is None or self._find(buffer, data["id"]) < 0:
+            return
+        if self.bot.connection._get_message(data["id"]) is None:
+            self.invalidate(channel_id)
+
+    def _on_raw_delete(self, data: dict):
+        self.remove_id(data["channel_id"], data["id"])
+
+    def _on_raw_delete_bulk(self, data: dict):
+        for message_id in data["ids"]:
+            self.remove_id(data["channel_id"], message_id)
+
+    def add(self, message: discord.Message):
+        for pending in self._filling.get(message.channel.id, ()):
+            pending[message.id] = message
+        buffer = self._channels.get(message.channel.id)
+        if buffer is None or self._find(buffer, message.id) >= 0:
+            return
+        # our own messages are added once sent, which can be after newer ones have arrived
+        i = len(buffer)
+        while i > 0 and int(buffer[i - 1].id) > int(message.id):
+            i -= 1
+        if i == len(buffer):
+            buffer.append(message)
+        elif len(buffer) < buffer.maxlen:
+            buffer.insert(i, message)
+        elif i > 0:
+            # full, so make room by dropping the oldest
+            buffer.popleft()
+            buffer.insert(i - 1, message)
+
+    def update(self, message: discord.Message):
+        for pending in self._filling.get(message.channel.id, ()):
+            pending[message.id] = message
+        buffer = self._channels.get(message.channel.id)
+        if buffer is not None:
+            i = self._find(buffer, message.id)
+            if i >= 0:
+                buffer[i] = message
+
+    def remove_id(self, channel_id: ChannelId, message_id: str):
+        for pending in self._filling.get(channel_id, ()):
+            pending[message_id] = None
+        buffer = self._channels.get(channel_id)
+        if buffer is not None:
+            i = self._find(buffer, message_id)
+            if i >= 0:
+                del buffer[i]
+
+    def invalidate(self, channel_id: ChannelId):
+        """ Forget the channel, so that its history is fetched again when next needed. """
+        self._channels.pop(channel_id, None)
+        self._complete.discard(channel_id)
+
+    def clear(self):
+        self._channels = {}
+        self._complete = set()
+
+    async def _fill(self, channel: discord.Channel):
+        # collect whatever arrives, changes or goes away while we wait on the fetch
+        pending: typing.Dict[str, typing.Optional[discord.Message]] = {}
+        self._filling.setdefault(channel.id, []).append(pending)
+        try:
+            fetched = [message async for message in self.bot.logs_from(channel, limit=self.size)]
+        finally:
+            fillers = self._filling[channel.id]
+            fillers.remove(pending)
+            if not fillers:
+                del self._filling[channel.id]
+
+        merged = {message.id: message for message in fetched}
+        for message in self._channels.get(channel.id, ()):
+            merged[message.id] = message
+        for message_id, message in pending.items():
+            if message is None:
+                merged.pop(message_id, None)
+            else:
+                merged[message_id] = message
+        ordered = sorted(merged.values(), key=lambda message: int(message.id))
+
+        buffer = collections.deque(ordered, maxlen=self.size)
+        self._channels[channel.id] = buffer
+
+        # if the channel has fewer messages than we asked for, then we have all of them
+        if len(fetched) < self.size:
+            self._complete.add(channel.id)
+        else:
+            self._complete.discard(channel.id)
+
+        return buffer
+
+    async def get_recent(
+        self, channel: discord.Channel, limit: int
+    ) -> typing.List[discord.Message]:
+        """ Get up to `limit` of the latest messages in the channel, newest first. """
+        buffer = self._channels.get(channel.id)
+
+        if buffer is not None and (
+            len(buffer) >= limit or channel.id in self._complete
+        ):
+            self.hits += 1
+        else:
+            self.misses += 1
+            if limit > self.size:
+                return [
+                    message
+                    async for message in self.bot.logs_from(channel, limit=limit)
+                ]
+            buffer = await self._fill(channel)
+
+        return list(reversed(buffer))[:limit]
+
+    async def get_latest(self, channel: discord.Channel) -> discord.Message:
+        recent = await self.get_recent(channel, 1)
+        if recent:
+            return recent[0]
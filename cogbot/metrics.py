@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+import typing
+
+from cogbot.timing import Histogram
+from cogbot.warmup import Readiness
+
+
+log = logging.getLogger(__name__)
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: typing.Dict[str, typing.Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsWriter:
+    """ Writes metrics in the Prometheus text exposition format. """
+
+    def __init__(self):
+        self.lines: typing.List[str] = []
+
+    def header(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels):
+        self.lines.append(f"{name}{_labels(labels)} {value}")
+
+    def summary(self, name: str, histogram: Histogram, **labels):
+        for q in QUANTILES:
+            self.sample(name, histogram.percentile(q * 100), quantile=q, **labels)
+        self.sample(name + "_sum", histogram.total, **labels)
+        self.sample(name + "_count", histogram.count, **labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def collect(bot) -> str:
+    now = time.time()
+    out = MetricsWriter()
+
+    out.header("cogbot_loop_lag_seconds", "summary", "Event loop scheduling delay.")
+    out.summary("cogbot_loop_lag_seconds", bot.loop_monitor.lag)
+
+    out.header("cogbot_loop_stalls", "gauge", "Recent event loop stalls remembered.")
+    out.sample("cogbot_loop_stalls", len(bot.loop_monitor.stalls))
+
+    out.header("cogbot_events_total", "counter", "Events dispatched, by type.")
+    for event, count in sorted(bot.event_counts.items()):
+        out.sample("cogbot_events_total", count, event=event)
+
+    out.header("cogbot_command_seconds", "summary", "Command latency, from prefix match to completion.")
+    for name, timings in sorted(bot.timings.commands.items()):
+        out.summary("cogbot_command_seconds", timings.total, command=name)
+
+    out.header("cogbot_command_errors_total", "counter", "Commands that failed.")
+    for name, timings in sorted(bot.timings.commands.items()):
+        out.sample("cogbot_command_errors_total", timings.total.errors, command=name)
+
+    out.header("cogbot_outbound_queue_depth", "gauge", "Discord writes waiting to be sent, by lane.")
+    for lane in bot.outbound.lanes:
+        out.sample("cogbot_outbound_queue_depth", bot.outbound.depth(lane), lane=lane.name.lower())
+
+    out.header("cogbot_outbound_in_flight", "gauge", "Discord writes being sent.")
+    out.sample("cogbot_outbound_in_flight", bot.outbound.in_flight)
+
+    caches = sorted(bot.caches.caches.items())
+    out.header("cogbot_cache_entries", "gauge", "Entries held by each cache.")
+    for name, cache in caches:
+        out.sample("cogbot_cache_entries", len(cache), cache=name)
+    for stat in ("hits", "misses", "evictions", "expirations"):
+        metric = f"cogbot_cache_{stat}_total"
+        out.header(metric, "counter", f"Cache {stat}.")
+        for name, cache in caches:
+            out.sample(metric, getattr(cache.stats, stat), cache=name)
+
+    out.header("cogbot_dataset_age_seconds", "gauge", "Time since each dataset cache was last loaded.")
+    for name, cache in caches:
+        if cache.loaded_at is not None:
+            out.sample("cogbot_dataset_age_seconds", now - cache.loaded_at, cache=name)
+
+    out.header("cogbot_extension_ready", "gauge", "Whether each extension has warmed up successfully.")
+    for name, gate in sorted(bot.warmup.gates.items()):
+        out.sample("cogbot_extension_ready", int(gate.state is Readiness.READY), extension=name)
+
+    return out.render()
+
+
+class MetricsServer:
+    """
+    Serves the bot's metrics over HTTP on localhost, for Prometheus to scrape.
+
+    Nothing is collected until a scrape comes in, and a rendered page is reused for a short while,
+    so the cost stays bounded however often it's scraped. Only a few connections are served at
+    once; any more are turned away.
+    """
+
+    CACHE_SECONDS = 1.0
+    MAX_CONNECTIONS = 4
+    REQUEST_TIMEOUT = 5.0
+    MAX_REQUEST_BYTES = 8192
+
+    def __init__(self, bot, port: int):
+        self.bot = bot
+        self.port = port
+        self.connections = 0
+        self._server: asyncio.AbstractServer = None
+        self._page: bytes = None
+        self._page_at: float = None
+
+    async def start(self):
+        # localhost only, since metrics aren't for the outside world
+        self._server = await asyncio.start_server(
+            self._handle, host="127.0.0.1", port=self.port, loop=self.bot.loop
+        )
+        log.info(f"Serving metrics at: http://127.0.0.1:{self.port}/metrics")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _render(self) -> bytes:
+        now = time.monotonic()
+        if self._page is None or now - self._page_at >= self.CACHE_SECONDS:
+            self._page = collect(self.bot).encode("utf-8")
+            self._page_at = now
+        return self._page
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> typing.Optional[str]:
+        request_line = await reader.readline()
+        total = len(request_line)
+        # skip the headers
+        while True:
+            line = await reader.readline()
+            total += len(line)
+            if total > self.MAX_REQUEST_BYTES:
+                return None
+            if line in (b"\r\n", b"\n", b""):
+                break
+        return request_line.decode("latin-1")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.connections >= self.MAX_CONNECTIONS:
+            writer.close()
+            return
+        self.connections += 1
+        try:
+            request = await asyncio.wait_for(
+                self._read_request(reader), timeout=self.REQUEST_TIMEOUT, loop=self.bot.loop
+            )
+            parts = request.split() if request else []
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", self._render()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: close\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except:
+            log.exception("Failed to serve metrics")
+        finally:
+            self.connections -= 1
+            writer.close()
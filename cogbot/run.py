@@ -8,36 +8,55 @@ arg_parser.add_argument('--token', help='Bot token')
 arg_parser.add_argument('--tokenfile', help='Bot token file')
 arg_parser.add_argument('--log', help='Log level', default='WARNING')
 arg_parser.add_argument('--state', help='Bot state file', default='bot.json')
+arg_parser.add_argument('--log-json', help='Log structured JSON lines', action='store_true')
+arg_parser.add_argument(
+    '--log-rate', action='append', default=[], metavar='LOGGER=RATE',
+    help='Limit a logger to this many records per second below WARNING (0 for no limit)')
+arg_parser.add_argument(
+    '--log-queue-size', type=int, default=10000, help='Log records to hold for the writer')
 args = arg_parser.parse_args()
 
+import sys
+
+from cogbot.log_pipeline import JsonFormatter, LogPipeline, parse_rate_limits
+
 LOG_FMT = '%(asctime)s [%(name)s/%(levelname)s] %(message)s'
 
-# attempt to use colorlog, if available
-try:
-    import colorlog
-    import sys
-
-    formatter = colorlog.ColoredFormatter(
-        fmt='%(log_color)s' + LOG_FMT + '%(reset)s',
-        log_colors={
-            'DEBUG': 'blue',
-            'INFO': 'green',
-            'WARNING': 'yellow',
-            'ERROR': 'red',
-            'CRITICAL': 'white,bg_red',
-        }
-    )
-
-    handler = colorlog.StreamHandler(sys.stdout)
-    handler.setFormatter(formatter)
-    logging.root.addHandler(handler)
-    logging.root.setLevel(args.log)
-
-# otherwise just stick with basic logging
-except:
-    logging.basicConfig(
-        level=args.log,
-        format=LOG_FMT)
+if args.log_json:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+
+else:
+    # attempt to use colorlog, if available
+    try:
+        import colorlog
+
+        formatter = colorlog.ColoredFormatter(
+            fmt='%(log_color)s' + LOG_FMT + '%(reset)s',
+            log_colors={
+                'DEBUG': 'blue',
+                'INFO': 'green',
+                'WARNING': 'yellow',
+                'ERROR': 'red',
+                'CRITICAL': 'white,bg_red',
+            }
+        )
+
+        handler = colorlog.StreamHandler(sys.stdout)
+        handler.setFormatter(formatter)
+
+    # otherwise just stick with basic logging
+    except:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FMT))
+
+# records are written from a background thread, so logging never holds up the event loop
+log_pipeline = LogPipeline(
+    handler,
+    level=args.log,
+    rate_limits=parse_rate_limits(args.log_rate),
+    queue_size=args.log_queue_size)
+log_pipeline.start()
 
 log = logging.getLogger(__name__)
 
@@ -46,6 +65,7 @@ import time
 
 from cogbot.cog_bot import CogBot
 from cogbot.cog_bot_state import CogBotState
+from cogbot.metrics import MetricsServer
 
 
 # TODO Consider switching to the library rewrite: https://github.com/Rapptz/discord.py/tree/rewrite
@@ -86,6 +106,38 @@ def _attempt_logout(loop, bot):
         exit()
 
 
+def _export_datasets(bot, state):
+    if not state.warm_recovery:
+        return None
+    try:
+        log.info('Exporting extension datasets for warm recovery...')
+        return bot.export_datasets()
+    except:
+        log.exception('Failed to export extension datasets, recovering cold')
+        return None
+
+
+def _start_metrics(loop, bot, state):
+    if not state.metrics_port:
+        return None
+    server = MetricsServer(bot, port=state.metrics_port)
+    try:
+        loop.run_until_complete(server.start())
+        return server
+    except:
+        log.exception('Failed to start the metrics server, carrying on without it')
+        return None
+
+
+def _stop_metrics(loop, server):
+    if server is None:
+        return
+    try:
+        loop.run_until_complete(server.close())
+    except:
+        log.exception('Failed to stop the metrics server')
+
+
 def run():
     state = CogBotState(args.state)
 
@@ -93,9 +145,12 @@ def run():
 
     last_death: type = None
 
+    datasets: dict = None
+
     while True:
         log.info('Starting bot...')
-        bot = CogBot(state=state, loop=loop)
+        bot = CogBot(state=state, loop=loop, datasets=datasets)
+        datasets = None
 
         if last_death and state.notify_on_recovery and state.managers:
             log.warning(f'Notifying {len(state.managers)} managers of crash recovery...')
@@ -111,6 +166,8 @@ def run():
             for manager in state.managers:
                 bot.queue_message(bot.get_user_info, manager, message)
 
+        metrics = _start_metrics(loop, bot, state)
+
         try:
             loop.run_until_complete(bot.start(TOKEN))
 
@@ -122,13 +179,18 @@ def run():
         except Exception as ex:
             last_death = ex
             log.exception('Encountered a fatal exception')
+            datasets = _export_datasets(bot, state)
             _attempt_logout(loop, bot)
 
         except:
             last_death = None
             log.exception('Encountered an unknown error')
+            datasets = _export_datasets(bot, state)
             _attempt_logout(loop, bot)
 
+        finally:
+            _stop_metrics(loop, metrics)
+
         log.info('Closing event loop...')
         loop.close()
 
@@ -145,5 +207,8 @@ def run():
 
 
 log.info('Hello!')
-run()
-log.info('Goodbye!')
+try:
+    run()
+finally:
+    log.info('Goodbye!')
+    log_pipeline.stop()
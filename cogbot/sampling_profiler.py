@@ -0,0 +1,137 @@
+import asyncio
+import collections
+import glob
+import logging
+import os
+import sys
+import threading
+import time
+import typing
+from datetime import datetime
+
+
+log = logging.getLogger(__name__)
+
+
+# a sample whose innermost frame is in here is the event loop waiting for something to do
+IDLE_FILES = ("selectors.py",)
+
+
+class SampleWindow:
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.ended_at: datetime = None
+        # folded stack -> samples
+        self.stacks: typing.Counter[str] = collections.Counter()
+        # cog (or command) method -> samples
+        self.cogs: typing.Counter[str] = collections.Counter()
+        self.samples = 0
+        self.idle = 0
+
+
+class SamplingProfiler:
+    """
+    Samples the event loop thread's stack at a low rate from a background thread, for a continuous
+    picture of where the bot spends its time at very little cost.
+
+    Each sample is filed under the innermost cog method on the stack (so under the command, for a
+    command) and counted as a folded stack. Every window, the stacks are written to a `.folded`
+    file that flame graph tools can render, and only the most recent files are kept. Samples of
+    the loop sitting idle are counted but not written.
+    """
+
+    STACK_LIMIT = 64
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        find_cog: typing.Callable[[typing.Any], typing.Optional[typing.Tuple[str, str]]],
+        interval: float = 0.05,
+        window: float = 300,
+        directory: str = "profiles",
+        keep: int = 12,
+    ):
+        self.loop = loop
+        self.find_cog = find_cog
+        self.interval = interval
+        self.window = window
+        self.directory = directory
+        self.keep = keep
+        self.current = SampleWindow()
+        self.last: SampleWindow = None
+        self._loop_thread_id: int = None
+        self._labels: typing.Dict[typing.Any, str] = {}
+        self._stopping = threading.Event()
+        self._thread: threading.Thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.loop.call_soon(self._start_thread)
+
+    def _start_thread(self):
+        # called on the loop, to find out which thread it runs in
+        self._loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        window_ends_at = time.monotonic() + self.window
+        while not self._stopping.wait(self.interval):
+            try:
+                self._sample()
+                if time.monotonic() >= window_ends_at:
+                    window_ends_at += self.window
+                    self._rotate()
+            except:
+                log.exception("Failed to sample the event loop")
+        self._rotate()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            label = self._labels[code] = f"{module}.{code.co_name}"
+        return label
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        window = self.current
+        window.samples += 1
+
+        if os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+            window.idle += 1
+            return
+
+        owner = self.find_cog(frame)
+        root = f"{owner[0]}.{owner[1]}" if owner else "(bot)"
+        window.cogs[root] += 1
+
+        labels = []
+        while frame is not None and len(labels) < self.STACK_LIMIT:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.append(root)
+        labels.reverse()
+        window.stacks[";".join(labels)] += 1
+
+    def _rotate(self):
+        window, self.current = self.current, SampleWindow()
+        window.ended_at = datetime.now()
+        self.last = window
+        if not window.stacks:
+            return
+
+        path = os.path.join(self.directory, f"{window.started_at:%Y%m%d-%H%M%S}.folded")
+        with open(path, "w") as fp:
+            for stack, count in window.stacks.items():
+                fp.write(f"{stack} {count}\n")
+
+        # only keep the most recent windows
+        for old_path in sorted(glob.glob(os.path.join(self.directory, "*.folded")))[:-self.keep]:
+            os.remove(old_path)
@@ -0,0 +1,193 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+import typing
+
+from cogbot.timing import Histogram
+
+
+log = logging.getLogger(__name__)
+
+
+class JobStats:
+    def __init__(self):
+        self.runs = Histogram()
+        # how late each run started, compared to when it was due
+        self.lateness = Histogram()
+        # runs skipped because the previous one was still going
+        self.overlaps = 0
+
+
+class Job:
+    def __init__(
+        self,
+        scheduler: "Scheduler",
+        name: str,
+        callback: typing.Callable[[], typing.Awaitable],
+        delay: float,
+        interval: float = None,
+        jitter: float = 0,
+        owner=None,
+    ):
+        self.scheduler = scheduler
+        self.name = name
+        self.callback = callback
+        self.delay = delay
+        self.interval = interval
+        self.jitter = jitter
+        self.owner = owner
+        self.due: float = None
+        self.running = False
+        self.cancelled = False
+        # bumped on every reschedule, so that older heap entries are ignored
+        self.version = 0
+
+    def reschedule(self, delay: float = None):
+        """
+        Move the job's next run to `delay` seconds from now (its original delay by default). Does
+        nothing once the job has been cancelled, or if it's a one-shot job that has already run.
+        """
+        # the scheduler only keeps jobs that have runs to come
+        if self in self.scheduler.jobs:
+            self.scheduler._push(self, self.delay if delay is None else delay)
+
+    def cancel(self):
+        self.cancelled = True
+        self.version += 1
+        self.scheduler.jobs.discard(self)
+
+
+class Scheduler:
+    """
+    Runs periodic and delayed jobs from a single heap of deadlines, with one timer armed for the
+    earliest of them.
+
+    Rescheduling pushes a new heap entry and leaves the old one to be skipped when it comes up, so
+    it takes O(log n). An interval job that is still running when it comes due again is skipped
+    rather than run twice at once.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.jobs: typing.Set[Job] = set()
+        self.stats: typing.Dict[str, JobStats] = {}
+        self._heap: typing.List[typing.Tuple[float, int, int, Job]] = []
+        self._counter = itertools.count()
+        self._timer: asyncio.Handle = None
+        self._timer_due: float = None
+
+    def every(
+        self,
+        name: str,
+        interval: float,
+        callback: typing.Callable[[], typing.Awaitable],
+        jitter: float = 0,
+        delay: float = None,
+        owner=None,
+    ) -> Job:
+        """ Run `callback` every `interval` seconds, give or take up to `jitter` seconds. """
+        job = Job(self, name, callback, interval if delay is None else delay, interval, jitter, owner)
+        self.jobs.add(job)
+        self._push(job, job.delay)
+        return job
+
+    def after(
+        self,
+        name: str,
+        delay: float,
+        callback: typing.Callable[[], typing.Awaitable],
+        owner=None,
+    ) -> Job:
+        """ Run `callback` once, `delay` seconds from now. """
+        job = Job(self, name, callback, delay, owner=owner)
+        self.jobs.add(job)
+        self._push(job, delay)
+        return job
+
+    def cancel_owner(self, owner):
+        for job in tuple(self.jobs):
+            if job.owner is owner:
+                job.cancel()
+
+    def close(self):
+        for job in tuple(self.jobs):
+            job.cancel()
+        self._heap = []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _push(self, job: Job, delay: float):
+        job.version += 1
+        job.due = self.loop.time() + max(0.0, delay)
+        heapq.heappush(self._heap, (job.due, next(self._counter), job.version, job))
+        self._arm()
+
+    def _arm(self):
+        # drop entries that have been superseded or cancelled
+        while self._heap and self._heap[0][2] != self._heap[0][3].version:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        due = self._heap[0][0]
+        if self._timer is not None:
+            if self._timer_due <= due:
+                return
+            self._timer.cancel()
+        self._timer_due = due
+        self._timer = self.loop.call_at(due, self._fire)
+
+    def _fire(self):
+        self._timer = None
+        now = self.loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            due, _, version, job = heapq.heappop(self._heap)
+            if version != job.version:
+                continue
+            self._start(job, due, now)
+        self._arm()
+
+    def _get_stats(self, name: str) -> JobStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = JobStats()
+        return stats
+
+    def _start(self, job: Job, due: float, now: float):
+        stats = self._get_stats(job.name)
+
+        if job.interval is None:
+            # one-shot jobs are done once started
+            self.jobs.discard(job)
+        else:
+            # plan the next run from when this one was due, so that runs don't drift
+            next_due = max(due + job.interval, now)
+            if job.jitter:
+                next_due += random.uniform(0, job.jitter)
+            self._push(job, next_due - now)
+
+        if job.running:
+            stats.overlaps += 1
+            log.warning(f"Skipping run of {job.name} because the previous run is still going")
+            return
+
+        stats.lateness.observe(now - due)
+        self.loop.create_task(self._run(job, stats))
+
+    async def _run(self, job: Job, stats: JobStats):
+        job.running = True
+        started_at = time.perf_counter()
+        failed = False
+        try:
+            await job.callback()
+        except asyncio.CancelledError:
+            pass
+        except:
+            failed = True
+            log.exception(f"Scheduled job {job.name} failed")
+        finally:
+            job.running = False
+            stats.runs.observe(time.perf_counter() - started_at, failed)
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import typing
+
+from cogbot.batch_writer import BatchWriter
+
+
+log = logging.getLogger(__name__)
+
+
+# marks a pending deletion in the write batch
+_DELETED = object()
+
+
+class StoreNamespace:
+    """ A view of the store limited to a single namespace. """
+
+    def __init__(self, store: "StateStore", name: str):
+        self.store = store
+        self.name = name
+
+    def get(self, key: str, default=None):
+        return self.store.get(self.name, key, default)
+
+    def set(self, key: str, value):
+        self.store.set(self.name, key, value)
+
+    def delete(self, key: str):
+        self.store.delete(self.name, key)
+
+    def items(self) -> typing.Iterable[typing.Tuple[str, typing.Any]]:
+        return self.store.items(self.name)
+
+    def __contains__(self, key: str) -> bool:
+        return self.store.contains(self.name, key)
+
+
+class StateStore:
+    """
+    Key/value store for runtime state that should survive a restart, grouped by namespace.
+
+    Everything is restored into memory with one sequential read on startup, and reads are served
+    from memory. Writes are collected and flushed to SQLite in batches on a background thread, so
+    they never block the event loop. Values must be JSON-serializable. Without a path, the store
+    lives in memory only.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        loop: asyncio.AbstractEventLoop = None,
+        flush_interval: float = 5,
+    ):
+        self.path = path
+        self.loop = loop
+        self.flush_interval = flush_interval
+        self._data: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        self._pending: typing.Dict[typing.Tuple[str, str], typing.Any] = {}
+        self._connection: sqlite3.Connection = None
+        self._writer = BatchWriter(
+            loop,
+            "state entries",
+            flush_interval,
+            take=self._take_batch,
+            write=self._write_batch,
+            restore=self._restore_batch,
+        )
+
+        if self.path:
+            self._open()
+
+    def _open(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._connection.commit()
+
+        count = 0
+        for namespace, key, value in self._connection.execute(
+            "SELECT namespace, key, value FROM kv"
+        ):
+            try:
+                self._data.setdefault(namespace, {})[key] = json.loads(value)
+                count += 1
+            except ValueError:
+                log.exception(f"Skipping unreadable state entry {namespace}/{key}")
+
+        log.info(f"Restored {count} state entries from: {self.path}")
+
+    def namespace(self, name: str) -> StoreNamespace:
+        return StoreNamespace(self, name)
+
+    def get(self, namespace: str, key: str, default=None):
+        return self._data.get(namespace, {}).get(key, default)
+
+    def contains(self, namespace: str, key: str) -> bool:
+        return key in self._data.get(namespace, {})
+
+    def items(self, namespace: str) -> typing.Iterable[typing.Tuple[str, typing.Any]]:
+        return tuple(self._data.get(namespace, {}).items())
+
+    def set(self, namespace: str, key: str, value):
+        self._data.setdefault(namespace, {})[key] = value
+        self._mark_dirty(namespace, key, value)
+
+    def delete(self, namespace: str, key: str):
+        if self._data.get(namespace, {}).pop(key, _DELETED) is not _DELETED:
+            self._mark_dirty(namespace, key, _DELETED)
+
+    def _mark_dirty(self, namespace: str, key: str, value):
+        if not self._connection:
+            return
+        self._pending[(namespace, key)] = value
+        self._writer.schedule()
+
+    def _take_batch(self, everything: bool) -> typing.List[typing.Tuple[str, str, typing.Any]]:
+        batch = []
+        for (namespace, key), value in self._pending.items():
+            if value is _DELETED:
+                batch.append((namespace, key, None))
+                continue
+            try:
+                batch.append((namespace, key, json.dumps(value)))
+            except (TypeError, ValueError):
+                # writing it again won't help, so it stays in memory only
+                log.exception(f"Skipping state entry that isn't JSON-serializable {namespace}/{key}")
+        self._pending = {}
+        return batch
+
+    def _restore_batch(self, batch: typing.List[typing.Tuple[str, str, typing.Any]]):
+        # whatever is in memory now is what belongs on disk, unless it's already pending again
+        for namespace, key, _ in batch:
+            value = self._data.get(namespace, {}).get(key, _DELETED)
+            self._pending.setdefault((namespace, key), value)
+
+    def _write_batch(self, batch: typing.List[typing.Tuple[str, str, typing.Any]]):
+        with self._connection:
+            for namespace, key, value in batch:
+                if value is None:
+                    self._connection.execute(
+                        "DELETE FROM kv WHERE namespace = ? AND key = ?",
+                        (namespace, key),
+                    )
+                else:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)",
+                        (namespace, key, value),
+                    )
+
+    async def flush(self):
+        if not self._pending:
+            return
+        await self._writer.flush()
+
+    async def close(self):
+        await self._writer.close()
+        if self._connection:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,351 @@
+"""
+Microbenchmarks for the lookups extensions do on every command, over synthetic datasets at 1x,
+10x and 100x production sizes.
+
+    python -m cogbot.testing.bench --save          # record a baseline
+    python -m cogbot.testing.bench                 # compare against it, failing on regressions
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import string
+import sys
+import time
+import typing
+
+from cogbot.cache_registry import Cache
+
+
+log = logging.getLogger(__name__)
+
+
+Cases = typing.Dict[str, typing.Callable[[], typing.Any]]
+
+# roughly what the production datasets hold
+FAQ_ENTRIES = 300
+FAQ_TAGS = 100
+BLOCKS = 800
+INVITES = 100
+INVITE_TAGS = 50
+GROUPS = 30
+SERVER_ROLES = 60
+SERVER_MEMBERS = 2000
+NBTDOC_MODULES = 100
+NBTDOC_COMPOUNDS = 600
+NBTDOC_FIELDS_PER_COMPOUND = 8
+SCHEMA_KEYS = 30
+
+
+def _bare(cls, **attrs):
+    """ An instance of `cls` with just the given attributes, skipping its constructor. """
+    obj = cls.__new__(cls)
+    obj.__dict__.update(attrs)
+    return obj
+
+
+def _dataset(name: str, mapping: dict) -> Cache:
+    """ A cache loaded with `mapping`, like the one the extension keeps its dataset in. """
+    cache = Cache(name)
+    cache.load(mapping)
+    return cache
+
+
+def _word(rng: random.Random, length: int = 8) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+class _Role:
+    def __init__(self, role_id: str, name: str):
+        self.id = role_id
+        self.name = name
+
+
+class _Member:
+    def __init__(self, roles: typing.List[_Role]):
+        self.roles = roles
+
+
+class _Server:
+    def __init__(self, server_id: str, roles: typing.List[_Role], members: typing.List[_Member]):
+        self.id = server_id
+        self.roles = roles
+        self.members = members
+
+
+def faq_cases(scale: int, rng: random.Random) -> Cases:
+    from cogbot.extensions.faq import Faq, FAQEntry
+
+    tags = [f"tag{i}" for i in range(FAQ_TAGS)]
+    entries_by_key = {}
+    entries_by_tag = {}
+    for i in range(FAQ_ENTRIES * scale):
+        entry = FAQEntry(key=f"entry{i}", tags=rng.sample(tags, 3), message=_word(rng, 200))
+        entries_by_key[entry.key] = entry
+        for tag in entry.tags:
+            entries_by_tag.setdefault(tag, []).append(entry)
+    faq = _bare(
+        Faq,
+        entries_by_key=_dataset("Faq.entries_by_key", entries_by_key),
+        entries_by_tag=_dataset("Faq.entries_by_tag", entries_by_tag),
+    )
+
+    last_key = f"entry{FAQ_ENTRIES * scale - 1}"
+    return {
+        "get_entries_strict.key": lambda: faq.get_entries_strict(last_key),
+        "get_entries_strict.miss": lambda: faq.get_entries_strict("nothing here"),
+        "get_entries_strict.tags": lambda: faq.get_entries_strict("#tag1 #tag2"),
+        "get_entries_by_tags.one": lambda: faq.get_entries_by_tags(["tag1"]),
+        "get_entries_by_tags.three": lambda: faq.get_entries_by_tags(["tag1", "tag2", "tag3"]),
+    }
+
+
+def mcblock_cases(scale: int, rng: random.Random) -> Cases:
+    from cogbot.extensions.mcblock import Block, BlockProperty, McBlock
+
+    block_map = {}
+    for i in range(BLOCKS * scale):
+        name = f"minecraft:block_{i}"
+        properties = tuple(BlockProperty(_word(rng, 6), ("true", "false")) for _ in range(3))
+        block_map[name] = Block(name=name, properties=properties)
+    mcblock = _bare(McBlock, block_map=_dataset("McBlock.block_map", block_map))
+
+    return {
+        "get_block.namespaced": lambda: mcblock.get_block("minecraft:block_1"),
+        "get_block.short": lambda: mcblock.get_block("block_1"),
+        "get_block.miss": lambda: mcblock.get_block("not_a_block"),
+    }
+
+
+def invite_cases(scale: int, rng: random.Random) -> Cases:
+    from cogbot.extensions.invite import Invite
+
+    tags = [f"tag{i}" for i in range(INVITE_TAGS)]
+    invites_by_tag = {}
+    for i in range(INVITES * scale):
+        # the lookup only hashes invites, so their urls stand in for them
+        invite = f"https://discord.gg/{_word(rng)}"
+        for tag in rng.sample(tags, 3):
+            invites_by_tag.setdefault(tag, set()).add(invite)
+    invite = _bare(Invite, invites_by_tag=_dataset("Invite.invites_by_tag", invites_by_tag))
+
+    return {
+        "get_invites_by_tags.one": lambda: invite.get_invites_by_tags("tag1"),
+        "get_invites_by_tags.three": lambda: invite.get_invites_by_tags("TAG1 tag2 tag3"),
+    }
+
+
+def groups_cases(scale: int, rng: random.Random) -> Cases:
+    from cogbot.extensions.groups.group_directory import GroupDirectory
+
+    roles = [_Role(str(i), f"Role{i}") for i in range(SERVER_ROLES * scale)]
+    members = [_Member(rng.sample(roles, rng.randint(0, 3))) for _ in range(SERVER_MEMBERS * scale)]
+    server = _Server("1", roles, members)
+
+    directory = GroupDirectory()
+    # the last roles are the slowest to find
+    directory.import_server(
+        server.id, {role.name.lower(): role.id for role in roles[-GROUPS * scale:]}
+    )
+    group = roles[-1].name
+
+    return {
+        "get_role": lambda: directory.get_role(server, group),
+        "get_members": lambda: directory.get_members(server, group),
+    }
+
+
+def _nbtdoc_data(scale: int, rng: random.Random) -> dict:
+    field_names = [_word(rng).capitalize() for _ in range(400)] + ["CustomName"]
+    modules = [{"children": {}} for _ in range(NBTDOC_MODULES * scale)]
+    for i in range(1, len(modules)):
+        modules[(i - 1) // 4]["children"][f"module{i}"] = {"Module": i}
+
+    compounds = []
+    for i in range(NBTDOC_COMPOUNDS * scale):
+        fields = {
+            name: {"description": "", "nbttype": "Byte"}
+            for name in rng.sample(field_names, NBTDOC_FIELDS_PER_COMPOUND)
+        }
+        compounds.append({"fields": fields})
+        rng.choice(modules)["children"][f"Compound{i}"] = {"Compound": i}
+
+    return {"module_arena": modules, "compound_arena": compounds, "root_modules": {"minecraft": 0}}
+
+
+def mcnbtdoc_cases(scale: int, rng: random.Random) -> Cases:
+    from cogbot.extensions.mcnbtdoc import find_index_locs, search_field, search_nbt
+
+    data = _nbtdoc_data(scale, rng)
+    root = data["module_arena"][0]
+    last = len(data["compound_arena"]) - 1
+
+    return {
+        "search_field": lambda: search_field("customname", data),
+        "search_nbt": lambda: search_nbt("compound1", 0, [], data),
+        "find_index_locs": lambda: find_index_locs(last, "Compound", root, data, []),
+    }
+
+
+def schema_cases(scale: int, rng: random.Random) -> Cases:
+    import nbtlib
+    from cogbot.extensions.nbt.schema import errors, schema
+
+    keys = SCHEMA_KEYS * scale
+    parents = tuple(
+        schema(f"Parent{p}", {f"Parent{p}Key{i}": nbtlib.Int for i in range(keys)})
+        for p in range(2)
+    )
+    dct = {f"Key{i}": nbtlib.Int for i in range(keys)}
+    dct["Items"] = nbtlib.List[nbtlib.Int]
+    child = schema("Child", dct, inherit=parents)
+
+    valid = nbtlib.Compound({f"Key{i}": nbtlib.Int(i) for i in range(keys)})
+    valid["Items"] = nbtlib.List[nbtlib.Int]([nbtlib.Int(i) for i in range(10)])
+    inherited = nbtlib.Compound({f"Parent1Key{i}": nbtlib.Int(i) for i in range(keys)})
+    typo = nbtlib.Compound({"Kye0": nbtlib.Int(0)})
+
+    def cast_typo():
+        try:
+            child(typo)
+        except errors.SchemaValidationError:
+            pass
+
+    return {
+        "_cast.own": lambda: child(valid),
+        "_cast.inherited": lambda: child(inherited),
+        "_cast.typo": cast_typo,
+    }
+
+
+SUITES: typing.Dict[str, typing.Callable[[int, random.Random], Cases]] = {
+    "Faq": faq_cases,
+    "McBlock": mcblock_cases,
+    "Invite": invite_cases,
+    "GroupDirectory": groups_cases,
+    "mcnbtdoc": mcnbtdoc_cases,
+    "ValidationCompoundSchema": schema_cases,
+}
+
+
+def measure(fn: typing.Callable[[], typing.Any], min_time: float, repeat: int) -> float:
+    """ Best time per call, out of `repeat` runs of enough calls to take at least `min_time`. """
+    number = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed <= 0 else max(2, int(min_time / elapsed) + 1)
+
+    best = elapsed / number
+    # a run that slow isn't noisy enough to need repeating
+    if elapsed > 1:
+        return best
+    for _ in range(repeat - 1):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started_at) / number)
+    return best
+
+
+def run(
+    scales: typing.Iterable[int],
+    pattern: str = None,
+    min_time: float = 0.1,
+    repeat: int = 5,
+    seed: int = 0,
+) -> typing.Dict[str, float]:
+    results = {}
+    for scale in scales:
+        for suite_name, make_cases in SUITES.items():
+            try:
+                cases = make_cases(scale, random.Random(seed))
+            except ImportError as e:
+                log.warning(f"Skipping {suite_name}: {e}")
+                continue
+            for case_name, fn in cases.items():
+                name = f"{suite_name}.{case_name}@{scale}x"
+                if pattern and pattern not in name:
+                    continue
+                results[name] = seconds = measure(fn, min_time, repeat)
+                print(f"{name:<60} {seconds * 1e6:>12.2f}us")
+    return results
+
+
+def compare(
+    results: typing.Dict[str, float],
+    baseline: typing.Dict[str, float],
+    tolerance: float,
+    min_delta: float,
+) -> typing.List[str]:
+    """ Describe each result that is slower than its baseline by more than the tolerance. """
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        # tiny absolute differences are timer noise, however large they are relatively
+        if seconds > base * (1 + tolerance) and seconds - base > min_delta:
+            regressions.append(
+                f"{name}: {base * 1e6:.2f}us -> {seconds * 1e6:.2f}us "
+                f"(+{(seconds / base - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark extension lookup paths.")
+    arg_parser.add_argument("--baseline", help="Baseline file", default="bench_baseline.json")
+    arg_parser.add_argument("--save", help="Save the results as the new baseline", action="store_true")
+    arg_parser.add_argument("--scales", help="Dataset scales to run", type=int, nargs="+", default=[1, 10, 100])
+    arg_parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    arg_parser.add_argument("--min-time", help="Seconds to run each benchmark for, at least", type=float, default=0.1)
+    arg_parser.add_argument("--repeat", help="Runs of each benchmark, of which the best counts", type=int, default=5)
+    arg_parser.add_argument(
+        "--tolerance", help="How much slower than the baseline counts as a regression", type=float, default=0.25
+    )
+    arg_parser.add_argument(
+        "--min-delta", help="Smallest slowdown in seconds that counts as a regression", type=float, default=1e-6
+    )
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level="INFO", format="%(message)s")
+
+    results = run(args.scales, args.filter, args.min_time, args.repeat)
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as fp:
+                baseline = json.load(fp)
+        baseline.update(results)
+        with open(args.baseline, "w") as fp:
+            json.dump(baseline, fp, indent=2, sort_keys=True)
+        log.info(f"Saved {len(results)} results to: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        log.warning(f"No baseline to compare against, save one with --save: {args.baseline}")
+        return
+
+    with open(args.baseline) as fp:
+        baseline = json.load(fp)
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    if regressions:
+        log.error(f"{len(regressions)} benchmarks regressed:")
+        for regression in regressions:
+            log.error(f"  {regression}")
+        sys.exit(1)
+
+    log.info(f"No regressions against: {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import math
+import random
+import re
+import time
+import typing
+from datetime import datetime
+from email.utils import formatdate
+
+import discord
+from multidict import CIMultiDict
+
+from cogbot.cog_bot import CogBot
+from cogbot.cog_bot_state import CogBotState
+from cogbot.timing import Histogram
+from cogbot.web_client import WebClientError
+
+
+log = logging.getLogger(__name__)
+
+
+# 2015-01-01, the start of Discord's snowflake clock
+DISCORD_EPOCH = 1420070400000
+
+CUSTOM_EMOJI_PATTERN = re.compile(r"<a?:(\w+):(\d+)>")
+
+# extension state keys that hold channel ids
+CHANNEL_KEYS = ("log_channel", "channels", "help_channels", "other_channels")
+
+ROUTE_PATTERN = re.compile(r"/api(?:/v\d+)?/([^?]*)")
+# identifying parameters are kept, everything else is collapsed into the route
+MAJOR_PARAMETERS = ("channels", "guilds")
+
+
+def _iso_now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class Snowflakes:
+    """ Generates ids that sort by creation time, like real Discord ids. """
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def __call__(self) -> str:
+        ms = int(time.time() * 1000) - DISCORD_EPOCH
+        return str((ms << 22) | (next(self._counter) & 0x3FFFFF))
+
+
+class FakeWorld:
+    """
+    Gateway payloads for the servers, channels, roles, emoji and members a bot state refers to,
+    plus some synthetic members to generate traffic from.
+    """
+
+    def __init__(self, state: CogBotState, members: int = 50, seed: int = None):
+        self.state = state
+        self.snowflake = Snowflakes()
+        self.random = random.Random(seed)
+
+        self.bot_user = self.make_user("cogbot", bot=True)
+        self.guilds: typing.Dict[str, dict] = {}
+        # channel id -> guild id
+        self.channel_guilds: typing.Dict[str, str] = {}
+        self.emojis: typing.Dict[str, dict] = {}
+        self.users: typing.Dict[str, dict] = {self.bot_user["id"]: self.bot_user}
+        self.managers = list(state.managers)
+
+        for server_key, server_options in state.servers.items():
+            guild_id = server_options.get("id")
+            if guild_id:
+                self._build_guild(server_key, guild_id, server_options, members)
+
+    def make_user(self, name: str, user_id: str = None, bot: bool = False) -> dict:
+        return {
+            "id": user_id or self.snowflake(),
+            "username": name,
+            "discriminator": "0001",
+            "avatar": None,
+            "bot": bot,
+        }
+
+    def make_member(self, user: dict, roles: typing.Iterable[str] = ()) -> dict:
+        return {
+            "user": user,
+            "roles": list(roles),
+            "nick": None,
+            "joined_at": _iso_now(),
+            "deaf": False,
+            "mute": False,
+        }
+
+    def _find_channel_ids(self, value, found: typing.Set[str], key: str = None):
+        if isinstance(value, dict):
+            for k, v in value.items():
+                self._find_channel_ids(v, found, k)
+        elif isinstance(value, list):
+            for v in value:
+                self._find_channel_ids(v, found, key)
+        elif key in CHANNEL_KEYS and isinstance(value, str) and value.isdigit():
+            found.add(value)
+
+    def _find_emojis(self, value, found: typing.Dict[str, str]):
+        if isinstance(value, dict):
+            for v in value.values():
+                self._find_emojis(v, found)
+        elif isinstance(value, list):
+            for v in value:
+                self._find_emojis(v, found)
+        elif isinstance(value, str):
+            for name, emoji_id in CUSTOM_EMOJI_PATTERN.findall(value):
+                found[emoji_id] = name
+
+    def _build_guild(self, server_key: str, guild_id: str, server_options: dict, members: int):
+        channel_ids = set()
+        self._find_channel_ids(server_options, channel_ids)
+        self._find_channel_ids(self.state.extension_state, channel_ids)
+        # somewhere for general chatter, too
+        channel_ids.add(self.snowflake())
+
+        channels = [
+            {
+                "id": channel_id,
+                "name": f"channel-{i}",
+                "type": 0,
+                "position": i,
+                "topic": None,
+                "permission_overwrites": [],
+            }
+            for i, channel_id in enumerate(sorted(channel_ids))
+        ]
+
+        # the @everyone role shares the server's id
+        roles = [{"id": guild_id, "name": "@everyone", "permissions": 0}]
+        for role_id in self.state.staff_roles:
+            roles.append({"id": role_id, "name": f"staff-{role_id[-4:]}"})
+        # roles that groups expect to find by name
+        groups_state = self.state.extension_state.get("cogbot.extensions.groups", {})
+        for group in groups_state.get("server_groups", {}).get(guild_id, ()):
+            roles.append({"id": self.snowflake(), "name": group})
+        for i, role in enumerate(roles):
+            role.setdefault("permissions", 0)
+            role.update(color=0, hoist=False, position=i, managed=False, mentionable=False)
+
+        found_emojis = {}
+        self._find_emojis(self.state.extension_state, found_emojis)
+        emojis = [
+            {"id": emoji_id, "name": name, "roles": [], "require_colons": True, "managed": False}
+            for emoji_id, name in found_emojis.items()
+        ]
+        for emoji in emojis:
+            self.emojis[emoji["id"]] = emoji
+
+        member_payloads = [self.make_member(self.bot_user)]
+        for manager_id in self.managers:
+            user = self.users.setdefault(manager_id, self.make_user(f"manager-{manager_id[-4:]}", manager_id))
+            member_payloads.append(self.make_member(user))
+        for i in range(members):
+            user = self.make_user(f"user-{i}")
+            self.users[user["id"]] = user
+            member_payloads.append(self.make_member(user))
+
+        self.guilds[guild_id] = {
+            "id": guild_id,
+            "name": server_key,
+            "owner_id": self.bot_user["id"],
+            "region": "us-east",
+            "afk_timeout": 300,
+            "afk_channel_id": None,
+            "icon": None,
+            "splash": None,
+            "member_count": len(member_payloads),
+            "large": False,
+            "unavailable": False,
+            "verification_level": 0,
+            "mfa_level": 0,
+            "default_message_notifications": 0,
+            "features": [],
+            "roles": roles,
+            "emojis": emojis,
+            "members": member_payloads,
+            "channels": channels,
+            "presences": [],
+            "voice_states": [],
+        }
+        for channel in channels:
+            self.channel_guilds[channel["id"]] = guild_id
+
+    def add_channel(self, guild_id: str, channel_id: str):
+        if channel_id in self.channel_guilds:
+            return
+        channels = self.guilds[guild_id]["channels"]
+        channels.append(
+            {
+                "id": channel_id,
+                "name": f"channel-{len(channels)}",
+                "type": 0,
+                "position": len(channels),
+                "topic": None,
+                "permission_overwrites": [],
+            }
+        )
+        self.channel_guilds[channel_id] = guild_id
+
+    def add_member(self, guild_id: str, user: dict):
+        guild = self.guilds[guild_id]
+        if any(member["user"]["id"] == user["id"] for member in guild["members"]):
+            return
+        user = self.users.setdefault(user["id"], dict(user, avatar=None))
+        guild["members"].append(self.make_member(user))
+        guild["member_count"] += 1
+
+    def add_role(self, guild_id: str, role_id: str):
+        roles = self.guilds[guild_id]["roles"]
+        if any(role["id"] == role_id for role in roles):
+            return
+        roles.append(
+            {
+                "id": role_id,
+                "name": f"role-{role_id[-4:]}",
+                "permissions": 0,
+                "color": 0,
+                "hoist": False,
+                "position": len(roles),
+                "managed": False,
+                "mentionable": False,
+            }
+        )
+
+    def emoji_payload(self, emoji: str) -> dict:
+        match = CUSTOM_EMOJI_PATTERN.fullmatch(emoji)
+        if match:
+            return {"id": match.group(2), "name": match.group(1)}
+        return {"id": None, "name": emoji}
+
+    def make_message(self, channel_id: str, author: dict, content: str, embed: dict = None) -> dict:
+        return {
+            "id": self.snowflake(),
+            "channel_id": channel_id,
+            "author": author,
+            "content": content or "",
+            "timestamp": _iso_now(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [embed] if embed else [],
+            "pinned": False,
+            "type": 0,
+        }
+
+
+class FakeResponse:
+    """ Just enough of an aiohttp response for the client library to read. """
+
+    def __init__(self, status: int, data, headers: typing.Dict[str, str]):
+        self.status = status
+        self.reason = "OK"
+        self.headers = CIMultiDict(headers, **{"Content-Type": "application/json"})
+        self._body = json.dumps(data)
+
+    async def text(self, encoding: str = None) -> str:
+        return self._body
+
+    async def json(self):
+        return json.loads(self._body)
+
+    async def release(self):
+        pass
+
+
+class FakeRouteStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.rate_limited = 0
+
+
+class FakeDiscord:
+    """
+    Stands in for the Discord gateway and REST API, so that a `CogBot` and its extensions can run
+    offline.
+
+    Gateway events are fed straight into the bot's connection state parsers, exactly as the real
+    websocket would. REST requests are answered locally after a simulated latency, with a per-route
+    rate limit that makes requests wait out a 429 the way the client library does, and the rate
+    limit headers Discord would send. Remote fetches made by extensions fail as if offline, unless
+    a fixture is given for the URL.
+
+    Both are answered at the bottom of the client's stack, where the network would be, so that
+    everything the bot wraps around its requests (tracing, rate-limit feedback, connection limits)
+    still runs.
+    """
+
+    def __init__(
+        self,
+        bot: CogBot,
+        world: FakeWorld = None,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        rate_limit: typing.Tuple[int, float] = (5, 5.0),
+        web_fixtures: typing.Dict[str, bytes] = None,
+        seed: int = None,
+    ):
+        self.bot = bot
+        self.world = world or FakeWorld(bot.state, seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.web_fixtures = web_fixtures or {}
+        self.random = random.Random(seed)
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.route_stats: typing.Dict[str, FakeRouteStats] = {}
+        # recent message payloads by channel id, served back for history requests
+        self.history: typing.Dict[str, typing.Deque[dict]] = collections.defaultdict(
+            lambda: collections.deque(maxlen=100)
+        )
+        # called with each message the bot sends
+        self.message_listeners: typing.List[typing.Callable[[dict], None]] = []
+        self._buckets: typing.Dict[str, typing.Deque[float]] = {}
+
+    def install(self):
+        # `ClientSession.request` hands its arguments on to `_request`, and wraps what it returns
+        # in something that can only wait on a generator-based coroutine
+        @asyncio.coroutine
+        def request(method, url, **kwargs):
+            return (yield from self.request(method, url, **kwargs))
+
+        self.bot.http.session._request = request
+        self.bot.web._fetch = self.web_request
+        self.bot._is_logged_in.set()
+
+    async def connect(self, timeout: float = 60):
+        """ Deliver the ready event with every server, then wait for cogs to warm up. """
+        connection = self.bot.connection
+        connection.user = discord.User(**self.world.bot_user)
+        for guild in self.world.guilds.values():
+            connection._add_server_from_data(guild)
+        self.bot.dispatch("ready")
+
+        # give the ready handlers a chance to start warm-ups
+        await asyncio.sleep(0, loop=self.bot.loop)
+        gates = [gate.opened.wait() for gate in self.bot.warmup.gates.values()]
+        if gates:
+            await asyncio.wait(gates, timeout=timeout, loop=self.bot.loop)
+
+    # gateway
+
+    def dispatch(self, event: str, data: dict):
+        getattr(self.bot.connection, "parse_" + event.lower())(data)
+
+    def inject_message(self, channel_id: str, author_id: str, content: str) -> dict:
+        data = self.world.make_message(channel_id, self.world.users[author_id], content)
+        self.history[channel_id].append(data)
+        self.dispatch("MESSAGE_CREATE", data)
+        return data
+
+    def inject_reaction(self, channel_id: str, message_id: str, user_id: str, emoji: str):
+        self.dispatch(
+            "MESSAGE_REACTION_ADD",
+            {
+                "user_id": user_id,
+                "channel_id": channel_id,
+                "message_id": message_id,
+                "emoji": self.world.emoji_payload(emoji),
+            },
+        )
+
+    def inject_member_update(self, guild_id: str, user_id: str, roles: typing.List[str]):
+        self.dispatch(
+            "GUILD_MEMBER_UPDATE",
+            {"guild_id": guild_id, "user": self.world.users[user_id], "roles": roles, "nick": None},
+        )
+
+    # rest
+
+    def _parse_route(self, method: str, url: str) -> typing.Tuple[str, typing.List[str]]:
+        match = ROUTE_PATTERN.search(url)
+        parts = (match.group(1) if match else url).strip("/").split("/")
+        route = []
+        for i, part in enumerate(parts):
+            if part.isdigit() and not (i > 0 and parts[i - 1] in MAJOR_PARAMETERS):
+                route.append("{id}")
+            else:
+                route.append(part)
+        return f"{method} /{'/'.join(route)}", parts
+
+    async def _wait_for_bucket(self, route: str, stats: FakeRouteStats) -> typing.Dict[str, str]:
+        """ Wait for room in the route's bucket, and take it, returning the rate limit headers. """
+        limit, per = self.rate_limit
+        starts = self._buckets.setdefault(route, collections.deque())
+        while True:
+            now = time.monotonic()
+            while starts and now - starts[0] >= per:
+                starts.popleft()
+            if len(starts) < limit:
+                starts.append(now)
+                reset_at = time.time() + per - (now - starts[0])
+                return {
+                    "Date": formatdate(usegmt=True),
+                    "X-RateLimit-Limit": str(limit),
+                    "X-RateLimit-Remaining": str(limit - len(starts)),
+                    "X-RateLimit-Reset": str(math.ceil(reset_at)),
+                }
+            # a 429, which the client library waits out before retrying
+            self.rate_limited += 1
+            stats.rate_limited += 1
+            await asyncio.sleep(per - (now - starts[0]), loop=self.bot.loop)
+
+    async def request(self, method: str, url: str, *, data=None, params=None, **kwargs):
+        # takes the place of the client's `ClientSession._request`, so gets what the client
+        # library would send over the wire
+        route, parts = self._parse_route(method, url)
+        stats = self.route_stats.get(route)
+        if stats is None:
+            stats = self.route_stats[route] = FakeRouteStats()
+
+        started_at = time.perf_counter()
+        self.requests += 1
+        headers = await self._wait_for_bucket(route, stats)
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(delay, loop=self.bot.loop)
+
+        # JSON bodies arrive already encoded; uploads aren't modelled
+        payload = json.loads(data) if isinstance(data, str) else {}
+        try:
+            result = self._respond(method, parts, payload or {}, params or {})
+            return FakeResponse(200, result, headers)
+        finally:
+            stats.latency.observe(time.perf_counter() - started_at)
+
+    def _respond(self, method: str, parts: typing.List[str], payload: dict, params: dict):
+        if parts[0] == "channels" and len(parts) >= 2:
+            channel_id = parts[1]
+
+            if len(parts) == 2 and method == "PATCH":
+                return self._edit_channel(channel_id, payload)
+
+            if len(parts) == 3 and parts[2] == "messages":
+                if method == "POST":
+                    data = self.world.make_message(
+                        channel_id, self.world.bot_user, payload.get("content"), payload.get("embed")
+                    )
+                    self.history[channel_id].append(data)
+                    for listener in self.message_listeners:
+                        listener(data)
+                    # the gateway echoes our own messages back to us
+                    self.bot.loop.call_soon(self.dispatch, "MESSAGE_CREATE", dict(data))
+                    return data
+                if method == "GET":
+                    limit = int(params.get("limit", 50))
+                    return list(reversed(self.history[channel_id]))[:limit]
+
+            if len(parts) == 4 and parts[2] == "messages" and method == "PATCH":
+                for data in self.history[channel_id]:
+                    if data["id"] == parts[3]:
+                        data.update(
+                            content=payload.get("content", data["content"]),
+                            edited_timestamp=_iso_now(),
+                        )
+                        return data
+
+        if parts[0] == "guilds" and len(parts) == 4 and parts[2] == "members" and method == "PATCH":
+            guild_id, user_id = parts[1], parts[3]
+            if "roles" in payload and user_id in self.world.users:
+                self.bot.loop.call_soon(
+                    self.inject_member_update, guild_id, user_id, payload["roles"]
+                )
+
+        if parts[0] == "users" and len(parts) == 2 and method == "GET":
+            return self.world.users.get(parts[1]) or self.world.make_user("unknown", parts[1])
+
+        # reactions, deletions and anything else we don't model
+        return None
+
+    def _edit_channel(self, channel_id: str, payload: dict) -> dict:
+        guild = self.world.guilds[self.world.channel_guilds[channel_id]]
+        for channel in guild["channels"]:
+            if channel["id"] == channel_id:
+                channel.update({k: v for k, v in payload.items() if k in ("name", "topic", "position")})
+                data = dict(channel, guild_id=guild["id"])
+                self.bot.loop.call_soon(self.dispatch, "CHANNEL_UPDATE", data)
+                return data
+
+    async def web_request(self, method: str, url: str, **kwargs) -> bytes:
+        content = self.web_fixtures.get(url)
+        if content is None:
+            raise WebClientError(f"Failed to {method} {url}: offline", url=url)
+        return content
+
+    async def drain(self, timeout: float = 30):
+        """ Wait for queued outbound actions to finish. """
+        deadline = time.monotonic() + timeout
+        outbound = self.bot.outbound
+        while (outbound.depth() or outbound.in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05, loop=self.bot.loop)
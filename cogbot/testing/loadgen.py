@@ -0,0 +1,261 @@
+"""
+Drive a whole bot offline with synthetic traffic, and report how it held up.
+
+    python -m cogbot.testing.loadgen --state examples/commander_bot.json --rate 50 --duration 60
+"""
+
+import argparse
+import asyncio
+import collections
+import logging
+import random
+import time
+import typing
+
+from discord.ext.commands import UserInputError
+
+from cogbot.cog_bot import CogBot
+from cogbot.cog_bot_state import CogBotState
+from cogbot.testing.fake_discord import FakeDiscord, FakeWorld
+from cogbot.timing import Histogram
+
+
+log = logging.getLogger(__name__)
+
+
+CHATTER = (
+    "hello",
+    "does anyone know how to make a clock",
+    "my command block isn't working",
+    "thanks!",
+    "what version is this for?",
+)
+
+REACTIONS = ("👍", "❤", "✅", "❓")
+
+# command lines members actually send, without prefix, by the extension that handles them
+DEFAULT_COMMANDS = {
+    "cogbot.extensions.about": ("about",),
+    "cogbot.extensions.faq": ("faq", "faq clock", "faq command block"),
+    "cogbot.extensions.groups": ("groups list",),
+    "cogbot.extensions.invite": ("invite", "invites"),
+    "cogbot.extensions.jira": ("jira MC-4", "bug MC-2025"),
+    "cogbot.extensions.lmgtfy": ("lmgtfy how to make a clock",),
+    "cogbot.extensions.mcblock": ("block stone", "block redstone wire"),
+    "cogbot.extensions.mcc12": ("mcc12 give", "mcc12 scoreboard players"),
+    "cogbot.extensions.mccq": ("mcc give", "mcc execute as", "mccq tp -v 1.13"),
+    "cogbot.extensions.mcnbtdoc": ("nbt entity minecraft:zombie", "nbt item minecraft:stone"),
+    "cogbot.extensions.ping": ("ping",),
+    "cogbot.extensions.vote": ("vote",),
+}
+
+# errors from command lines that didn't parse, rather than from the commands themselves
+BAD_USAGE_ERRORS = (UserInputError,)
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        fake: FakeDiscord,
+        rate: float,
+        duration: float,
+        commands: typing.List[str],
+        mix: typing.Tuple[float, float, float] = (0.3, 0.5, 0.2),
+        seed: int = None,
+    ):
+        self.fake = fake
+        self.bot = fake.bot
+        self.world = fake.world
+        self.rate = rate
+        self.duration = duration
+        self.commands = commands
+        self.mix = mix
+        self.random = random.Random(seed)
+        self.sent: typing.Dict[str, int] = collections.Counter()
+        # command errors by type, with bad usage counted apart from the rest
+        self.errors: typing.Dict[str, int] = collections.Counter()
+        self.bad_usage = 0
+        self.elapsed = 0.0
+        self.bot.add_listener(self.on_command_error)
+
+        # synthetic members, keyed by server, in every channel of that server
+        self.targets = [
+            (channel["id"], [m["user"]["id"] for m in guild["members"] if not m["user"]["bot"]])
+            for guild in self.world.guilds.values()
+            for channel in guild["channels"]
+        ]
+        emojis = [f"<:{e['name']}:{e['id']}>" for e in self.world.emojis.values()]
+        self.reactions = list(REACTIONS) + emojis
+
+    async def on_command_error(self, error: Exception, ctx):
+        if isinstance(error, BAD_USAGE_ERRORS):
+            self.bad_usage += 1
+        else:
+            self.errors[type(error).__name__] += 1
+
+    def _step(self):
+        channel_id, members = self.random.choice(self.targets)
+        author_id = self.random.choice(members)
+        kind = self.random.choices(("command", "chatter", "reaction"), weights=self.mix)[0]
+
+        if kind == "reaction":
+            history = self.fake.history[channel_id]
+            if history:
+                message = self.random.choice(history)
+                self.fake.inject_reaction(
+                    channel_id, message["id"], author_id, self.random.choice(self.reactions)
+                )
+                self.sent[kind] += 1
+                return
+            # nothing to react to yet
+            kind = "chatter"
+
+        if kind == "command" and self.commands:
+            content = self.bot.state.command_prefix[0] + self.random.choice(self.commands)
+        else:
+            kind = "chatter"
+            content = self.random.choice(CHATTER)
+
+        self.fake.inject_message(channel_id, author_id, content)
+        self.sent[kind] += 1
+
+    async def run(self):
+        started_at = time.monotonic()
+        deadline = started_at + self.duration
+        next_at = started_at
+        while True:
+            # arrivals are a poisson process, like real users
+            next_at += self.random.expovariate(self.rate)
+            if next_at >= deadline:
+                break
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()), loop=self.bot.loop)
+            try:
+                self._step()
+            except:
+                log.exception("Failed to inject event")
+        await self.fake.drain()
+        self.elapsed = time.monotonic() - started_at
+
+    def report(self) -> str:
+        report = format_report(self.fake, self.sent, self.elapsed)
+        errors = ", ".join(f"{count} {name}" for name, count in sorted(self.errors.items()))
+        return (
+            f"{report}\n\n"
+            f"Command errors: {self.bad_usage} bad usage, {sum(self.errors.values())} other"
+            + (f" ({errors})" if errors else "")
+        )
+
+
+def default_commands(bot: CogBot) -> typing.List[str]:
+    """ Realistic command lines for every loaded extension that has some. """
+    return [line for ext in bot.extensions for line in DEFAULT_COMMANDS.get(ext, ())]
+
+
+def format_report(fake: FakeDiscord, sent: typing.Dict[str, int], elapsed: float) -> str:
+    bot = fake.bot
+    lines = []
+    total = sum(sent.values())
+    lines.append(
+        f"Sent {total} events in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.1f}/s): "
+        + ", ".join(f"{count} {kind}" for kind, count in sorted(sent.items()))
+    )
+
+    # command latency per extension
+    by_cog: typing.Dict[str, Histogram] = {}
+    for name, timings in bot.timings.commands.items():
+        command = bot.get_command(name)
+        cog_name = (command.cog_name if command else None) or "(bot)"
+        histogram = by_cog.get(cog_name)
+        if histogram is None:
+            histogram = by_cog[cog_name] = Histogram()
+        histogram.merge(timings.total)
+    lines.append("")
+    lines.append("Command latency by extension:")
+    for cog_name, histogram in sorted(by_cog.items()):
+        lines.append(f"  {cog_name}: {histogram.summary()}")
+
+    lines.append("")
+    lines.append("Listener latency:")
+    for name, histogram in sorted(bot.timings.listeners.items()):
+        lines.append(f"  {name}: {histogram.summary()}")
+
+    lines.append("")
+    lines.append(f"REST calls: {fake.requests} total, {fake.rate_limited} rate limited")
+    for route, stats in sorted(fake.route_stats.items()):
+        lines.append(f"  {route}: {stats.latency.summary()} 429s={stats.rate_limited}")
+
+    lines.append("")
+    lines.append(f"Event loop lag: {bot.loop_monitor.lag.summary()}")
+    lines.append(f"Event loop stalls: {len(bot.loop_monitor.stalls)}")
+    for stall in bot.loop_monitor.stalls:
+        lines.append(f"  {stall.duration * 1000:.0f}ms in {stall.culprit}")
+
+    return "\n".join(lines)
+
+
+async def _main(args, loop: asyncio.AbstractEventLoop):
+    state = CogBotState(args.state)
+    # keep the load test's runtime state in memory
+    state.state_store = None
+    state.lazy_extensions = False
+
+    bot = CogBot(state=state, loop=loop)
+    world = FakeWorld(state, members=args.members, seed=args.seed)
+    fake = FakeDiscord(
+        bot,
+        world,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=(args.rate_limit, args.rate_limit_per),
+        seed=args.seed,
+    )
+    fake.install()
+
+    try:
+        await fake.connect()
+        commands = args.command or default_commands(bot)
+        generator = LoadGenerator(
+            fake,
+            rate=args.rate,
+            duration=args.duration,
+            commands=commands,
+            mix=(args.commands, args.chatter, args.reactions),
+            seed=args.seed,
+        )
+        await generator.run()
+        print(generator.report())
+    finally:
+        await bot.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Load test a bot against a fake Discord.")
+    arg_parser.add_argument("--state", help="Bot state file", default="bot.json")
+    arg_parser.add_argument("--log", help="Log level", default="WARNING")
+    arg_parser.add_argument("--rate", help="Events per second", type=float, default=20)
+    arg_parser.add_argument("--duration", help="Seconds to generate traffic for", type=float, default=30)
+    arg_parser.add_argument("--members", help="Synthetic members per server", type=int, default=50)
+    arg_parser.add_argument(
+        "--command", help="Command line to send, without prefix (repeatable)", action="append"
+    )
+    arg_parser.add_argument("--commands", help="Weight of commands in the mix", type=float, default=0.3)
+    arg_parser.add_argument("--chatter", help="Weight of plain chatter in the mix", type=float, default=0.5)
+    arg_parser.add_argument("--reactions", help="Weight of reactions in the mix", type=float, default=0.2)
+    arg_parser.add_argument("--latency", help="Simulated REST latency in seconds", type=float, default=0.05)
+    arg_parser.add_argument("--jitter", help="Simulated REST latency jitter in seconds", type=float, default=0.02)
+    arg_parser.add_argument("--rate-limit", help="Requests per route per window", type=int, default=5)
+    arg_parser.add_argument("--rate-limit-per", help="Rate limit window in seconds", type=float, default=5.0)
+    arg_parser.add_argument("--seed", help="Random seed, for repeatable runs", type=int)
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=args.log, format="%(asctime)s [%(name)s/%(levelname)s] %(message)s")
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(_main(args, loop))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Check that bulk reactions are pipelined, by timing them against a fake Discord: adding several
+reactions at once has to take at least a round trip less than adding them one after another, and
+they have to reach Discord in the order given.
+
+    python -m cogbot.testing.reactions --state examples/ping.json
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import typing
+import urllib.parse
+
+from cogbot.cog_bot import CogBot
+from cogbot.cog_bot_state import CogBotState
+from cogbot.testing.fake_discord import FakeDiscord, FakeWorld
+
+
+log = logging.getLogger(__name__)
+
+
+EMOJIS = ("👍", "👎", "❤", "✅")
+
+# the server the check reacts in
+SERVER_ID = "100000000000000001"
+
+
+async def time_reactions(fake: FakeDiscord, emojis: typing.Sequence[str]) -> float:
+    """ Seconds taken to add the reactions to a fresh message, one at a time if there's one. """
+    bot = fake.bot
+    channel_id = fake.world.guilds[SERVER_ID]["channels"][0]["id"]
+    message = await bot.send_message(bot.get_channel(channel_id), "react here")
+    started_at = time.perf_counter()
+    if len(emojis) == 1:
+        await bot.add_reaction(message, emojis[0])
+    else:
+        await bot.add_reactions(message, *emojis)
+    return time.perf_counter() - started_at
+
+
+def record_reactions(fake: FakeDiscord) -> typing.List[str]:
+    """ Keep track of the emoji of each reaction request the fake receives, in order. """
+    emojis = []
+    request = fake.request
+
+    async def recording_request(method, url, **kwargs):
+        if "/reactions/" in url:
+            emojis.append(urllib.parse.unquote(url.split("/reactions/")[1].split("/")[0]))
+        return await request(method, url, **kwargs)
+
+    fake.request = recording_request
+    return emojis
+
+
+async def _main(args, loop: asyncio.AbstractEventLoop) -> bool:
+    state = CogBotState(args.state)
+    # just the bot itself, in a server of its own
+    state.servers = {"reactions": {"id": SERVER_ID}}
+    state.extensions = []
+    state.state_store = None
+    state.event_recorder = None
+
+    bot = CogBot(state=state, loop=loop)
+    world = FakeWorld(state, members=0)
+    fake = FakeDiscord(bot, world, latency=args.latency, jitter=0, seed=0)
+    requested = record_reactions(fake)
+    fake.install()
+
+    try:
+        await fake.connect()
+        # the single reaction goes first, so that the bulk ones start from a bucket that has
+        # learned the route's limits, as it would have in a running bot
+        single = await time_reactions(fake, EMOJIS[:1])
+        bulk = await time_reactions(fake, EMOJIS)
+    finally:
+        await bot.close()
+
+    # one after another they'd take a round trip each
+    limit = single * (len(EMOJIS) - 1)
+    print(f"1 reaction:  {single * 1000:8.1f}ms")
+    print(f"{len(EMOJIS)} reactions: {bulk * 1000:8.1f}ms (limit {limit * 1000:.1f}ms)")
+    passed = True
+    if bulk >= limit:
+        log.error("Bulk reactions weren't pipelined")
+        passed = False
+    if tuple(requested[1:]) != EMOJIS:
+        log.error(f"Bulk reactions were sent out of order: {' '.join(requested[1:])}")
+        passed = False
+    return passed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Check that bulk reactions are pipelined.")
+    arg_parser.add_argument("--state", help="Bot state file", default="bot.json")
+    arg_parser.add_argument("--log", help="Log level", default="WARNING")
+    arg_parser.add_argument("--latency", help="Simulated REST latency in seconds", type=float, default=0.05)
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=args.log, format="%(asctime)s [%(name)s/%(levelname)s] %(message)s")
+
+    loop = asyncio.get_event_loop()
+    try:
+        passed = loop.run_until_complete(_main(args, loop))
+    finally:
+        loop.close()
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
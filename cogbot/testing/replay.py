@@ -0,0 +1,254 @@
+"""
+Replay a recorded event log through a whole bot offline, and report how it held up.
+
+    python -m cogbot.testing.replay --state examples/commander_bot.json --events events.jsonl.gz
+    python -m cogbot.testing.replay --state examples/commander_bot.json --events events.jsonl.gz --speed 1
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import time
+import typing
+
+from cogbot.cog_bot import CogBot
+from cogbot.cog_bot_state import CogBotState
+from cogbot.event_recorder import (
+    BOT_PLACEHOLDER,
+    GUILD_MEMBER_UPDATE,
+    MESSAGE_CREATE,
+    MESSAGE_REACTION_ADD,
+    read_log,
+)
+from cogbot.testing.fake_discord import FakeDiscord, FakeWorld
+from cogbot.testing.loadgen import format_report
+
+
+log = logging.getLogger(__name__)
+
+
+Entry = typing.Tuple[float, str, dict]
+
+
+class Replayer:
+    """
+    Feeds recorded events back through the bot's connection state, in their original order.
+
+    With a `speed` the original pacing is kept (scaled by it); without one, events are delivered
+    as fast as the bot will take them, yielding to the event loop in between so that handlers keep
+    up. The fake world is extended with whatever channels, members and roles the log refers to.
+
+    The recording bot's own messages aren't replayed, since the bot sends its own. Each one is
+    matched to the next message the bot sends in the same channel, and reactions to it are sent to
+    that message instead, once there is one. Those reactions wait on the side, so the rest of the
+    log carries on in the meantime.
+    """
+
+    def __init__(
+        self,
+        fake: FakeDiscord,
+        entries: typing.List[Entry],
+        speed: float = None,
+        match_timeout: float = 5,
+    ):
+        self.fake = fake
+        self.bot = fake.bot
+        self.world = fake.world
+        self.speed = speed
+        self.match_timeout = match_timeout
+        self.sent: typing.Dict[str, int] = collections.Counter()
+        self.skipped = 0
+        self.unmatched_reactions = 0
+        self.elapsed = 0.0
+        # recorded ids of the bot's own messages -> the id of the message sent in its place
+        self.bot_messages: typing.Dict[str, asyncio.Future] = {}
+        # reactions to bot messages that are waiting for their message to be sent
+        self._waiting_reactions: typing.List[asyncio.Task] = []
+        # per channel, recorded bot messages that haven't been sent yet, and the other way round
+        self._unmatched_recorded: typing.Dict[str, typing.Deque[str]] = collections.defaultdict(
+            collections.deque
+        )
+        self._unmatched_sent: typing.Dict[str, typing.Deque[str]] = collections.defaultdict(
+            collections.deque
+        )
+        self.entries = [self._prepare(entry) for entry in entries]
+        fake.message_listeners.append(self._on_bot_message)
+
+    def _prepare(self, entry: Entry) -> typing.Optional[Entry]:
+        offset, event, payload = entry
+        # mentions of the recording bot become mentions of the fake one
+        payload = json.loads(
+            json.dumps(payload).replace(BOT_PLACEHOLDER, self.world.bot_user["id"])
+        )
+
+        if event == MESSAGE_CREATE and payload["author"]["id"] == self.world.bot_user["id"]:
+            self.bot_messages[payload["id"]] = self.bot.loop.create_future()
+            return offset, event, payload
+
+        if event == MESSAGE_CREATE:
+            guild_id = payload.pop("guild_id", None)
+            if guild_id not in self.world.guilds:
+                return None
+            self.world.add_channel(guild_id, payload["channel_id"])
+            self.world.add_member(guild_id, payload["author"])
+            data = self.world.make_message(payload["channel_id"], payload["author"], payload["content"])
+            data.update(payload)
+            return offset, event, data
+
+        if event == MESSAGE_REACTION_ADD:
+            guild_id = self.world.channel_guilds.get(payload["channel_id"])
+            if guild_id is None:
+                return None
+            return offset, event, payload
+
+        if event == GUILD_MEMBER_UPDATE:
+            guild_id = payload["guild_id"]
+            if guild_id not in self.world.guilds:
+                return None
+            self.world.add_member(guild_id, payload["user"])
+            for role_id in payload["roles"]:
+                self.world.add_role(guild_id, role_id)
+            return offset, event, payload
+
+    def _match(self, recorded_id: str, sent_id: str):
+        future = self.bot_messages[recorded_id]
+        if not future.done():
+            future.set_result(sent_id)
+
+    def _expect_bot_message(self, data: dict):
+        sent = self._unmatched_sent[data["channel_id"]]
+        if sent:
+            self._match(data["id"], sent.popleft())
+        else:
+            self._unmatched_recorded[data["channel_id"]].append(data["id"])
+
+    def _on_bot_message(self, data: dict):
+        recorded = self._unmatched_recorded[data["channel_id"]]
+        if recorded:
+            self._match(recorded.popleft(), data["id"])
+        else:
+            self._unmatched_sent[data["channel_id"]].append(data["id"])
+
+    async def _bot_message_id(self, recorded_id: str) -> typing.Optional[str]:
+        """ The id of the message sent in place of a recorded one, once the bot has sent it. """
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(self.bot_messages[recorded_id], loop=self.bot.loop),
+                timeout=self.match_timeout,
+                loop=self.bot.loop,
+            )
+        except asyncio.TimeoutError:
+            return None
+
+    async def _deliver_reaction(self, data: dict):
+        message_id = await self._bot_message_id(data["message_id"])
+        if message_id is None:
+            self.unmatched_reactions += 1
+            return
+        self._deliver(MESSAGE_REACTION_ADD, dict(data, message_id=message_id))
+
+    def _deliver(self, event: str, data: dict):
+        try:
+            if event == MESSAGE_CREATE:
+                self.fake.history[data["channel_id"]].append(data)
+            self.fake.dispatch(event, data)
+            self.sent[event.lower()] += 1
+        except:
+            log.exception(f"Failed to replay {event}")
+
+    async def run(self):
+        loop = self.bot.loop
+        started_at = time.monotonic()
+        for entry in self.entries:
+            if entry is None:
+                self.skipped += 1
+                continue
+            offset, event, data = entry
+            if self.speed:
+                delay = started_at + offset / self.speed - time.monotonic()
+                await asyncio.sleep(max(0.0, delay), loop=loop)
+            else:
+                await asyncio.sleep(0, loop=loop)
+            if event == MESSAGE_CREATE and data["id"] in self.bot_messages:
+                self._expect_bot_message(data)
+                continue
+            if event == MESSAGE_REACTION_ADD and data["message_id"] in self.bot_messages:
+                future = self.bot_messages[data["message_id"]]
+                if not future.done():
+                    self._waiting_reactions.append(loop.create_task(self._deliver_reaction(data)))
+                    continue
+                data = dict(data, message_id=future.result())
+            self._deliver(event, data)
+        if self._waiting_reactions:
+            await asyncio.gather(*self._waiting_reactions, loop=loop)
+        await self.fake.drain()
+        self.elapsed = time.monotonic() - started_at
+
+    def report(self) -> str:
+        report = format_report(self.fake, self.sent, self.elapsed)
+        if self.skipped:
+            report += f"\n\nSkipped {self.skipped} events for servers that aren't configured"
+        if self.unmatched_reactions:
+            report += (
+                f"\n\nSkipped {self.unmatched_reactions} reactions to bot messages that weren't "
+                f"sent again"
+            )
+        return report
+
+
+async def _main(args, loop: asyncio.AbstractEventLoop):
+    state = CogBotState(args.state)
+    # keep the replay's runtime state in memory, and don't record the replay itself
+    state.state_store = None
+    state.lazy_extensions = False
+    state.event_recorder = None
+
+    bot = CogBot(state=state, loop=loop)
+    world = FakeWorld(state, members=0)
+    fake = FakeDiscord(
+        bot,
+        world,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit=(args.rate_limit, args.rate_limit_per),
+        seed=0,
+    )
+    # extend the world before connecting, so the ready event carries everything
+    replayer = Replayer(fake, list(read_log(args.events)), speed=args.speed)
+    fake.install()
+
+    try:
+        await fake.connect()
+        await replayer.run()
+        print(replayer.report())
+    finally:
+        await bot.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Replay recorded events against a fake Discord.")
+    arg_parser.add_argument("--state", help="Bot state file", default="bot.json")
+    arg_parser.add_argument("--events", help="Recorded event log", required=True)
+    arg_parser.add_argument("--log", help="Log level", default="WARNING")
+    arg_parser.add_argument(
+        "--speed", help="Replay at this multiple of real time, instead of as fast as possible", type=float
+    )
+    arg_parser.add_argument("--latency", help="Simulated REST latency in seconds", type=float, default=0.05)
+    arg_parser.add_argument("--jitter", help="Simulated REST latency jitter in seconds", type=float, default=0.02)
+    arg_parser.add_argument("--rate-limit", help="Requests per route per window", type=int, default=5)
+    arg_parser.add_argument("--rate-limit-per", help="Rate limit window in seconds", type=float, default=5.0)
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=args.log, format="%(asctime)s [%(name)s/%(levelname)s] %(message)s")
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(_main(args, loop))
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import asyncio
+import math
+import typing
+
+
+def current_task(loop: asyncio.AbstractEventLoop) -> typing.Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task(loop=loop)
+    except AttributeError:
+        return asyncio.Task.current_task(loop=loop)
+    except RuntimeError:
+        return None
+
+
+class Histogram:
+    """
+    Fixed-size histogram of durations in logarithmic buckets, so that recording is a single index
+    calculation and memory use doesn't grow. Percentiles are accurate to within a bucket (20%).
+    """
+
+    MIN = 1e-5
+    GROWTH = 1.2
+    BUCKETS = 100
+
+    _log_growth = math.log(GROWTH)
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, error: bool = False):
+        if seconds <= self.MIN:
+            index = 0
+        else:
+            index = min(
+                int(math.log(seconds / self.MIN) / self._log_growth) + 1,
+                self.BUCKETS - 1,
+            )
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def merge(self, other: "Histogram"):
+        for index, count in enumerate(other.buckets):
+            self.buckets[index] += count
+        self.count += other.count
+        self.errors += other.errors
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """ Upper bound of the bucket holding the `q`th percentile (0-100). """
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * q / 100)
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(self.MIN * (self.GROWTH ** index), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return (self.total / self.count) if self.count else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"n={self.count} err={self.errors} "
+            f"p50={self.percentile(50) * 1000:.1f}ms "
+            f"p95={self.percentile(95) * 1000:.1f}ms "
+            f"p99={self.percentile(99) * 1000:.1f}ms "
+            f"max={self.max * 1000:.1f}ms"
+        )
+
+
+class CommandTimings:
+    def __init__(self):
+        # the whole invocation
+        self.total = Histogram()
+        # prefix matching and command lookup
+        self.parse = Histogram()
+        # waiting for the command's cog to warm up
+        self.wait = Histogram()
+        # checks, argument conversion and the command body
+        self.body = Histogram()
+        # time the body spent waiting on Discord writes
+        self.api = Histogram()
+
+
+class Timings:
+    """
+    Timing histograms per command and per cog event listener.
+
+    Discord API time is attributed to whichever command is running in the current task, so it can
+    be told apart from time spent in the command itself.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.commands: typing.Dict[str, CommandTimings] = {}
+        self.listeners: typing.Dict[str, Histogram] = {}
+        # API time accumulated by each task running a command, with the total at the start of each
+        # command nested in it
+        self._api_time: typing.Dict[
+            asyncio.Task, typing.Tuple[typing.List[float], typing.List[float]]
+        ] = {}
+
+    def get_command(self, name: str) -> CommandTimings:
+        timings = self.commands.get(name)
+        if timings is None:
+            timings = self.commands[name] = CommandTimings()
+        return timings
+
+    def get_listener(self, name: str) -> Histogram:
+        histogram = self.listeners.get(name)
+        if histogram is None:
+            histogram = self.listeners[name] = Histogram()
+        return histogram
+
+    def begin_command(self):
+        task = current_task(self.loop)
+        if task is None:
+            return
+        entry = self._api_time.get(task)
+        if entry is None:
+            self._api_time[task] = ([0.0], [0.0])
+        else:
+            # a command run from within another, so both get the time
+            total, starts = entry
+            starts.append(total[0])
+
+    def end_command(self) -> float:
+        """ Stop attributing API time to the current command, returning how much it had. """
+        task = current_task(self.loop)
+        entry = self._api_time.get(task)
+        if entry is None:
+            return 0.0
+        total, starts = entry
+        started_at = starts.pop()
+        if not starts:
+            del self._api_time[task]
+        return total[0] - started_at
+
+    def get_api_time(self) -> float:
+        """ API time of the current task so far, since its outermost command began. """
+        entry = self._api_time.get(current_task(self.loop))
+        return entry[0][0] if entry else 0.0
+
+    def add_api_time(self, seconds: float):
+        entry = self._api_time.get(current_task(self.loop))
+        if entry is not None:
+            entry[0][0] += seconds
+
+    def observe_command(
+        self,
+        name: str,
+        parse: float,
+        wait: float,
+        body: float,
+        api: float,
+        error: bool = False,
+    ):
+        timings = self.get_command(name)
+        timings.total.observe(parse + wait + body, error)
+        timings.parse.observe(parse)
+        timings.wait.observe(wait)
+        timings.body.observe(body, error)
+        timings.api.observe(api)
+
+    def observe_listener(self, name: str, seconds: float, error: bool = False):
+        self.get_listener(name).observe(seconds, error)
@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import time
+import typing
+
+from cogbot.json_lines import JsonLinesAppender, read_lines
+from cogbot.timing import current_task
+
+
+log = logging.getLogger(__name__)
+
+
+class Span:
+    """ A timed piece of work within a trace. Use as a context manager to time it. """
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        trace_id: str,
+        span_id: int,
+        parent_id: typing.Optional[int],
+        name: str,
+        attrs: dict,
+    ):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.started_at: float = None
+        self.duration: float = None
+        self.error: str = None
+        self._task: asyncio.Task = None
+        self._start: float = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        self._task = current_task(self.tracer.loop)
+        self.tracer._push(self._task, self)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer._pop(self._task, self)
+
+    def to_dict(self) -> dict:
+        entry = {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": round(self.started_at, 6),
+            "duration": round(self.duration, 6),
+        }
+        if self.error:
+            entry["error"] = self.error
+        if self.attrs:
+            entry["attrs"] = self.attrs
+        return entry
+
+
+class NullSpan:
+    """ Stands in for a span when nothing is being traced, doing nothing. """
+
+    trace_id = None
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class JsonLinesExporter:
+    """
+    Writes finished spans to a local file, one JSON object per line, for analysing offline.
+
+    Spans are buffered and appended every few seconds off the event loop. If the file can't keep
+    up, the oldest unwritten spans are dropped rather than letting the buffer grow.
+    """
+
+    def __init__(self, bot, path: str, flush_interval: float = 5, max_buffer: int = 10000):
+        self.path = path
+        self._log = JsonLinesAppender(bot, path, "JsonLinesExporter", flush_interval, max_buffer)
+
+    @property
+    def exported(self) -> int:
+        return self._log.written
+
+    @property
+    def dropped(self) -> int:
+        return self._log.dropped
+
+    def start(self):
+        self._log.start()
+
+    def export(self, span: Span):
+        self._log.append(span.to_dict())
+
+    async def flush(self):
+        await self._log.flush()
+
+    async def close(self):
+        await self._log.close()
+        if self.dropped:
+            log.warning(f"Dropped {self.dropped} spans that couldn't be written in time")
+        log.info(f"Exported {self.exported} spans to: {self.path}")
+
+
+class Tracer:
+    """
+    Records nested, timed spans for each traced operation, such as a command invocation.
+
+    Spans are kept per task, so a span opened while a command is running becomes a child of
+    whatever span that command's task has open, without passing anything around. Work handed off
+    to other tasks (like queued Discord writes) is timed where it's awaited. Without an exporter,
+    or for invocations not picked by sampling, every span is a `NullSpan`.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        exporter: JsonLinesExporter = None,
+        sample_rate: float = 1.0,
+    ):
+        self.loop = loop
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._span_ids = itertools.count(1)
+        self._stacks: typing.Dict[asyncio.Task, typing.List[Span]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def _push(self, task: asyncio.Task, span: Span):
+        self._stacks.setdefault(task, []).append(span)
+
+    def _pop(self, task: asyncio.Task, span: Span):
+        stack = self._stacks.get(task)
+        if stack and stack[-1] is span:
+            stack.pop()
+            if not stack:
+                del self._stacks[task]
+        self.exporter.export(span)
+
+    def current_span(self) -> typing.Optional[Span]:
+        stack = self._stacks.get(current_task(self.loop))
+        return stack[-1] if stack else None
+
+    def trace(self, name: str, **attrs) -> typing.Union[Span, NullSpan]:
+        """ Begin a new trace, or a child span if the current task is already in one. """
+        if not self.enabled:
+            return NULL_SPAN
+        parent = self.current_span()
+        if parent is not None:
+            return Span(self, parent.trace_id, next(self._span_ids), parent.span_id, name, attrs)
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return NULL_SPAN
+        return Span(self, os.urandom(8).hex(), next(self._span_ids), None, name, attrs)
+
+    def span(self, name: str, **attrs) -> typing.Union[Span, NullSpan]:
+        """ A child of the current task's open span, or nothing if it isn't being traced. """
+        if not self._stacks:
+            return NULL_SPAN
+        parent = self.current_span()
+        if parent is None:
+            return NULL_SPAN
+        return Span(self, parent.trace_id, next(self._span_ids), parent.span_id, name, attrs)
+
+    async def close(self):
+        if self.exporter is not None:
+            await self.exporter.close()
+
+
+def read_spans(path: str) -> typing.Iterator[dict]:
+    return read_lines(path)
+
+
+def summarize(path: str) -> str:
+    """ Average time per span name within each kind of trace, slowest first. """
+    roots: typing.Dict[str, str] = {}
+    # (root name, span name) -> [count, total duration]
+    totals: typing.Dict[typing.Tuple[str, str], typing.List[float]] = {}
+    spans = list(read_spans(path))
+    for span in spans:
+        if span["parent"] is None:
+            attrs = span.get("attrs", {})
+            roots[span["trace"]] = attrs.get("command") or span["name"]
+    for span in spans:
+        root = roots.get(span["trace"])
+        if root is None:
+            continue
+        name = "(total)" if span["parent"] is None else span["name"]
+        entry = totals.setdefault((root, name), [0, 0.0])
+        entry[0] += 1
+        entry[1] += span["duration"]
+
+    lines = []
+    for root in sorted(set(roots.values())):
+        rows = sorted(
+            ((name, count, total) for (r, name), (count, total) in totals.items() if r == root),
+            key=lambda row: -row[2],
+        )
+        traces = next(count for name, count, _ in rows if name == "(total)")
+        lines.append(f"{root} ({traces} traces)")
+        for name, count, total in rows:
+            lines.append(
+                f"  {name:<32} {count:>6}  avg {total / count * 1000:9.2f}ms"
+                f"  per trace {total / traces * 1000:9.2f}ms"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Summarize a trace log.")
+    arg_parser.add_argument("path", help="The trace log, as written by the bot")
+    args = arg_parser.parse_args()
+    print(summarize(args.path))
+
+
+if __name__ == "__main__":
+    main()
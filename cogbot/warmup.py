@@ -0,0 +1,107 @@
+import asyncio
+import enum
+import logging
+import time
+import typing
+
+from discord.ext.commands import CommandError
+
+
+log = logging.getLogger(__name__)
+
+
+class Readiness(enum.Enum):
+    PENDING = "pending"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class ExtensionNotReady(CommandError):
+    def __init__(self, *args, cog_name: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cog_name = cog_name
+
+
+class WarmupGate:
+    def __init__(self, cog, loop: asyncio.AbstractEventLoop):
+        self.cog = cog
+        self.name = type(cog).__name__
+        self.ext = type(cog).__module__
+        self.state = Readiness.PENDING
+        self.opened = asyncio.Event(loop=loop)
+        self.started_at: float = None
+        self.duration: float = None
+        self.warm_ups = 0
+
+
+class WarmupCoordinator:
+    """
+    Runs the `on_ready` warm-up of every cog at once, with bounded concurrency, and tracks whether
+    each cog is ready yet.
+
+    A cog's gate opens after its first warm-up, whether it succeeded or not. Later warm-ups (after a
+    reconnect) leave the gate open, so commands keep working from the data they already have.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        concurrency: int = 4,
+        timeout: float = 30,
+    ):
+        self.loop = loop
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.gates: typing.Dict[str, WarmupGate] = {}
+        self.started = False
+        self._semaphore = asyncio.Semaphore(concurrency, loop=loop)
+
+    def add(self, cog):
+        """ Start tracking a cog with an `on_ready`, warming it up right away if we're past ready. """
+        gate = self.gates[type(cog).__name__] = WarmupGate(cog, self.loop)
+        if self.started:
+            self.loop.create_task(self._warm_up(gate))
+
+    def remove(self, cog):
+        gate = self.gates.pop(type(cog).__name__, None)
+        if gate is not None:
+            # don't leave any commands hanging
+            gate.opened.set()
+
+    def start(self):
+        self.started = True
+        log.info(f"Warming up {len(self.gates)} cogs...")
+        for gate in tuple(self.gates.values()):
+            self.loop.create_task(self._warm_up(gate))
+
+    async def _warm_up(self, gate: WarmupGate):
+        async with self._semaphore:
+            gate.state = Readiness.WARMING
+            gate.started_at = time.perf_counter()
+            try:
+                await gate.cog.on_ready()
+                gate.state = Readiness.READY
+            except:
+                gate.state = Readiness.FAILED
+                log.exception(f"Failed to warm up {gate.name}")
+            finally:
+                gate.duration = time.perf_counter() - gate.started_at
+                gate.warm_ups += 1
+                gate.opened.set()
+        log.info(f"Warmed up {gate.name} ({gate.state.value}) in {gate.duration:.3f}s")
+
+    async def wait(self, cog):
+        """ Wait for a cog to be ready, raising `ExtensionNotReady` if it takes too long. """
+        gate = self.gates.get(type(cog).__name__)
+        if gate is None or gate.opened.is_set():
+            return
+        log.info(f"Waiting for {gate.name} to warm up...")
+        try:
+            await asyncio.wait_for(
+                gate.opened.wait(), timeout=self.timeout, loop=self.loop
+            )
+        except asyncio.TimeoutError:
+            raise ExtensionNotReady(
+                f"{gate.name} is still starting up, try again shortly", cog_name=gate.name
+            )
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import typing
+import urllib.parse
+
+import aiohttp
+
+from cogbot.blocking import BlockingExecutor
+from cogbot.tracing import Tracer
+
+
+log = logging.getLogger(__name__)
+
+
+class WebClientError(Exception):
+    def __init__(self, *args, url: str, status: int = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.url = url
+        self.status = status
+
+
+class WebClient:
+    """ Shared non-blocking HTTP client with keep-alive pooling, used by extensions for remote data. """
+
+    # status codes that are worth retrying
+    RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+    # JSON documents larger than this many characters are parsed off the event loop
+    BLOCKING_JSON_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        timeout: float = 30,
+        retries: int = 2,
+        retry_delay: float = 1,
+        connection_limit: int = 20,
+        connection_limit_per_host: int = 4,
+        keepalive_timeout: float = 30,
+        blocking: BlockingExecutor = None,
+        tracer: Tracer = None,
+    ):
+        self.loop = loop
+        self.blocking = blocking
+        self.tracer = tracer or Tracer(loop)
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+
+        # created lazily so that the session is bound to a running loop
+        self._session: aiohttp.ClientSession = None
+        self._semaphore = asyncio.Semaphore(connection_limit, loop=loop)
+        self._host_semaphores: typing.Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            # the connector's limit is per endpoint, so the overall limit is kept by a semaphore
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                loop=self.loop,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, loop=self.loop)
+        return self._session
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urllib.parse.urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.connection_limit_per_host, loop=self.loop)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def _fetch(self, method: str, url: str, **kwargs) -> bytes:
+        async with self.session.request(method, url, **kwargs) as response:
+            if response.status >= 400:
+                raise WebClientError(
+                    f"HTTP {response.status} from: {url}",
+                    url=url,
+                    status=response.status,
+                )
+            return await response.read()
+
+    async def _request_once(self, method: str, url: str, **kwargs) -> bytes:
+        # wait for a free connection before starting the clock, so that requests queued behind a
+        # burst don't time out (and get retried, adding to the burst) before they've even started
+        async with self._get_host_semaphore(url):
+            async with self._semaphore:
+                return await asyncio.wait_for(
+                    self._fetch(method, url, **kwargs), timeout=self.timeout, loop=self.loop
+                )
+
+    async def request(self, method: str, url: str, **kwargs) -> bytes:
+        with self.tracer.span("http", method=method, url=url) as span:
+            content = await self._request_with_retries(method, url, **kwargs)
+            span.set(size=len(content))
+            return content
+
+    async def _request_with_retries(self, method: str, url: str, **kwargs) -> bytes:
+        attempt = 0
+        while True:
+            try:
+                return await self._request_once(method, url, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError, WebClientError) as e:
+                retryable = (
+                    not isinstance(e, WebClientError)
+                    or e.status in self.RETRY_STATUSES
+                )
+                if not retryable or attempt >= self.retries:
+                    if isinstance(e, WebClientError):
+                        raise
+                    raise WebClientError(
+                        f"Failed to {method} {url}: {e.__class__.__name__}", url=url
+                    ) from e
+                attempt += 1
+                delay = self.retry_delay * (2 ** (attempt - 1))
+                log.warning(
+                    f"Retrying {method} {url} in {delay} seconds "
+                    f"(attempt {attempt}/{self.retries}): {e.__class__.__name__}"
+                )
+                with self.tracer.span("http.retry_wait", attempt=attempt):
+                    await asyncio.sleep(delay, loop=self.loop)
+
+    async def get_bytes(self, url: str, **kwargs) -> bytes:
+        return await self.request("GET", url, **kwargs)
+
+    async def get_text(self, url: str, encoding: str = "utf8", **kwargs) -> str:
+        content = await self.get_bytes(url, **kwargs)
+        return content.decode(encoding)
+
+    async def get_json(self, url: str, owner=None, **kwargs):
+        content = await self.get_text(url, **kwargs)
+        offload = self.blocking and len(content) > self.BLOCKING_JSON_SIZE
+        with self.tracer.span("json.parse", size=len(content), offloaded=bool(offload)):
+            if offload:
+                return await self.blocking.run(json.loads, content, owner=owner)
+            return json.loads(content)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._host_semaphores = {}